@@ -1,5 +1,6 @@
-from .utilities import open, fetch, fetch_over_ssh
-from .structures import Atom, Residue, Ligand, Chain, Model
+from .utilities import open, fetch, fetch_over_ssh, stream
+from .utilities import open_archive, open_mirror
+from .structures import Atom, Residue, Ligand, Chain, Model, Ensemble
 
 __author__ = "Sam Ireland"
 __version__ = "1.0.10"
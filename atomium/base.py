@@ -68,13 +68,13 @@ def filter_objects(objects, key, value):
     :rtype: ``dict``"""
 
     components = key.split("__")
-    matching_objects = []
-    for structure in objects.structures:
+    positions = []
+    for n, structure in enumerate(objects.structures):
         obj = get_object_from_filter(structure, components)
         attr = get_object_attribute_from_filter(obj, components)
         if attribute_matches_value(attr, value, components):
-            matching_objects.append(structure)
-    return StructureSet(*matching_objects)
+            positions.append(n)
+    return objects._subset(positions)
 
 
 def query(func, tuple_=False):
@@ -85,20 +85,18 @@ def query(func, tuple_=False):
 
     :param func: the function to modify.
     :param bool tuple_: if ``True``, objects will be returned in a tuple not a\
-    set.
+    set, in the order the function gave them in. Filtering keeps that order,\
+    so the objects never need to be sorted.
     :rtype: ``function``"""
 
     def structures(self, *args, **kwargs):
         objects = func(self)
-        original = {s: n for n, s in enumerate(objects.structures)}
         if len(args) == 1:
             return {objects.get(args[0])} if args[0] in objects.ids else set()
         for k, v in kwargs.items():
             objects = filter_objects(objects, k, v)
         if tuple_:
-            return tuple(sorted(
-             objects.structures, key=lambda s: original[s]
-            ))
+            return tuple(objects.structures)
         else:
             return set(objects.structures)
     return structures
@@ -145,39 +143,212 @@ class StructureClass(type):
 
 class StructureSet:
     """A data structure for holding structures. It stores them internally
-    as a dictionary where they keys are IDs (to allow rapid lookup by ID) and
-    the values are all structures with that ID (to allow for duplicate IDs).
+    as a tuple, in the order they were given in, along with a dictionary
+    mapping each ID to the positions of the structures with that ID (to allow
+    rapid lookup by ID, while allowing for duplicate IDs). A structure given
+    more than once is only stored once.
 
-    Two structure sets can be added together, but they are immutable - the
-    structures they have when they are made is the structures they will always
-    have.
+    Structure sets are immutable - the structures they have when they are made
+    is the structures they will always have. Their length, iteration and
+    membership tests don't copy anything.
 
-    They're basically sets optimised to lookup things by ID.
+    Two structure sets can be added together. The result is a view of the two
+    which is only flattened into a new tuple when something needs it, and
+    which can be iterated over without being flattened. Adding to a view
+    gives a view of the sets underneath it, so views never nest. Structure
+    sets also support ``|``, ``&`` and ``-``, which keep the order of the
+    left-hand set.
+
+    A set made by filtering another (as queries do) remembers the positions of
+    its structures in the set it was filtered from, so ``&`` and ``-`` between
+    two sets filtered from the same set (such as one model's atoms) work on
+    those integer positions.
+
+    They're basically ordered sets optimised to lookup things by ID.
 
     :param \* args: the structures that will make up the StructureSet."""
 
+    __slots__ = ("_items", "_index", "_parts", "_hash", "_root", "_positions")
+
     def __init__(self, *args):
-        self._d = {}
-        for obj in args:
-            if obj._id in self._d:
-                self._d[obj._id].add(obj)
-            else:
-                self._d[obj._id] = {obj}
+        self._parts, self._hash, self._root, self._positions = (None,) * 4
+        if len({id(obj) for obj in args}) != len(args):
+            seen = set()
+            args = [obj for obj in args
+             if id(obj) not in seen and not seen.add(id(obj))]
+        self._items, self._index = tuple(args), None
+
+
+    @classmethod
+    def _view(cls, *parts):
+        """Creates a structure set which is the union of other structure sets,
+        without flattening them yet. Any of the sets which are themselves
+        unflattened views are replaced by the sets they are views of, and the
+        last two sets are merged for as long as the second to last is no
+        larger than the last - so that a view built up one structure at a
+        time is a view of only a logarithmic number of sets.
+
+        :param \*parts: the structure sets to combine.
+        :rtype: ``StructureSet``"""
+
+        flat = []
+        for part in parts:
+            flat.extend((part,) if part._items is not None else part._parts)
+        while len(flat) > 1 and len(flat[-2]) <= len(flat[-1]):
+            last = flat.pop()
+            flat[-1] = StructureSet(*flat[-1], *last)
+        new = cls.__new__(cls)
+        new._items, new._index, new._hash = None, None, None
+        new._parts, new._root, new._positions = tuple(flat), None, None
+        return new
 
 
-    def __add__(self, other):
-        new = StructureSet()
-        for s in (self, other):
-            for key, value in s._d.items():
-                if key in new._d:
-                    new._d[key].update(value)
-                else:
-                    new._d[key] = value
+    @classmethod
+    def _from_positions(cls, root, positions):
+        """Creates a structure set from some of the structures of a tuple,
+        given by their positions in it.
+
+        :param tuple root: the structures to take from.
+        :param list positions: the positions of the structures to take.
+        :rtype: ``StructureSet``"""
+
+        new = cls.__new__(cls)
+        new._items = tuple(root[n] for n in positions)
+        new._index, new._parts, new._hash = None, None, None
+        new._root, new._positions = root, tuple(positions)
         return new
 
 
+    def __add__(self, other):
+        return StructureSet._view(self, other)
+
+
+    def __or__(self, other):
+        return StructureSet._view(self, other)
+
+
+    def __and__(self, other):
+        root, positions = self._origin
+        if isinstance(other, StructureSet) and other._origin[0] is root:
+            keep = set(other._origin[1])
+            return self._from_positions(
+             root, [n for n in positions if n in keep]
+            )
+        ids = {id(obj) for obj in other}
+        return StructureSet(*[obj for obj in self if id(obj) in ids])
+
+
+    def __sub__(self, other):
+        root, positions = self._origin
+        if isinstance(other, StructureSet) and other._origin[0] is root:
+            drop = set(other._origin[1])
+            return self._from_positions(
+             root, [n for n in positions if n not in drop]
+            )
+        ids = {id(obj) for obj in other}
+        return StructureSet(*[obj for obj in self if id(obj) not in ids])
+
+
     def __len__(self):
-        return len(self.structures)
+        return len(self._structures)
+
+
+    def __iter__(self):
+        if self._items is not None: return iter(self._items)
+        return self._iter_parts(self._parts)
+
+
+    def __contains__(self, obj):
+        if self._items is None:
+            return any(obj in part for part in self._parts)
+        try:
+            positions = self._d.get(obj._id, ())
+        except AttributeError: return False
+        return any(self._items[n] is obj for n in positions)
+
+
+    def __eq__(self, other):
+        if not isinstance(other, StructureSet): return NotImplemented
+        return len(self) == len(other) and all(
+         a is b for a, b in zip(self._structures, other._structures)
+        )
+
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(tuple(id(obj) for obj in self._structures))
+        return self._hash
+
+
+    @staticmethod
+    def _iter_parts(parts):
+        """Iterates through the structures of a view's parts without
+        flattening them, skipping any structure already given by an earlier
+        part.
+
+        :param tuple parts: the structure sets that make up the view."""
+
+        seen = set()
+        for part in parts:
+            for obj in part:
+                if id(obj) not in seen:
+                    seen.add(id(obj))
+                    yield obj
+
+
+    def _subset(self, positions):
+        """Creates a structure set of some of this set's structures, given by
+        their positions in this set. The new set keeps their positions in
+        this set's origin, for ``&`` and ``-`` to use.
+
+        :param list positions: the positions of the structures to keep.
+        :rtype: ``StructureSet``"""
+
+        root, own = self._origin
+        return self._from_positions(root, [own[n] for n in positions])
+
+
+    @property
+    def _structures(self):
+        """The structures as a tuple, flattening the set first if it is a view
+        of other sets.
+
+        :rtype: ``tuple``"""
+
+        if self._items is None:
+            self._items = tuple(self._iter_parts(self._parts))
+            self._parts = None
+        return self._items
+
+
+    @property
+    def _origin(self):
+        """The tuple of structures that this set was filtered from (or its own
+        structures, if it wasn't), and the positions of this set's structures
+        in it.
+
+        :rtype: ``tuple``"""
+
+        if self._root is None:
+            return self._structures, range(len(self._structures))
+        return self._root, self._positions
+
+
+    @property
+    def _d(self):
+        """The mapping of IDs to the positions of the structures with those
+        IDs, which is only created when it is first needed.
+
+        :rtype: ``dict``"""
+
+        if self._index is None:
+            index = {}
+            for n, obj in enumerate(self._structures):
+                try:
+                    index[obj._id].append(n)
+                except KeyError: index[obj._id] = [n]
+            self._index = index
+        return self._index
 
 
     @property
@@ -195,16 +366,14 @@ class StructureSet:
 
         :rtype: ``list``"""
 
-        structures = []
-        for s in self._d.values(): structures += s
-        return structures
+        return list(self._structures)
 
 
     def get(self, id):
-        """Gets a structure by ID. If an ID points to multiple structures, just
-        one will be returned.
+        """Gets a structure by ID. If an ID points to multiple structures, the
+        first one will be returned.
 
         :returns: some structure."""
 
-        matches = self._d.get(id, set())
-        for match in matches: return match
+        positions = self._d.get(id)
+        if positions: return self._structures[positions[0]]
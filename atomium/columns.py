@@ -0,0 +1,408 @@
+"""Contains functions for flattening structures into columns - NumPy arrays
+plus small lookup tables - and for rebuilding structures from them. This is how
+structures are pickled, so that a model's object graph never has to be walked
+recursively, and so that its coordinates can travel as out-of-band buffers.
+
+The same columns can also be published in shared memory, so that worker
+processes can rebuild one large model (or just the chains they need) from it
+without each receiving a pickled copy.
+"""
+
+import numpy as np
+from .structures import Model, Chain, Residue, Ligand, Atom
+
+def structure_to_columns(structure):
+    """Flattens a :py:class:`.Model`, :py:class:`.Chain`, :py:class:`.Residue`
+    or :py:class:`.Ligand` into columns. Everything within the structure is
+    included, and the links between those things are stored as positions in
+    the columns - links to anything outside the structure are not kept.
+
+    Two things are returned - a header ``dict`` of plain Python lists (IDs,
+    names and index tables) and a ``dict`` of NumPy arrays (coordinates and
+    other per-atom values).
+
+    :param AtomStructure structure: the structure to flatten.
+    :rtype: ``tuple``"""
+
+    chains, residues, ligands = structure_contents(structure)
+    hets = residues + ligands
+    het_positions = {id(het): n for n, het in enumerate(hets)}
+    chain_positions = {id(chain): n for n, chain in enumerate(chains)}
+    atoms = [atom for het in hets for atom in het._atoms]
+    header = {
+     "type": type(structure).__name__,
+     "chains": [[
+      c._id, c._internal_id, c._name, c._sequence, len(c._ordered_residues),
+      [[het_positions[id(r)] for r in helix] for helix in c._helices],
+      [[het_positions[id(r)] for r in strand] for strand in c._strands]
+     ] for c in chains],
+     "hets": [[
+      het._id, het._name, het._full_name, len(het._atoms)
+     ] for het in hets],
+     "residues": [[
+      r.index, het_positions.get(id(r._next), -1)
+     ] for r in residues],
+     "ligands": [[
+      l._internal_id, l._water, chain_positions.get(id(l._chain), -1)
+     ] for l in ligands]
+    }
+    arrays = atoms_to_columns(atoms, header)
+    return header, arrays
+
+
+def structure_contents(structure):
+    """Lists the chains, residues and ligands (including waters) within a
+    structure, in the order that its columns put them in.
+
+    :param AtomStructure structure: the structure to look in.
+    :rtype: ``tuple``"""
+
+    chains, ligands, residues = [], [], []
+    if isinstance(structure, Model):
+        chains = structure._chains.structures
+        ligands = structure._ligands.structures + structure._waters.structures
+    elif isinstance(structure, Chain):
+        chains = [structure]
+    elif isinstance(structure, Residue):
+        residues = [structure]
+    else:
+        ligands = [structure]
+    residues = [r for c in chains for r in c._ordered_residues] + residues
+    return chains, residues, ligands
+
+
+def structure_atoms(structure):
+    """Lists the atoms of a structure in the order that its columns put them
+    in, which is the order of the atoms of a structure rebuilt from them.
+
+    :param AtomStructure structure: the structure to look in.
+    :rtype: ``list``"""
+
+    chains, residues, ligands = structure_contents(structure)
+    return [atom for het in residues + ligands for atom in het._atoms]
+
+
+def atoms_to_columns(atoms, header):
+    """Flattens a list of atoms into a ``dict`` of arrays. Values which repeat
+    a lot (elements, names, alternate locations) are stored as integer codes,
+    with the lookup tables added to the header. Columns which can't be
+    represented as numeric arrays are kept as lists.
+
+    :param list atoms: the atoms to flatten.
+    :param dict header: the header to add lookup tables to.
+    :rtype: ``dict``"""
+
+    positions = {id(atom): n for n, atom in enumerate(atoms)}
+    bonds = [(positions[id(atom)], positions[id(other)]) for atom in atoms
+     for other in atom.bonded_atoms
+     if id(other) in positions and positions[id(atom)] < positions[id(other)]]
+    arrays = {
+     "coordinates": np.array(
+      [atom._location for atom in atoms], dtype=float
+     ).reshape(-1, 3),
+     "hetatm": np.array([atom._is_hetatm for atom in atoms], dtype=bool),
+     "bonds": np.array(bonds, dtype=np.int64).reshape(-1, 2)
+    }
+    for name in ("element", "name", "alt_loc"):
+        table, codes = encode([getattr(atom, "_" + name) for atom in atoms])
+        header[name + "s"], arrays[name + "s"] = table, codes
+    for name in ("id", "charge", "bvalue"):
+        arrays[name + "s"] = numeric_column(
+         [getattr(atom, "_" + name) for atom in atoms]
+        )
+    arrays["anisotropy"] = numeric_column(
+     [atom._anisotropy for atom in atoms], width=6
+    )
+    return arrays
+
+
+def encode(values):
+    """Turns a list of values into a table of the distinct values, and an
+    array of codes which index that table.
+
+    :param list values: the values to encode.
+    :rtype: ``tuple``"""
+
+    table = {}
+    codes = np.fromiter(
+     (table.setdefault(value, len(table)) for value in values),
+     dtype=np.int32, count=len(values)
+    )
+    return list(table), codes
+
+
+def numeric_column(values, width=None):
+    """Turns a list of values into a NumPy array - of integers if they are all
+    integers, or of floats if they are all numbers (or all sequences of
+    ``width`` numbers). Otherwise, the values are returned as they are.
+
+    :param list values: the values to convert.
+    :param int width: if given, the length each value must have.
+    :rtype: ``numpy.ndarray``"""
+
+    try:
+        if width is None:
+            if all(type(v) is int for v in values):
+                return np.array(values, dtype=np.int64)
+            if all(isinstance(v, (int, float)) for v in values):
+                return np.array(values, dtype=float)
+            return values
+        array = np.array(values, dtype=float)
+        if array.shape == (len(values), width): return array
+    except (TypeError, ValueError, OverflowError): pass
+    return values
+
+
+def columns_to_structure(header, arrays, locations=None):
+    """Rebuilds a structure from the columns created by
+    :py:func:`.structure_to_columns`, restoring all the links between its
+    parts. The bonds of a model are stored in its compact bond table, and
+    those of anything else on its atoms.
+
+    :param dict header: the header of IDs, names and index tables.
+    :param dict arrays: the per-atom arrays.
+    :param locations: if given, the N×3 array (or sequence of arrays) the\
+    atoms will use as their locations, rather than copies.
+    :rtype: ``AtomStructure``"""
+
+    atoms = columns_to_atoms(header, arrays, locations=locations)
+    hets, start = [], 0
+    residue_count = len(header["residues"])
+    for n, (id, name, full_name, atom_count) in enumerate(header["hets"]):
+        het_atoms = atoms[start:start + atom_count]
+        start += atom_count
+        if n < residue_count:
+            hets.append(Residue(*het_atoms, id=id, name=name,
+             full_name=full_name, index=header["residues"][n][0]))
+        else:
+            internal_id, water, _ = header["ligands"][n - residue_count]
+            hets.append(Ligand(*het_atoms, id=id, name=name,
+             full_name=full_name, internal_id=internal_id, water=water))
+    for residue, (_, next) in zip(hets, header["residues"]):
+        if next != -1: residue._next, hets[next]._previous = hets[next], residue
+    chains, start = [], 0
+    for id, internal_id, name, sequence, count, helices, strands in \
+     header["chains"]:
+        chains.append(Chain(
+         *hets[start:start + count], id=id, internal_id=internal_id,
+         name=name, sequence=sequence,
+         helices=[tuple(hets[n] for n in helix) for helix in helices],
+         strands=[tuple(hets[n] for n in strand) for strand in strands]
+        ))
+        start += count
+    ligands = hets[residue_count:]
+    for ligand, (_, _, chain) in zip(ligands, header["ligands"]):
+        if chain != -1: ligand._chain = chains[chain]
+    if header["type"] == "Model":
+        model = Model(*chains, *ligands)
+        model._listed_bonds = Model._bond_table(tuple(atoms), arrays["bonds"])
+        return model
+    for a, b in arrays["bonds"].tolist():
+        atoms[a].bond(atoms[b])
+    return (chains or hets)[0]
+
+
+def columns_to_atoms(header, arrays, locations=None):
+    """Creates atoms from the per-atom columns.
+
+    :param dict header: the header with the lookup tables.
+    :param dict arrays: the per-atom arrays.
+    :param locations: if given, the N×3 array (or sequence of arrays) the\
+    atoms will use as their locations, rather than copies.
+    :rtype: ``list``"""
+
+    columns = [
+     [header["elements"][code] for code in arrays["elements"].tolist()],
+     arrays["coordinates"].tolist(), as_list(arrays["ids"]),
+     [header["names"][code] for code in arrays["names"].tolist()],
+     as_list(arrays["charges"]), as_list(arrays["bvalues"]),
+     as_list(arrays["anisotropy"]), arrays["hetatm"].tolist(),
+     [header["alt_locs"][code] for code in arrays["alt_locs"].tolist()]
+    ]
+    atoms = [Atom(element, *location, id, name, charge, bvalue, anisotropy,
+     hetatm, alt_loc=alt_loc) for element, location, id, name, charge, bvalue,
+      anisotropy, hetatm, alt_loc in zip(*columns)]
+    if locations is not None:
+        for atom, location in zip(atoms, locations):
+            atom._location = location
+    return atoms
+
+
+def as_list(column):
+    """Converts a column back into a list of Python values.
+
+    :param column: the NumPy array or list.
+    :rtype: ``list``"""
+
+    return column.tolist() if isinstance(column, np.ndarray) else list(column)
+
+
+def select_chains(header, arrays, chains):
+    """Narrows the columns of a model down to the given chains and the ligands
+    and waters which belong to them. As well as the new header and arrays, the
+    positions of the kept atoms in the original columns are returned.
+
+    :param dict header: the header of IDs, names and index tables.
+    :param dict arrays: the per-atom arrays.
+    :param chains: the IDs of the chains to keep.
+    :rtype: ``tuple``"""
+
+    counts = np.array([het[3] for het in header["hets"]], dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(counts)])
+    kept_chains, hets, start = {}, [], 0
+    for n, chain in enumerate(header["chains"]):
+        if chain[0] in chains:
+            kept_chains[n] = len(kept_chains)
+            hets += range(start, start + chain[4])
+        start += chain[4]
+    residue_count = len(header["residues"])
+    hets += [residue_count + n for n, ligand in enumerate(header["ligands"])
+     if ligand[2] in kept_chains]
+    positions = {het: n for n, het in enumerate(hets)}
+    new = {key: value for key, value in header.items() if key not in (
+     "chains", "hets", "residues", "ligands"
+    ) and not key.startswith("column_")}
+    new["chains"] = [[*chain[:5],
+     [[positions[n] for n in helix] for helix in chain[5]],
+     [[positions[n] for n in strand] for strand in chain[6]]
+    ] for n, chain in enumerate(header["chains"]) if n in kept_chains]
+    new["hets"] = [header["hets"][het] for het in hets]
+    new["residues"] = [[
+     header["residues"][het][0], positions.get(header["residues"][het][1], -1)
+    ] for het in hets if het < residue_count]
+    new["ligands"] = [[*header["ligands"][het - residue_count][:2],
+     kept_chains[header["ligands"][het - residue_count][2]]
+    ] for het in hets if het >= residue_count]
+    rows = np.concatenate([np.arange(
+     starts[het], starts[het + 1], dtype=np.int64
+    ) for het in hets] or [np.zeros(0, dtype=np.int64)])
+    new_arrays = {key: value[rows] if isinstance(value, np.ndarray) else
+     [value[row] for row in rows.tolist()]
+     for key, value in arrays.items() if key != "bonds"}
+    new_rows = np.full(starts[-1], -1, dtype=np.int64)
+    new_rows[rows] = np.arange(len(rows))
+    bonds = new_rows[arrays["bonds"]]
+    new_arrays["bonds"] = bonds[(bonds != -1).all(axis=1)]
+    return new, new_arrays, rows
+
+
+def import_shared_memory():
+    """Imports the standard library's ``shared_memory`` module, which was
+    added in Python 3.8.
+
+    :raises ImportError: if the Python version is too old to have it.
+    :rtype: ``module``"""
+
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        raise ImportError("Sharing models between processes needs Python 3.8")
+    return shared_memory
+
+
+
+class SharedModel:
+    """A :py:class:`.Model` whose columns have been published in shared memory.
+    The :py:attr:`.descriptor` is small and can be sent to other processes,
+    which can then use :py:func:`.attach_model` to rebuild the model, or just
+    some of its chains, on top of the shared coordinates.
+
+    The shared memory is released when the ``SharedModel`` is closed, or when
+    its ``with`` block ends.
+
+    For example:
+
+        >>> def work(args):
+        ...     model = atomium.columns.attach_model(args[0], chains=[args[1]])
+        ...     return model.chain(args[1]).radius_of_gyration
+        >>> with model.share() as shared:
+        ...     with multiprocessing.Pool() as pool:
+        ...         pool.map(work, [(shared.descriptor, c.id) for c in chains])
+
+    :param Model model: the model to publish."""
+
+    def __init__(self, model):
+        shared_memory = import_shared_memory()
+        header, arrays = structure_to_columns(model)
+        specs, offset = {}, 0
+        for key, array in list(arrays.items()):
+            if isinstance(array, np.ndarray):
+                specs[key] = (array.dtype.str, array.shape, offset)
+                offset += -(-array.nbytes // 8) * 8
+            else:
+                header["column_" + key] = arrays.pop(key)
+        self._memory = shared_memory.SharedMemory(create=True, size=offset or 1)
+        for key, (dtype, shape, start) in specs.items():
+            np.ndarray(
+             shape, dtype=dtype, buffer=self._memory.buf, offset=start
+            )[...] = arrays[key]
+        self._descriptor = (self._memory.name, header, specs)
+
+
+    def __repr__(self):
+        return "<SharedModel ({})>".format(self._memory.name)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    @property
+    def descriptor(self):
+        """The information other processes need to attach to the model.
+
+        :rtype: ``tuple``"""
+
+        return self._descriptor
+
+
+    def close(self):
+        """Releases the shared memory. Processes which have already attached
+        keep their view until they are finished with it."""
+
+        self._memory.close()
+        self._memory.unlink()
+
+
+
+def attach_model(descriptor, chains=None):
+    """Attaches to a model published by a :py:class:`.SharedModel`, and
+    rebuilds a :py:class:`.Model` from it. The atom, residue and chain objects
+    are created afresh from the shared columns in this process, but the atoms'
+    locations are read-only views of the shared coordinates - they are not
+    copied, and the atoms cannot be moved in place.
+
+    Workers which only need part of the model can give the IDs of the chains
+    they want, and only those chains (with their ligands and waters) will be
+    built.
+
+    The model's :py:attr:`.Model.shared_coordinates` gives the whole shared
+    N×3 coordinates array, in the order the atoms were published in.
+
+    :param tuple descriptor: the :py:attr:`.SharedModel.descriptor`.
+    :param chains: if given, the IDs of the chains to build.
+    :rtype: ``Model``"""
+
+    name, header, specs = descriptor
+    memory = import_shared_memory().SharedMemory(name=name)
+    arrays = {key[7:]: value for key, value in header.items()
+     if key.startswith("column_")}
+    for key, (dtype, shape, start) in specs.items():
+        arrays[key] = np.ndarray(
+         shape, dtype=dtype, buffer=memory.buf, offset=start
+        )
+        arrays[key].flags.writeable = False
+    coordinates = arrays["coordinates"]
+    if chains is None:
+        model = columns_to_structure(header, arrays, locations=coordinates)
+    else:
+        header, arrays, rows = select_chains(header, arrays, chains)
+        model = columns_to_structure(
+         header, arrays, locations=[coordinates[row] for row in rows.tolist()]
+        )
+    model._shared = (memory, coordinates)
+    return model
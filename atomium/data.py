@@ -1,6 +1,10 @@
 """Contains logic for turning data dictionaies into a parsed Python objects."""
 
+import numpy as np
 from .structures import *
+from .geometry import homogeneous_matrix
+
+ALT_LOC_POLICIES = ("first", "occupancy", "all")
 
 class File:
     """When a file is parsed, the result is a ``File``. It contains the
@@ -11,6 +15,7 @@ class File:
     def __init__(self, filetype):
         self._filetype = filetype
         self._models = []
+        self._ensemble = None
 
 
     def __repr__(self):
@@ -171,6 +176,18 @@ class File:
         return self._models[0]
 
 
+    @property
+    def ensemble(self):
+        """If the file was opened in ensemble mode and all of its models share
+        the same topology, this is the :py:class:`.Ensemble` of their
+        coordinates - and :py:attr:`.models` will contain just the one model
+        whose atoms are moved from frame to frame.
+
+        :rtype: ``Ensemble``"""
+
+        return self._ensemble
+
+
     def generate_assembly(self, id):
         """Generates a new model from the existing model using one of the file's
         set of assembly instructions (for which you provide the ID).
@@ -206,17 +223,31 @@ class File:
                         structures[obj] = copy
             atoms = set()
             for s in structures.values(): atoms.update(s.atoms())
-            Atom.transform_atoms(t["matrix"], *atoms)
-            Atom.translate_atoms(t["vector"], *atoms)
+            Atom.transform_atoms(
+             homogeneous_matrix(t["matrix"], t["vector"]), *atoms
+            )
             all_structures += structures.values()
         return Model(*all_structures)
 
 
-def data_dict_to_file(data_dict, filetype):
+def data_dict_to_file(data_dict, filetype, alt_loc="first", ensemble=False,
+                      secondary_structure="auto"):
     """Turns an atomium data dictionary into a :py:class:`.File`.
 
+    The same data dictionary can be turned into a file multiple times with
+    different alternate location policies - see :py:func:`.resolve_alt_locs`.
+
+    In ensemble mode, if every model has the same topology, only one
+    :py:class:`.Model` will be created, and the coordinates of all the models
+    will be stored in an :py:class:`.Ensemble`. Otherwise the models are
+    created separately as normal.
+
     :param dict data_dict: the data dictionary to parse.
     :param str filetype: the file type that is being converted.
+    :param str alt_loc: the alternate location policy to use.
+    :param bool ensemble: if ``True``, models will be combined if possible.
+    :param str secondary_structure: when to assign secondary structure from\
+    the coordinates - see :py:func:`.assign_secondary_structure`.
     :rtype: ``File``"""
 
     f = File(filetype)
@@ -224,34 +255,233 @@ def data_dict_to_file(data_dict, filetype):
         if key != "models":
             for subkey, value in data_dict[key].items():
                 setattr(f, "_" + subkey, value)
-    f._models = [model_dict_to_model(m) for m in data_dict["models"]]
+    if ensemble:
+        f._ensemble = model_dicts_to_ensemble(
+         data_dict["models"], alt_loc, secondary_structure
+        )
+    if f._ensemble:
+        f._models = [f._ensemble.model]
+    else:
+        f._models = [model_dict_to_model(
+         m, alt_loc=alt_loc, secondary_structure=secondary_structure
+        ) for m in data_dict["models"]]
     return f
 
 
-def model_dict_to_model(model_dict):
+def model_dict_to_model(model_dict, alt_loc="first",
+                        secondary_structure="auto"):
     """Takes a model dictionary and turns it into a fully processed
     :py:class:`.Model` object.
 
     :param dict model_dict: the model dictionary.
+    :param str alt_loc: the alternate location policy to use.
+    :param str secondary_structure: the secondary structure policy to use.
     :rtype: ``Model``"""
 
-
-    chains = create_chains(model_dict)
-    ligands = create_ligands(model_dict, chains)
-    waters = create_ligands(model_dict, chains, water=True)
-    model = Model(*(chains + ligands + waters))
+    kept = get_kept_atom_ids(model_dict, alt_loc)
+    molecules = create_molecules(model_dict, kept)
+    assign_secondary_structure(molecules, secondary_structure)
+    model = Model(*molecules)
+    add_bonds(model, model_dict.get("bonds"))
     return model
 
 
-def create_chains(model_dict):
+def model_dicts_to_ensemble(model_dicts, alt_loc="first",
+                            secondary_structure="auto"):
+    """Takes a list of model dictionaries and, if they all have the same
+    topology, creates an :py:class:`.Ensemble` from them - a single
+    :py:class:`.Model` from the first, and an array of the coordinates in all
+    of them. If their topologies differ, ``None`` is returned.
+
+    :param list model_dicts: the model dictionaries.
+    :param str alt_loc: the alternate location policy to use.
+    :param str secondary_structure: the secondary structure policy to use.
+    :rtype: ``Ensemble``"""
+
+    topology, frames = None, []
+    for model_dict in model_dicts:
+        kept = get_kept_atom_ids(model_dict, alt_loc)
+        atoms = list(get_model_dict_atoms(model_dict, kept))
+        signature = [signature for signature, _ in atoms]
+        if topology is None:
+            topology, first_kept = signature, kept
+        elif signature != topology: return None
+        frames.append([[a["x"], a["y"], a["z"]] for _, a in atoms])
+    if topology is None: return None
+    molecules = create_molecules(model_dicts[0], first_kept)
+    assign_secondary_structure(molecules, secondary_structure)
+    model = Model(*molecules)
+    add_bonds(model, model_dicts[0].get("bonds"))
+    atoms = []
+    for mol in molecules:
+        hets = mol._ordered_residues if isinstance(mol, Chain) else [mol]
+        for het in hets: atoms += het._atoms.structures
+    return Ensemble(model, atoms, np.array(frames, dtype=float))
+
+
+def get_model_dict_atoms(model_dict, kept):
+    """A generator which yields the atoms of a model dictionary, in the same
+    order that :py:func:`.create_molecules` will create them in. Each atom is
+    given with a tuple which identifies its place in the topology.
+
+    :param dict model_dict: the model dictionary.
+    :param dict kept: the atom IDs to use for each het.
+    :rtype: ``tuple``"""
+
+    for chain_id, chain in model_dict["polymer"].items():
+        for res_id, res in sorted(
+         chain["residues"].items(), key=lambda x: x[1]["number"]
+        ):
+            for atom_id in kept[id(res)]:
+                atom = res["atoms"][atom_id]
+                yield ((chain_id, res_id, res["name"], atom["name"],
+                 atom["element"]), atom)
+    for key in ("non-polymer", "water"):
+        for het_id, het in model_dict[key].items():
+            for atom_id in kept[id(het)]:
+                atom = het["atoms"][atom_id]
+                yield ((key, het_id, het["name"], atom["name"],
+                 atom["element"]), atom)
+
+
+def create_molecules(model_dict, kept=None):
+    """Creates the chains, ligands and waters of a model dictionary, in that
+    order.
+
+    :param dict model_dict: the model dictionary.
+    :param dict kept: the atom IDs to use for each het, if already resolved.
+    :rtype: ``list``"""
+
+    chains = create_chains(model_dict, kept)
+    ligands = create_ligands(model_dict, chains, kept=kept)
+    waters = create_ligands(model_dict, chains, water=True, kept=kept)
+    return chains + ligands + waters
+
+
+def add_bonds(model, bonds):
+    """Bonds together the atoms of a model which a file lists as being bonded,
+    storing the bonds in one compact table on the model rather than on each
+    atom. Bonds to atoms which aren't in the model are ignored.
+
+    :param Model model: the model to bond the atoms of.
+    :param list bonds: the pairs of atom IDs to bond."""
+
+    if not bonds: return
+    atoms = tuple(model.atoms())
+    positions = {atom._id: n for n, atom in enumerate(atoms)}
+    edges = [[positions[id1], positions[id2]] for id1, id2 in bonds
+     if id1 in positions and id2 in positions]
+    model._listed_bonds = Model._bond_table(atoms, edges)
+
+
+def assign_secondary_structure(molecules, policy="auto"):
+    """Works out the helices and strands of the chains among some molecules
+    from their backbone coordinates. There are three policies:
+
+    * ``'file'`` - only the secondary structure given in the file is used.
+    * ``'auto'`` - if none of the chains have any secondary structure from the file, it is assigned to all of them. This is the default, and means that files without secondary structure records (such as predicted models) still have it.
+    * ``'assign'`` - secondary structure is always assigned, replacing that given in the file.
+
+    :param list molecules: the molecules to assign secondary structure to.
+    :param str policy: the secondary structure policy to use.
+    :raises ValueError: if an unknown policy is given."""
+
+    if policy not in ("file", "auto", "assign"):
+        raise ValueError(
+         "'{}' is not a valid secondary structure policy".format(policy)
+        )
+    chains = [mol for mol in molecules if isinstance(mol, Chain)]
+    if policy == "file" or (policy == "auto" and any(
+     chain._helices or chain._strands for chain in chains
+    )): return
+    for chain in chains: chain.assign_secondary_structure()
+
+
+def get_kept_atom_ids(model_dict, policy="first"):
+    """Resolves alternate locations for every het in a model dictionary in one
+    pass, and returns a mapping of het dictionaries to the atom IDs that
+    should be used to make them.
+
+    The mapping is keyed by the ``id()`` of each het dictionary, as the het
+    IDs themselves are not guaranteed to be unique across a model.
+
+    :param dict model_dict: the model dictionary.
+    :param str policy: the alternate location policy to use.
+    :rtype: ``dict``"""
+
+    hets = [r for chain in model_dict["polymer"].values()
+     for r in chain["residues"].values()]
+    for key in ("non-polymer", "water"):
+        hets += list(model_dict[key].values())
+    return {
+     id(het): ids for het, ids in zip(hets, resolve_alt_locs(hets, policy))
+    }
+
+
+def resolve_alt_locs(hets, policy="first"):
+    """Takes a list of het dictionaries and works out which of their atoms
+    should be used, given that some may have multiple possible positions.
+
+    Only hets with at least one partially occupied atom are affected. The
+    policy can be one of:
+
+    * ``'first'`` - the alternate location that comes first alphabetically.
+    * ``'occupancy'`` - the alternate location with the highest mean occupancy, with ties going to the first alphabetically.
+    * ``'all'`` - every atom is kept, so that each conformer can be queried separately using the atoms' ``alt_loc`` attribute.
+
+    The selection is made over the occupancy and alternate location columns of
+    every atom at once, rather than het by het.
+
+    :param list hets: the het dictionaries to resolve.
+    :param str policy: the alternate location policy to use.
+    :raises ValueError: if the policy is not recognised.
+    :rtype: ``list``"""
+
+    if policy not in ALT_LOC_POLICIES:
+        raise ValueError("'{}' is not a valid alt_loc policy".format(policy))
+    ids, occupancy, alt_locs, het_index = [], [], [], []
+    for n, het in enumerate(hets):
+        for atom_id, atom in het["atoms"].items():
+            ids.append(atom_id)
+            occupancy.append(atom["occupancy"])
+            alt_locs.append(atom["alt_loc"] or "")
+            het_index.append(n)
+    if policy == "all" or not ids: return [list(h["atoms"]) for h in hets]
+    occupancy, het_index = np.array(occupancy, dtype=float), np.array(het_index)
+    codes, alt_codes = np.unique(alt_locs, return_inverse=True)
+    has_alt = alt_codes != (0 if codes[0] == "" else -1)
+    partial = np.bincount(het_index, weights=occupancy < 1, minlength=len(hets))
+    if policy == "first":
+        chosen = np.full(len(hets), len(codes))
+        np.minimum.at(chosen, het_index[has_alt], alt_codes[has_alt])
+    else:
+        flat = (het_index * len(codes) + alt_codes)[has_alt]
+        size = len(hets) * len(codes)
+        totals = np.bincount(flat, weights=occupancy[has_alt], minlength=size)
+        counts = np.bincount(flat, minlength=size)
+        means = np.where(counts > 0, totals / np.maximum(counts, 1), -1)
+        chosen = means.reshape(len(hets), len(codes)).argmax(axis=1)
+    keep = (partial[het_index] == 0) | (occupancy == 1) | ~has_alt | (
+     alt_codes == chosen[het_index]
+    )
+    ids = np.array(ids, dtype=object)
+    boundaries = np.cumsum([len(het["atoms"]) for het in hets])[:-1]
+    return [
+     list(i[k]) for i, k in zip(np.split(ids, boundaries), np.split(keep, boundaries))
+    ]
+
+
+def create_chains(model_dict, kept=None):
     """Creates a list of :py:class:`.Chain` objects from a model dictionary.
 
     :param dict model_dict: the model dictionary.
+    :param dict kept: the atom IDs to use for each het, if already resolved.
     :rtype: ``list``"""
 
+    kept = kept or {}
     chains = []
     for chain_id, chain in model_dict["polymer"].items():
-        res = [create_het(r, i) for i, r in sorted(
+        res = [create_het(r, i, atom_ids=kept.get(id(r))) for i, r in sorted(
          chain["residues"].items(), key=lambda x: x[1]["number"]
         )]
         res_by_id = {r.id: r for r in res}
@@ -266,14 +496,16 @@ def create_chains(model_dict):
     return chains
 
 
-def create_ligands(model_dict, chains, water=False):
+def create_ligands(model_dict, chains, water=False, kept=None):
     """Creates a list of :py:class:`.Ligand` objects from a model dictionary.
 
     :param dict model_dict: the model dictionary.
     :param list chains: a list of :py:class:`.Chain` objects to assign by ID.
     :param bool water: if `True``, water ligands will be made.
+    :param dict kept: the atom IDs to use for each het, if already resolved.
     :rtype: ``list``"""
 
+    kept = kept or {}
     ligands = []
     for lig_id, lig in model_dict["water" if water else "non-polymer"].items():
         chain = None
@@ -281,32 +513,30 @@ def create_ligands(model_dict, chains, water=False):
             if c._id == lig["polymer"]:
                 chain = c
                 break
-        ligands.append(
-         create_het(lig, lig_id, ligand=True, chain=chain, water=water)
-        )
+        ligands.append(create_het(
+         lig, lig_id, ligand=True, chain=chain, water=water,
+         atom_ids=kept.get(id(lig))
+        ))
     return ligands
 
 
-def create_het(d, id, ligand=False, chain=None, water=False):
+def create_het(d, id, ligand=False, chain=None, water=False, atom_ids=None):
     """Creates a :py:class:`.Residue` or :py:class:`.Ligand` from some
     atom-containing dictionary.
 
-    If there is multiple occupancy, only one position will be used.
+    If there is multiple occupancy, only one position will be used, unless the
+    atom IDs to use have already been resolved by :py:func:`.resolve_alt_locs`.
 
     :param dict d: the dictionary to parse.
     :param str id: the ID of the structure to make.
     :param bool ligand: if ``True`` a ligand will be made, not a residue.
     :param Chain chain: the :py:class:`.Chain` to assign if a ligand.
     :param bool water: if ``True``, the ligand will be a water ligand.
+    :param list atom_ids: if given, only these atoms will be used.
     :rtype: ``Residue`` or ``Ligand``"""
 
-    alt_loc = None
-    if any([atom["occupancy"] < 1 for atom in d["atoms"].values()]):
-        if any([atom["alt_loc"] for atom in d["atoms"].values()]):
-            alt_loc = sorted([atom["alt_loc"] for atom in d["atoms"].values()
-             if atom["alt_loc"]])[0]
-    atoms = [atom_dict_to_atom(a, i) for i, a in d["atoms"].items()
-     if a["occupancy"] == 1 or a["alt_loc"] is None or a["alt_loc"] == alt_loc]
+    if atom_ids is None: atom_ids = resolve_alt_locs([d])[0]
+    atoms = [atom_dict_to_atom(d["atoms"][i], i) for i in atom_ids]
     if ligand:
         return Ligand(*atoms, id=id, name=d["name"], chain=chain,
          internal_id=d["internal_id"], water=water, full_name=d["full_name"])
@@ -324,7 +554,8 @@ def atom_dict_to_atom(d, atom_id):
 
     return Atom(
      d["element"], d["x"], d["y"], d["z"], atom_id,
-     d["name"], d["charge"], d["bvalue"], d["anisotropy"], d["is_hetatm"]
+     d["name"], d["charge"], d["bvalue"], d["anisotropy"], d["is_hetatm"],
+     alt_loc=d.get("alt_loc")
     )
 
 
@@ -372,7 +603,16 @@ COVALENT_RADII = {
  "PU": 1.87, "AM": 1.8, "CM": 1.69
 }
 
-METALS = [
+VDW_RADII = {
+ "H": 1.2, "HE": 1.4, "LI": 1.82, "C": 1.7, "N": 1.55, "O": 1.52, "F": 1.47,
+ "NE": 1.54, "NA": 2.27, "MG": 1.73, "SI": 2.1, "P": 1.8, "S": 1.8, "CL": 1.75,
+ "AR": 1.88, "K": 2.75, "NI": 1.63, "CU": 1.4, "ZN": 1.39, "GA": 1.87,
+ "AS": 1.85, "SE": 1.9, "BR": 1.85, "KR": 2.02, "PD": 1.63, "AG": 1.72,
+ "CD": 1.58, "IN": 1.93, "SN": 2.17, "TE": 2.06, "I": 1.98, "XE": 2.16,
+ "PT": 1.75, "AU": 1.66, "HG": 1.55, "TL": 1.96, "PB": 2.02, "U": 1.86
+}
+
+METALS = {
  "LI", "BE", "NA", "MG", "AL", "K", "CA", "SC", "TI", "V", "CR", "MN", "FE",
  "CO", "NI", "CU", "ZN", "HA", "RB", "SR", "Y", "ZR", "NB", "MO", "TC", "RU",
  "RH", "PD", "AG", "CD", "IN", "SN", "CS", "BA", "LA", "CE", "PR", "ND", "PM",
@@ -380,7 +620,7 @@ METALS = [
  "RE", "OS", "IR", "PT", "AU", "HG", "TL", "PB", "BI", "PO", "FR", "RA", "AC",
  "TH", "PA", "U", "NP", "PU", "AM", "CM", "BK", "CF", "ES", "FM", "MD", "NO",
  "LR", "RF", "DB", "SG", "BH", "HS", "MT", "DS", "RG", "CN", "UUT", "FL", "LV"
-]
+}
 
 FULL_NAMES = {
  "GLY": "glycine", "ALA": "alanine", "VAL": "valine", "LEU": "leucine",
@@ -399,3 +639,54 @@ CODES = {
  "DA": "A", "DG": "G", "DC": "C", "DT": "T", "A": "A", "G": "G", "C": "C",
  "U": "U"
 }
+
+BACKBONE_BONDS = "N-CA CA-C C-O C-OXT"
+
+RESIDUE_BONDS = {
+ "GLY": "", "ALA": "CA-CB", "SER": "CA-CB CB-OG", "CYS": "CA-CB CB-SG",
+ "VAL": "CA-CB CB-CG1 CB-CG2", "THR": "CA-CB CB-OG1 CB-CG2",
+ "LEU": "CA-CB CB-CG CG-CD1 CG-CD2", "ILE": "CA-CB CB-CG1 CB-CG2 CG1-CD1",
+ "MET": "CA-CB CB-CG CG-SD SD-CE", "PRO": "CA-CB CB-CG CG-CD CD-N",
+ "ASP": "CA-CB CB-CG CG-OD1 CG-OD2", "ASN": "CA-CB CB-CG CG-OD1 CG-ND2",
+ "GLU": "CA-CB CB-CG CG-CD CD-OE1 CD-OE2",
+ "GLN": "CA-CB CB-CG CG-CD CD-OE1 CD-NE2",
+ "LYS": "CA-CB CB-CG CG-CD CD-CE CE-NZ",
+ "ARG": "CA-CB CB-CG CG-CD CD-NE NE-CZ CZ-NH1 CZ-NH2",
+ "HIS": "CA-CB CB-CG CG-ND1 CG-CD2 ND1-CE1 CD2-NE2 CE1-NE2",
+ "PHE": "CA-CB CB-CG CG-CD1 CG-CD2 CD1-CE1 CD2-CE2 CE1-CZ CE2-CZ",
+ "TYR": "CA-CB CB-CG CG-CD1 CG-CD2 CD1-CE1 CD2-CE2 CE1-CZ CE2-CZ CZ-OH",
+ "TRP": "CA-CB CB-CG CG-CD1 CG-CD2 CD1-NE1 NE1-CE2 CD2-CE2 CD2-CE3 "
+  "CE2-CZ2 CE3-CZ3 CZ2-CH2 CZ3-CH2"
+}
+
+ELEMENT_SYMBOLS = [None]
+ELEMENT_CODES = {None: 0}
+ELEMENT_MASSES = np.zeros(1)
+ELEMENT_RADII = np.zeros(1)
+ELEMENT_VDW_RADII = np.zeros(1)
+ELEMENT_METALS = np.zeros(1, dtype=bool)
+
+def element_code(symbol):
+    """Gets the small integer code for an element symbol, which can be used to
+    index the ``ELEMENT_MASSES``, ``ELEMENT_RADII``, ``ELEMENT_VDW_RADII``
+    and ``ELEMENT_METALS`` arrays. Symbols are interned the first time they are
+    seen, with their original case preserved, and the arrays are extended to
+    include them. The code 0 means there is no element.
+
+    :param str symbol: the element symbol.
+    :rtype: ``int``"""
+
+    global ELEMENT_MASSES, ELEMENT_RADII, ELEMENT_VDW_RADII, ELEMENT_METALS
+    try:
+        return ELEMENT_CODES[symbol]
+    except KeyError:
+        upper = str(symbol).upper()
+        ELEMENT_CODES[symbol] = len(ELEMENT_SYMBOLS)
+        ELEMENT_SYMBOLS.append(symbol)
+        ELEMENT_MASSES = np.append(ELEMENT_MASSES, PERIODIC_TABLE.get(upper, 0))
+        ELEMENT_RADII = np.append(ELEMENT_RADII, COVALENT_RADII.get(upper, 0))
+        ELEMENT_VDW_RADII = np.append(
+         ELEMENT_VDW_RADII, VDW_RADII.get(upper, 1.8)
+        )
+        ELEMENT_METALS = np.append(ELEMENT_METALS, upper in METALS)
+        return ELEMENT_CODES[symbol]
@@ -0,0 +1,667 @@
+"""Contains vectorised geometry functions which work on NumPy coordinate
+arrays rather than on individual atoms."""
+
+import numpy as np
+
+def kabsch_rmsd(reference, frames):
+    """Calculates the Root Mean Square Deviation between a reference set of
+    coordinates and one or more other sets of coordinates, after optimally
+    superposing each onto the reference using the Kabsch algorithm.
+
+    The coordinates are assumed to have already been centred.
+
+    :param numpy.ndarray reference: an N×3 array of coordinates.
+    :param numpy.ndarray frames: an N×3 array, or K×N×3 stack of arrays.
+    :rtype: ``numpy.ndarray``"""
+
+    reference, frames = np.asarray(reference), np.asarray(frames)
+    stack = frames.reshape(-1, *reference.shape)
+    covariance = np.einsum("kni,nj->kij", stack, reference)
+    u, s, vt = np.linalg.svd(covariance)
+    sign = np.sign(np.linalg.det(np.matmul(u, vt)))
+    s[:, -1] *= sign
+    squares = (stack ** 2).sum(axis=(1, 2)) + (reference ** 2).sum()
+    deviation = np.clip(squares - 2 * s.sum(axis=1), 0, None)
+    rmsd = np.sqrt(deviation / len(reference))
+    return rmsd if frames.ndim == 3 else rmsd[0]
+
+
+def contact_pairs(coordinates, cutoff, workers=1, tiles=None):
+    """Finds every pair of points within a cutoff distance of each other, and
+    returns them as an M×2 array of indices, with the lower index first.
+
+    The points are split into slab-shaped tiles along their longest axis, each
+    with the same number of points, and each tile is searched along with a
+    halo of the points within ``cutoff`` of it. A pair is only kept by the
+    tile which holds its lower-indexed point, so that no pair is found twice.
+    The tiles can be searched in parallel by a pool of worker processes.
+
+    :param numpy.ndarray coordinates: an N×3 array of coordinates.
+    :param float cutoff: the distance cutoff to use.
+    :param int workers: the number of processes to search tiles with.
+    :param int tiles: the number of tiles to use (by default, four per worker).
+    :rtype: ``numpy.ndarray``"""
+
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+    tiles = tiles or (workers * 4 if workers > 1 else 1)
+    if tiles == 1 or len(coordinates) < 2:
+        return cell_pairs(coordinates, cutoff)
+    axis = np.ptp(coordinates, axis=0).argmax()
+    values = coordinates[:, axis]
+    bounds = np.quantile(values, np.linspace(0, 1, tiles + 1))
+    bounds[0], bounds[-1] = -np.inf, np.inf
+    jobs, members = [], []
+    for low, high in zip(bounds[:-1], bounds[1:]):
+        tile = np.flatnonzero((values >= low - cutoff) & (values < high + cutoff))
+        core = (values[tile] >= low) & (values[tile] < high)
+        if core.any():
+            jobs.append((coordinates[tile], core, cutoff))
+            members.append(tile)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(tile_pairs, jobs))
+    else:
+        results = list(map(tile_pairs, jobs))
+    pairs = [tile[pairs] for tile, pairs in zip(members, results)]
+    return np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int64)
+
+
+def tile_pairs(job):
+    """Finds the pairs within one tile of a :py:func:`.contact_pairs` search,
+    keeping only those whose lower-indexed point is in the tile's core rather
+    than its halo.
+
+    :param tuple job: the tile's coordinates, core mask, and cutoff.
+    :rtype: ``numpy.ndarray``"""
+
+    coordinates, core, cutoff = job
+    pairs = cell_pairs(coordinates, cutoff)
+    return pairs[core[pairs[:, 0]]]
+
+
+def cell_pairs(coordinates, cutoff):
+    """Finds every pair of points within a cutoff distance of each other by
+    sorting the points into cubic cells as wide as the cutoff, and only
+    measuring distances between points in the same or adjacent cells.
+
+    :param numpy.ndarray coordinates: an N×3 array of coordinates.
+    :param float cutoff: the distance cutoff to use.
+    :rtype: ``numpy.ndarray``"""
+
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+    if len(coordinates) < 2 or cutoff <= 0:
+        return np.empty((0, 2), dtype=np.int64)
+    cells = np.floor(
+     (coordinates - coordinates.min(axis=0)) / cutoff
+    ).astype(np.int64) + 1
+    shape = cells.max(axis=0) + 2
+    keys = np.ravel_multi_index(cells.T, shape)
+    order = np.argsort(keys, kind="stable")
+    keys, points = keys[order], coordinates[order]
+    positions = np.arange(len(keys))
+    pairs = []
+    for offset in np.ndindex(3, 3, 3):
+        offset = np.array(offset) - 1
+        if tuple(offset) < (0, 0, 0): continue
+        neighbours = keys + np.ravel_multi_index(offset + 1, shape) \
+         - np.ravel_multi_index((1, 1, 1), shape)
+        starts = np.searchsorted(keys, neighbours, side="left")
+        ends = np.searchsorted(keys, neighbours, side="right")
+        if not offset.any(): starts = positions + 1
+        counts = np.clip(ends - starts, 0, None)
+        first = np.repeat(positions, counts)
+        second = np.arange(counts.sum()) - np.repeat(
+         np.cumsum(counts) - counts, counts
+        ) + np.repeat(starts, counts)
+        close = ((points[first] - points[second]) ** 2).sum(axis=1) \
+         <= cutoff ** 2
+        pairs.append(np.stack([order[first[close]], order[second[close]]], 1))
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def cross_pairs(coordinates, targets, cutoff):
+    """Finds every pair of a point and a target point within a cutoff distance
+    of each other, by sorting the targets into cubic cells as wide as the
+    cutoff and checking each point against the cells around it. The pairs are
+    returned as an M×2 array of a point index and a target index.
+
+    :param numpy.ndarray coordinates: an N×3 array of coordinates.
+    :param numpy.ndarray targets: an M×3 array of target coordinates.
+    :param float cutoff: the distance cutoff to use.
+    :rtype: ``numpy.ndarray``"""
+
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+    targets = np.asarray(targets, dtype=float).reshape(-1, 3)
+    if not len(coordinates) or not len(targets) or cutoff <= 0:
+        return np.empty((0, 2), dtype=np.int64)
+    origin = targets.min(axis=0) - 2 * cutoff
+    cells = np.floor((targets - origin) / cutoff).astype(np.int64)
+    shape = cells.max(axis=0) + 3
+    keys = np.ravel_multi_index(cells.T, shape)
+    order = np.argsort(keys, kind="stable")
+    keys, sorted_targets = keys[order], targets[order]
+    point_cells = np.floor((coordinates - origin) / cutoff).astype(np.int64)
+    inside = np.flatnonzero(
+     ((point_cells >= 1) & (point_cells <= shape - 2)).all(axis=1)
+    )
+    point_keys = np.ravel_multi_index(point_cells[inside].T, shape)
+    pairs = []
+    for offset in np.ndindex(3, 3, 3):
+        neighbours = point_keys + np.ravel_multi_index(offset, shape) \
+         - np.ravel_multi_index((1, 1, 1), shape)
+        starts = np.searchsorted(keys, neighbours, side="left")
+        ends = np.searchsorted(keys, neighbours, side="right")
+        sizes = ends - starts
+        point = np.repeat(inside, sizes)
+        target = np.arange(sizes.sum()) - np.repeat(
+         np.cumsum(sizes) - sizes, sizes
+        ) + np.repeat(starts, sizes)
+        close = ((coordinates[point] - sorted_targets[target]) ** 2).sum(
+         axis=1
+        ) <= cutoff ** 2
+        pairs.append(np.stack([point[close], order[target[close]]], 1))
+    return np.concatenate(pairs)
+
+
+def transform_coordinates(coordinates, matrices):
+    """Applies one or more transformations to an N×3 array of coordinates.
+    Each transformation can be a 3×3 matrix, or a 4×4 homogeneous matrix whose
+    last column is a translation. A single matrix gives an N×3 array, and a
+    K×3×3 or K×4×4 batch of them gives a K×N×3 array - one set of coordinates
+    per transformation.
+
+    :param numpy.ndarray coordinates: an N×3 array of coordinates.
+    :param numpy.ndarray matrices: a matrix, or a stack of matrices.
+    :rtype: ``numpy.ndarray``"""
+
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+    matrices = np.asarray(matrices, dtype=float)
+    rotations = matrices[..., :3, :3]
+    transformed = np.matmul(coordinates, np.swapaxes(rotations, -1, -2))
+    if matrices.shape[-1] == 4:
+        transformed += matrices[..., None, :3, 3]
+    return transformed
+
+
+def homogeneous_matrix(matrix=None, vector=None):
+    """Combines a 3×3 rotation matrix and a translation vector into a single
+    4×4 homogeneous matrix, which applies the rotation and then the
+    translation. Stacks of matrices and vectors give a stack of 4×4 matrices.
+
+    :param numpy.ndarray matrix: the 3×3 matrix (the identity by default).
+    :param numpy.ndarray vector: the translation (none by default).
+    :rtype: ``numpy.ndarray``"""
+
+    matrix = np.eye(3) if matrix is None else np.asarray(matrix, dtype=float)
+    vector = np.zeros(3) if vector is None else np.asarray(vector, dtype=float)
+    shape = np.broadcast(
+     np.empty(matrix.shape[:-2]), np.empty(vector.shape[:-1])
+    ).shape
+    homogeneous = np.zeros(shape + (4, 4))
+    homogeneous[..., :3, :3] = matrix
+    homogeneous[..., :3, 3] = vector
+    homogeneous[..., 3, 3] = 1
+    return homogeneous
+
+
+def rotation_matrix(angle, axis):
+    """Creates the 3×3 matrix which rotates coordinates by an angle around one
+    of the three axes, or around an arbitrary axis vector.
+
+    :param float angle: the angle to rotate by in radians.
+    :param axis: the axis to rotate around (x, y, z, or a vector).
+    :raises ValueError: if the axis is not valid.
+    :rtype: ``numpy.ndarray``"""
+
+    if isinstance(axis, str):
+        try:
+            axis = [1 if i == "xyz".index(axis) else 0 for i in range(3)]
+        except ValueError:
+            raise ValueError("'{}' is not a valid axis".format(axis))
+    axis = np.asarray(axis, dtype=float)
+    axis = axis / np.sqrt(np.dot(axis, axis))
+    a = np.cos(angle / 2)
+    b, c, d = -axis * np.sin(angle / 2)
+    aa, bb, cc, dd = a * a, b * b, c * c, d * d
+    bc, ad, ac, ab, bd, cd = b * c, a * d, a * c, a * b, b * d, c * d
+    return np.array([
+     [aa + bb - cc - dd, 2 * (bc + ad), 2 * (bd - ac)],
+     [2 * (bc - ad), aa + cc - bb - dd, 2 * (cd + ab)],
+     [2 * (bd + ac), 2 * (cd - ab), aa + dd - bb - cc]
+    ])
+
+
+def clash_counts(coordinates, targets, cutoff):
+    """Counts how many target points are within a cutoff distance of the
+    points of each of a stack of poses. The targets are sorted into cubic cells
+    as wide as the cutoff, and the points of every pose are checked against
+    the neighbouring cells together.
+
+    :param numpy.ndarray coordinates: a K×N×3 stack of pose coordinates, or a\
+    single N×3 array.
+    :param numpy.ndarray targets: an M×3 array of target coordinates.
+    :param float cutoff: the distance cutoff to use.
+    :rtype: ``numpy.ndarray``"""
+
+    coordinates = np.asarray(coordinates, dtype=float)
+    stack = coordinates.reshape(-1, *coordinates.shape[-2:])
+    targets = np.asarray(targets, dtype=float).reshape(-1, 3)
+    counts = np.zeros(len(stack), dtype=np.int64)
+    if len(targets) and stack.size and cutoff > 0:
+        origin = targets.min(axis=0) - 2 * cutoff
+        cells = np.floor((targets - origin) / cutoff).astype(np.int64)
+        shape = cells.max(axis=0) + 3
+        keys = np.ravel_multi_index(cells.T, shape)
+        order = np.argsort(keys, kind="stable")
+        keys, targets = keys[order], targets[order]
+        points = stack.reshape(-1, 3)
+        poses = np.repeat(np.arange(len(stack)), stack.shape[1])
+        point_cells = np.floor((points - origin) / cutoff).astype(np.int64)
+        inside = ((point_cells >= 1) & (point_cells <= shape - 2)).all(axis=1)
+        points, poses = points[inside], poses[inside]
+        point_keys = np.ravel_multi_index(point_cells[inside].T, shape)
+        for offset in np.ndindex(3, 3, 3):
+            neighbours = point_keys + np.ravel_multi_index(offset, shape) \
+             - np.ravel_multi_index((1, 1, 1), shape)
+            starts = np.searchsorted(keys, neighbours, side="left")
+            ends = np.searchsorted(keys, neighbours, side="right")
+            sizes = ends - starts
+            point = np.repeat(np.arange(len(points)), sizes)
+            target = np.arange(sizes.sum()) - np.repeat(
+             np.cumsum(sizes) - sizes, sizes
+            ) + np.repeat(starts, sizes)
+            close = ((points[point] - targets[target]) ** 2).sum(axis=1) \
+             < cutoff ** 2
+            counts += np.bincount(
+             poses[point[close]], minlength=len(stack)
+            )
+    return counts if coordinates.ndim == 3 else counts[0]
+
+
+def distance_matrix(coordinates, other=None, block=1024):
+    """Calculates the distances between every point in one array and every
+    point in another (or the same) array. The distances are calculated in
+    blocks, so that the temporary arrays used stay small.
+
+    :param numpy.ndarray coordinates: an N×3 array of coordinates.
+    :param numpy.ndarray other: an M×3 array of coordinates.
+    :param int block: the number of points per block.
+    :rtype: ``numpy.ndarray``"""
+
+    rows = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+    columns = rows if other is None else \
+     np.asarray(other, dtype=float).reshape(-1, 3)
+    matrix = np.empty((len(rows), len(columns)))
+    for row in range(0, len(rows), block):
+        for column in range(0, len(columns), block):
+            matrix[row:row + block, column:column + block] = np.sqrt((
+             (rows[row:row + block, None] - columns[None, column:column + block])
+             ** 2
+            ).sum(axis=2))
+    return matrix
+
+
+def group_distance_matrix(coordinates, groups, other=None, other_groups=None,
+                          block=1024):
+    """Calculates the minimum distance between every group of points in one
+    array and every group of points in another (or the same) array - such as
+    the closest approach of every pair of residues. Each group is a run of
+    consecutive points, given by the index it starts at.
+
+    The distances are calculated in blocks of whole groups, and each block is
+    reduced to its group minimums before the next is calculated, so that the
+    full point distance matrix is never held in memory.
+
+    :param numpy.ndarray coordinates: an N×3 array of coordinates.
+    :param list groups: the start index of each group of points.
+    :param numpy.ndarray other: an M×3 array of coordinates.
+    :param list other_groups: the start index of each group in ``other``.
+    :param int block: the approximate number of points per block.
+    :rtype: ``numpy.ndarray``"""
+
+    rows = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+    if other is None: columns, other_groups = rows, groups
+    else: columns = np.asarray(other, dtype=float).reshape(-1, 3)
+    groups = np.asarray(groups, dtype=np.int64)
+    other_groups = np.asarray(other_groups, dtype=np.int64)
+    matrix = np.empty((len(groups), len(other_groups)))
+    for g1, g2, start, end in group_blocks(groups, len(rows), block):
+        for h1, h2, other_start, other_end in group_blocks(
+         other_groups, len(columns), block):
+            distances = distance_matrix(
+             rows[start:end], columns[other_start:other_end], block=end - start
+            )
+            distances = np.minimum.reduceat(
+             distances, other_groups[h1:h2] - other_start, axis=1
+            )
+            matrix[g1:g2, h1:h2] = np.minimum.reduceat(
+             distances, groups[g1:g2] - start, axis=0
+            )
+    return matrix
+
+
+def group_blocks(groups, length, block):
+    """Splits runs of points into blocks of whole groups, each with about
+    ``block`` points (or one group, if that group is larger). Each block is
+    given as the range of groups and the range of points it covers.
+
+    :param numpy.ndarray groups: the start index of each group of points.
+    :param int length: the total number of points.
+    :param int block: the approximate number of points per block.
+    :rtype: ``list``"""
+
+    ends = np.append(groups[1:], length)
+    blocks, first = [], 0
+    while first < len(groups):
+        last = max(
+         int(np.searchsorted(ends, groups[first] + block, side="right")),
+         first + 1
+        )
+        blocks.append((first, last, int(groups[first]), int(ends[last - 1])))
+        first = last
+    return blocks
+
+
+
+class Grid:
+    """A regular three dimensional grid of points, stored as the values along
+    each of its three axes. The points themselves are only created when they
+    are asked for - either as an N×3 array with :py:attr:`.points`, or one at
+    a time as tuples by iterating over the grid.
+
+    :param x: the grid's x values.
+    :param y: the grid's y values.
+    :param z: the grid's z values."""
+
+    def __init__(self, x, y, z):
+        self._axes = tuple(np.asarray(values) for values in (x, y, z))
+
+
+    def __repr__(self):
+        return "<Grid ({}×{}×{} points)>".format(*self.shape)
+
+
+    def __len__(self):
+        return int(np.prod(self.shape))
+
+
+    def __iter__(self):
+        x_values, y_values, z_values = [a.tolist() for a in self._axes]
+        for x in x_values:
+            for y in y_values:
+                for z in z_values:
+                    yield (x, y, z)
+
+
+    @property
+    def axes(self):
+        """The values along each of the grid's three axes.
+
+        :rtype: ``tuple``"""
+
+        return self._axes
+
+
+    @property
+    def origin(self):
+        """The grid's lowest point - the first value along each axis.
+
+        :rtype: ``tuple``"""
+
+        return tuple(a[0].item() for a in self._axes)
+
+
+    @property
+    def shape(self):
+        """The number of values along each of the grid's axes.
+
+        :rtype: ``tuple``"""
+
+        return tuple(len(a) for a in self._axes)
+
+
+    @property
+    def points(self):
+        """Every point in the grid as an N×3 array, in the same order as
+        iterating over the grid gives them.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return np.stack(
+         np.meshgrid(*self._axes, indexing="ij"), axis=-1
+        ).reshape(-1, 3)
+
+
+
+def voxelise(coordinates, grid, channels=None, channel_count=1, sigma=None):
+    """Bins points into the cells of a grid, giving a C×X×Y×Z array with one
+    three dimensional grid per channel. Without ``sigma``, each point adds one
+    to the grid point nearest it. With ``sigma``, each point instead adds a
+    Gaussian of that width to every grid point within three sigma of it.
+
+    :param numpy.ndarray coordinates: an N×3 array of coordinates.
+    :param Grid grid: the evenly spaced grid to bin the points into.
+    :param numpy.ndarray channels: the channel of each point (by default,\
+    they are all in channel 0).
+    :param int channel_count: the number of channels.
+    :param float sigma: if given, the width of the Gaussian to spread each\
+    point out with.
+    :rtype: ``numpy.ndarray``"""
+
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+    channels = np.zeros(len(coordinates), dtype=np.int64) if channels is None \
+     else np.asarray(channels, dtype=np.int64)
+    shape = np.array(grid.shape)
+    origin = np.array([a[0] for a in grid.axes], dtype=float)
+    size = np.array([a[1] - a[0] if len(a) > 1 else 1 for a in grid.axes])
+    nearest = np.round((coordinates - origin) / size).astype(np.int64)
+    reach = 0 if sigma is None else np.ceil(3 * sigma / size).astype(np.int64)
+    voxels = np.zeros(channel_count * len(grid))
+    for offset in np.ndindex(*(2 * np.broadcast_to(reach, 3) + 1)):
+        indices = nearest + np.array(offset) - reach
+        inside = ((indices >= 0) & (indices < shape)).all(axis=1)
+        if sigma is None:
+            weights = np.ones(inside.sum())
+        else:
+            deltas = origin + indices[inside] * size - coordinates[inside]
+            weights = np.exp(-(deltas ** 2).sum(axis=1) / (2 * sigma ** 2))
+        flat = np.ravel_multi_index(indices[inside].T, shape)
+        voxels += np.bincount(
+         channels[inside] * len(grid) + flat, weights=weights,
+         minlength=len(voxels)
+        )
+    return voxels.reshape(channel_count, *shape)
+
+
+def sphere_points(count):
+    """Creates a set of points spread evenly over the surface of a sphere of
+    radius 1, using a golden section spiral.
+
+    :param int count: the number of points to create.
+    :rtype: ``numpy.ndarray``"""
+
+    n = np.arange(count) + 0.5
+    z = 1 - 2 * n / count
+    radius = np.sqrt(1 - z ** 2)
+    angle = np.pi * (3 - np.sqrt(5)) * n
+    return np.stack([radius * np.cos(angle), radius * np.sin(angle), z], 1)
+
+
+def surface_areas(coordinates, radii, probe=1.4, points=100, workers=1,
+                  block=256):
+    """Calculates the solvent accessible surface area of each of a set of
+    spheres (such as atoms) using the Shrake-Rupley algorithm. Each sphere,
+    enlarged by the probe radius, is covered in points, and the area is the
+    fraction of those points which are not inside any neighbouring sphere.
+
+    Neighbouring spheres are found with a cell-list search, and the points of
+    a block of spheres are checked against all their neighbours at once. The
+    blocks can be shared out between a pool of worker processes.
+
+    :param numpy.ndarray coordinates: an N×3 array of sphere centres.
+    :param numpy.ndarray radii: the N radii of the spheres.
+    :param float probe: the radius of the solvent probe.
+    :param int points: the number of points to put on each sphere.
+    :param int workers: the number of processes to use.
+    :param int block: the number of spheres to check at once.
+    :rtype: ``numpy.ndarray``"""
+
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+    radii = np.asarray(radii, dtype=float) + probe
+    if not len(coordinates): return np.zeros(0)
+    pairs = cell_pairs(coordinates, 2 * radii.max())
+    distances = np.sqrt(((
+     coordinates[pairs[:, 0]] - coordinates[pairs[:, 1]]
+    ) ** 2).sum(axis=1))
+    pairs = pairs[distances < radii[pairs[:, 0]] + radii[pairs[:, 1]]]
+    pairs = np.concatenate([pairs, pairs[:, ::-1]])
+    pairs = pairs[np.argsort(pairs[:, 0], kind="stable")]
+    indptr = np.append(0, np.cumsum(
+     np.bincount(pairs[:, 0], minlength=len(coordinates))
+    ))
+    sphere = sphere_points(points)
+    jobs = []
+    for start in range(0, len(coordinates), block):
+        end = min(start + block, len(coordinates))
+        neighbours = pairs[indptr[start]:indptr[end], 1]
+        jobs.append((
+         coordinates[start:end], radii[start:end], coordinates[neighbours],
+         radii[neighbours], indptr[start:end + 1] - indptr[start], sphere
+        ))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            exposed = list(executor.map(exposed_fractions, jobs))
+    else:
+        exposed = list(map(exposed_fractions, jobs))
+    return 4 * np.pi * radii ** 2 * np.concatenate(exposed)
+
+
+def exposed_fractions(job):
+    """Works out what fraction of the surface points of a block of spheres
+    are not inside any of their neighbouring spheres - one step of
+    :py:func:`.surface_areas`.
+
+    :param tuple job: the block's centres and radii, its neighbours' centres\
+    and radii, the offsets of each sphere's neighbours, and the unit sphere\
+    points.
+    :rtype: ``numpy.ndarray``"""
+
+    centres, radii, neighbours, neighbour_radii, offsets, sphere = job
+    counts = np.diff(offsets)
+    buried = np.zeros((len(centres), len(sphere)), dtype=bool)
+    owners = np.repeat(np.arange(len(centres)), counts)
+    surface = centres[owners, None] + radii[owners, None, None] * sphere
+    inside = ((surface - neighbours[:, None]) ** 2).sum(axis=2) \
+     < neighbour_radii[:, None] ** 2
+    found = counts > 0
+    if found.any():
+        buried[found] = np.logical_or.reduceat(
+         inside, offsets[:-1][found], axis=0
+        )
+    return 1 - buried.sum(axis=1) / len(sphere)
+
+
+def backbone_hydrogen_bonds(backbone, donors=None, cutoff=9, energy=-0.5):
+    """Finds the hydrogen bonds between the backbone C=O and N-H groups of a
+    chain's residues, using the electrostatic energy model of DSSP. Each
+    amide hydrogen is placed 1 Å from its nitrogen, opposite the previous
+    residue's carbonyl, and only residues whose alpha carbons are within the
+    cutoff of each other are considered.
+
+    The result is an M×2 array of (acceptor, donor) residue positions, for
+    every pair whose energy is below the energy threshold.
+
+    :param numpy.ndarray backbone: an N×4×3 array of the N, CA, C and O\
+    coordinates of each residue, with ``nan`` for missing atoms.
+    :param numpy.ndarray donors: if given, the N booleans saying which\
+    residues can donate a hydrogen bond (prolines can't).
+    :param float cutoff: the alpha carbon distance to consider bonds within.
+    :param float energy: the energy threshold in kcal/mol.
+    :rtype: ``numpy.ndarray``"""
+
+    backbone = np.asarray(backbone, dtype=float).reshape(-1, 4, 3)
+    n, ca, c, o = (backbone[:, i] for i in range(4))
+    h = np.full_like(n, np.nan)
+    if len(backbone) > 1:
+        carbonyl = c[:-1] - o[:-1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            h[1:] = n[1:] + carbonyl / np.sqrt(
+             (carbonyl ** 2).sum(axis=1)
+            )[:, None]
+            broken = np.sqrt(((n[1:] - c[:-1]) ** 2).sum(axis=1)) > 2.5
+        h[1:][broken] = np.nan
+    if donors is not None: h[~np.asarray(donors, dtype=bool)] = np.nan
+    present = np.flatnonzero(np.isfinite(ca).all(axis=1))
+    pairs = present[cell_pairs(ca[present], cutoff)]
+    pairs = np.concatenate([pairs, pairs[:, ::-1]])
+    pairs = pairs[np.abs(pairs[:, 0] - pairs[:, 1]) > 1]
+    acceptor, donor = pairs[:, 0], pairs[:, 1]
+    def distance(a, b):
+        return np.sqrt(((a - b) ** 2).sum(axis=1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        energies = 0.084 * 332 * (
+         1 / distance(o[acceptor], n[donor]) +
+         1 / distance(c[acceptor], h[donor]) -
+         1 / distance(o[acceptor], h[donor]) -
+         1 / distance(c[acceptor], n[donor])
+        )
+        bonds = pairs[energies < energy]
+    return bonds[np.lexsort((bonds[:, 1], bonds[:, 0]))]
+
+
+def secondary_structure_codes(backbone, donors=None):
+    """Assigns secondary structure to a chain's residues from their backbone
+    hydrogen bonds, following the rules of DSSP for alpha helices and beta
+    ladders. Two consecutive 4-turns make a minimal helix, and residues in a
+    ladder of at least two consecutive bridges of the same type make a
+    strand. Helices take precedence over strands, and beta bulges and the
+    other DSSP states are not assigned.
+
+    The result is an array with a code for each residue - ``H`` for helix,
+    ``E`` for strand, and ``-`` for anything else.
+
+    :param numpy.ndarray backbone: an N×4×3 array of the N, CA, C and O\
+    coordinates of each residue, with ``nan`` for missing atoms.
+    :param numpy.ndarray donors: if given, the N booleans saying which\
+    residues can donate a hydrogen bond.
+    :rtype: ``numpy.ndarray``"""
+
+    length = len(backbone)
+    codes = np.full(length, "-", dtype="<U1")
+    if length < 3: return codes
+    bonds = backbone_hydrogen_bonds(backbone, donors)
+    keys = bonds[:, 0] * length + bonds[:, 1]
+    def bonded(acceptor, donor):
+        valid = (acceptor >= 0) & (acceptor < length) \
+         & (donor >= 0) & (donor < length)
+        found = np.isin(acceptor * length + donor, keys)
+        return found & valid
+    positions = np.arange(length)
+    turns = bonded(positions, positions + 4)
+    starts = np.flatnonzero(turns[1:] & turns[:-1]) + 1
+    helix = np.zeros(length, dtype=bool)
+    for offset in range(4):
+        helix[np.clip(starts + offset, 0, length - 1)] = True
+    shifts = np.array(list(np.ndindex(3, 3))) - 1
+    candidates = np.unique(np.sort(
+     (bonds[:, None] + shifts).reshape(-1, 2), axis=1
+    ), axis=0)
+    candidates = candidates[candidates[:, 1] - candidates[:, 0] > 2]
+    i, j = candidates[:, 0], candidates[:, 1]
+    parallel = (bonded(i - 1, j) & bonded(j, i + 1)) \
+     | (bonded(j - 1, i) & bonded(i, j + 1))
+    antiparallel = (bonded(i, j) & bonded(j, i)) \
+     | (bonded(i - 1, j + 1) & bonded(j - 1, i + 1))
+    strand = np.zeros(length, dtype=bool)
+    for kind, step in ((parallel, 1), (antiparallel, -1)):
+        bridges = i[kind] * length + j[kind]
+        ladder = np.isin(bridges + length + step, bridges) \
+         | np.isin(bridges - length - step, bridges)
+        strand[i[kind][ladder]] = True
+        strand[j[kind][ladder]] = True
+    codes[strand] = "E"
+    codes[helix] = "H"
+    return codes
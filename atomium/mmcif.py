@@ -4,7 +4,6 @@ from collections import deque
 import re
 from datetime import datetime
 import numpy as np
-import valerius
 from itertools import groupby
 from .data import CODES, Chain, Residue, Ligand
 
@@ -125,18 +124,13 @@ def loop_block_to_list(block):
             body_start = index
             break
     names = [l.split(".")[1].rstrip() for l in block["lines"][1:body_start]]
-    lines = [split_values(l) for l in block["lines"][body_start:]]
-    l = []
-    for n in range(len(lines) - 1):
-        while n < len(lines) - 1 and\
-         len(lines[n]) + len(lines[n + 1]) <= len(names):
-            lines[n] += lines[n + 1]
-            lines.pop(n + 1)
-    for line in lines:
-        l.append({
-         name: value for name, value in zip(names, line)
-        })
-    return l
+    lines = []
+    for values in map(split_values, block["lines"][body_start:]):
+        if lines and len(lines[-1]) + len(values) <= len(names):
+            lines[-1] += values
+        else:
+            lines.append(values)
+    return [{name: value for name, value in zip(names, line)} for line in lines]
 
 
 def split_values(line):
@@ -184,6 +178,99 @@ def strip_quotes(mmcif_dict):
                     row[k] = row[k].replace("\x1a", '"').replace("\x1b", "'")
 
 
+def index_mmcif_file(f):
+    """Takes an open .cif file (in binary mode) and finds the byte offsets of
+    its categories, without parsing any of them. The index is a ``dict`` with
+    a ``"categories"`` list of ``(name, start, end)`` ranges, in file order. The
+    rows of the atom_site loop are also indexed, as ``(model, chain, start,
+    end)`` ranges in ``"atoms"``, with the loop's header given by
+    ``"atom_site"``.
+
+    Models are numbered by position, starting at 0, and chains are identified
+    by their author ID. The index can be saved as JSON.
+
+    :param f: the binary file object to scan.
+    :rtype: ``dict``"""
+
+    index = {"categories": [], "atoms": [], "atom_site": None}
+    category, start, position, in_loop, in_text = None, 0, 0, False, False
+    names, models = [], {}
+    for line in f:
+        end = position + len(line)
+        if in_text or line[:1] == b";":
+            in_text = not in_text if line[:1] == b";" else in_text
+        elif line[:5] in (b"loop_", b"data_") or line[:1] == b"#":
+            if category: index["categories"].append([category, start, position])
+            category, start, in_loop = None, position, line[:5] == b"loop_"
+        elif line[:1] == b"_":
+            line_category = line.split(b".")[0][1:].decode()
+            if category is None: category = line_category
+            elif line_category != category:
+                index["categories"].append([category, start, position])
+                category, start, in_loop = line_category, position, False
+            if category == "atom_site" and in_loop:
+                names.append(line.split(b".")[1].split()[0].decode())
+                index["atom_site"] = [start, end]
+        elif category == "atom_site" and in_loop and line.strip():
+            values = dict(zip(names, split_values(line.decode())))
+            model = models.setdefault(
+             values.get("pdbx_PDB_model_num"), len(models)
+            )
+            chain = values.get("auth_asym_id")
+            atoms = index["atoms"]
+            if atoms and atoms[-1][:2] == [model, chain] \
+             and atoms[-1][3] == position:
+                atoms[-1][3] = end
+            else: atoms.append([model, chain, position, end])
+        position = end
+    if category: index["categories"].append([category, start, position])
+    return index
+
+
+def read_mmcif_selection(f, index, runs, model=None, chains=None,
+                         categories=None):
+    """Uses a .cif index (see :py:func:`.index_mmcif_file`) to read just part of
+    a .cif file - certain categories, and/or one model and certain chains of the
+    atom_site table - seeking past everything else. The selection is returned
+    as a .cif filestring.
+
+    :param f: the binary file object to read.
+    :param dict index: the index of the file.
+    :param list runs: the index's atom runs grouped by model, as made by\
+    :py:func:`.group_index_runs`.
+    :param int model: if given, the position of the only model to read.
+    :param chains: if given, the IDs of the chains to read.
+    :param categories: if given, the names of the categories to read.
+    :rtype: ``str``"""
+
+    if chains is not None: chains = set(chains)
+    models = runs if model is None else runs[model:model + 1 or None]
+    blocks = ["data_\n"]
+    for name, start, end in index["categories"]:
+        if categories is not None and name not in categories: continue
+        if name == "atom_site" and index["atom_site"] and \
+         (model is not None or chains is not None):
+            blocks.append(read_byte_range(f, *index["atom_site"]))
+            blocks += [read_byte_range(f, *run[2:]) for model_runs in models
+             for run in model_runs if chains is None or run[1] in chains]
+        else:
+            blocks.append(read_byte_range(f, start, end))
+        blocks.append("#\n")
+    return "".join(blocks)
+
+
+def read_byte_range(f, start, end):
+    """Reads the text between two byte offsets of a binary file object.
+
+    :param f: the binary file object to read.
+    :param int start: the offset to start at.
+    :param int end: the offset to stop at.
+    :rtype: ``str``"""
+
+    f.seek(start)
+    return f.read(end - start).decode()
+
+
 def mmcif_dict_to_data_dict(mmcif_dict):
     """Converts an .mmcif dictionary into an atomium data dictionary, with the
     same standard layout that the other file formats get converted into.
@@ -443,9 +530,44 @@ def update_models_list(mmcif_dict, data_dict):
         else:
             add_atom_to_non_polymer(atom, aniso, model, mol_type, names)
     data_dict["models"].append(model)
-    for model in data_dict["models"]:
+    bonds = make_bonds(mmcif_dict)
+    for model, model_bonds in zip(data_dict["models"], bonds):
         add_sequences_to_polymers(model, mmcif_dict, entities)
         add_secondary_structure_to_polymers(model, secondary_structure)
+        model["bonds"] = model_bonds
+
+
+def make_bonds(mmcif_dict):
+    """Creates a list of the bonds in the ``struct_conn`` table of a .mmcif
+    dictionary for each model, as pairs of atom IDs. Hydrogen bonds, and bonds
+    to symmetry copies of atoms, are left out.
+
+    :param dict mmcif_dict: the .mmcif dictionary to read.
+    :rtype: ``list``"""
+
+    atoms, models = {}, {}
+    for atom in mmcif_dict["atom_site"]:
+        models.setdefault(atom["pdbx_PDB_model_num"], set())
+        atoms.setdefault((
+         atom["pdbx_PDB_model_num"], atom["label_asym_id"],
+         atom["auth_seq_id"], atom["label_atom_id"]
+        ), []).append((int(atom["id"]), atom["label_alt_id"]))
+    blank = {".", "?"}
+    for conn in mmcif_dict.get("struct_conn", []):
+        if conn["conn_type_id"] == "hydrog": continue
+        if {conn.get("ptnr1_symmetry", "?"), conn.get("ptnr2_symmetry", "?")} \
+         - blank - {"1_555"}: continue
+        partners = [(conn["ptnr{}_label_asym_id".format(n)],
+         conn["ptnr{}_auth_seq_id".format(n)],
+         conn["ptnr{}_label_atom_id".format(n)],
+         conn.get("pdbx_ptnr{}_label_alt_id".format(n), "?")) for n in (1, 2)]
+        for number, bonds in models.items():
+            for id1, alt1 in atoms.get((number, *partners[0][:3]), []):
+                for id2, alt2 in atoms.get((number, *partners[1][:3]), []):
+                    alts = {alt1, alt2, partners[0][3], partners[1][3]}
+                    if id1 != id2 and len(alts - blank) <= 1:
+                        bonds.add(tuple(sorted((id1, id2))))
+    return [[list(bond) for bond in sorted(bonds)] for bonds in models.values()]
 
 
 def make_aniso(mmcif_dict):
@@ -598,16 +720,19 @@ def add_secondary_structure_to_polymers(model, ss_dict):
     :param dict model: the model to update.
     :param dict ss_dict: the mapping to read."""
 
+    orders = {}
     for ss in ("helices", "strands"):
         for segment in ss_dict[ss]:
-            chain = model["polymer"].get(segment[0].split('.')[0])
+            chain_id = segment[0].split('.')[0]
+            chain = model["polymer"].get(chain_id)
             if chain:
-                in_segment = False
-                chain[ss].append([])
-                for residue_id in chain["residues"].keys():
-                    if residue_id == segment[0]: in_segment = True
-                    if in_segment: chain[ss][-1].append(residue_id)
-                    if residue_id == segment[1]: break
+                if chain_id not in orders:
+                    ids = list(chain["residues"])
+                    orders[chain_id] = (ids, {id: n for n, id in enumerate(ids)})
+                ids, positions = orders[chain_id]
+                start = positions.get(segment[0], len(ids))
+                end = positions.get(segment[1], len(ids) - 1)
+                chain[ss].append(ids[start:end + 1])
             
 
 def make_sequences(mmcif_dict):
@@ -754,15 +879,16 @@ def atom_to_atom_line(atom):
 
     name = get_atom_name(atom)
     res_num, res_insert = split_residue_id(atom)
+    x, y, z = atom.location
     return "ATOM {} {} {} . {} {} . {} {} {} {} {} 1 {} {} {} {} {} {} 1".format(
      atom.id, atom.element, name, atom.het._name if atom.het else "?",
      atom.het._internal_id if atom.het and isinstance(
       atom.het, Ligand
      ) else atom.chain._internal_id if atom.chain else ".",
-     res_num, res_insert, atom.location[0], atom.location[1], atom.location[2],
-     atom.bvalue, atom.charge,
+     res_num, res_insert, x, y, z, atom.bvalue, atom.charge,
      res_num, atom.het._name if atom.het else "?",
-     atom.chain.id if atom.chain else ".", name
+     atom.chain.id if atom.chain else
+     atom.het.id.split(".")[0] if atom.het else ".", name
     )
 
 
@@ -783,7 +909,7 @@ def split_residue_id(atom):
 
     if atom.het:
         id = atom.het.id.split(".")[-1]
-        num = "".join([c for c in id if c.isdigit()])
+        num = "".join([c for c in id if c.isdigit()]) or "."
         insert = "".join([c for c in id if c.isalpha()]) or "?"
         return num, insert
     return ".."
@@ -797,15 +923,13 @@ def create_entities(chains, ligands, waters):
     :param set waters: the waters.
     :rtype: ``list``"""
 
-    entities = []
+    sequences, names = {}, {}
     for chain in sorted(chains, key=lambda c: c.id):
-        for e in entities:
-            if isinstance(e, Chain) and e.sequence == chain.sequence: break
-        else: entities.append(chain)
-    for ligand in sorted(ligands, key=lambda l: l.chain.id):
-        for e in entities:
-            if isinstance(e, Ligand) and e._name == ligand._name: break
-        else: entities.append(ligand)
+        sequences.setdefault(chain.sequence, chain)
+    for ligand in sorted(ligands, key=lambda l: l.chain.id if l.chain else
+     l.id.split(".")[0]):
+        names.setdefault(ligand._name, ligand)
+    entities = list(sequences.values()) + list(names.values())
     if len(waters): entities.append(list(waters)[0])
     return entities
 
@@ -823,6 +947,7 @@ def update_lines_with_entities(lines, entities):
     if any(isinstance(entity, Chain) for entity in entities):
         lines += ["#", "loop_", "_entity_poly_seq.entity_id",
          "_entity_poly_seq.num", "_entity_poly_seq.mon_id"]
+        import valerius
         for ei, entity in enumerate(entities, start=1):
             if isinstance(entity, Chain):
                 for ci, code in enumerate(
@@ -841,22 +966,25 @@ def update_lines_with_structures(lines, chains, ligands, waters, entities):
     :param list entities: the entities to pack."""
 
     lines += ["#", "loop_", "_struct_asym.id", "_struct_asym.entity_id"]
-    struct_num = 1
+    sequences, names, water_entity = {}, {}, None
+    for i, entity in enumerate(entities, start=1):
+        if isinstance(entity, Chain):
+            sequences.setdefault(entity.sequence, i)
+        elif isinstance(entity, Ligand):
+            names.setdefault(entity._name, i)
+            if entity.is_water and water_entity is None: water_entity = i
     for chain in sorted(chains, key=lambda c: c._internal_id):
-        for i, entity in enumerate(entities, start=1):
-            if isinstance(entity, Chain) and entity.sequence == chain.sequence:
-                lines.append("{} {}".format(chain._internal_id, i))
-                break
+        if chain.sequence in sequences:
+            lines.append("{} {}".format(
+             chain._internal_id, sequences[chain.sequence]
+            ))
     for ligand in sorted(ligands, key=lambda l: l._internal_id):
-        for i, entity in enumerate(entities, start=1):
-            if isinstance(entity, Ligand) and entity._name == ligand._name:
-                lines.append("{} {}".format(ligand._internal_id, i))
-                break
-    water_chains = []
+        if ligand._name in names:
+            lines.append("{} {}".format(
+             ligand._internal_id, names[ligand._name]
+            ))
+    water_chains = set()
     for water in sorted(waters, key=lambda w: w._internal_id):
-        if water.chain not in water_chains:
-            for i, entity in enumerate(entities, start=1):
-                if isinstance(entity, Ligand) and entity.is_water:
-                    lines.append("{} {}".format(water._internal_id, i))
-                    water_chains.append(water.chain)
-                    break
+        if water_entity and id(water.chain) not in water_chains:
+            lines.append("{} {}".format(water._internal_id, water_entity))
+            water_chains.add(id(water.chain))
@@ -1,8 +1,8 @@
 """Contains functions for dealing with the .mmtf file format."""
 
-import msgpack
 import struct
-from collections import deque
+from collections import deque, Counter
+from itertools import accumulate
 from datetime import datetime
 from .mmcif import get_structure_from_atom, create_entities, split_residue_id
 from .structures import Chain, Ligand
@@ -14,6 +14,7 @@ def mmtf_bytes_to_mmtf_dict(bytestring):
     :patam bytes bytestring: the .mmtf filestring.
     :rtype: ``dict``"""
 
+    import msgpack
     raw = msgpack.unpackb(bytestring)
     return decode_dict(raw)
 
@@ -195,29 +196,31 @@ def update_models_list(mmtf_dict, data_dict):
     group_definitions = get_group_definitions_list(mmtf_dict)
     groups = get_groups_list(mmtf_dict, group_definitions)
     chains = get_chains_list(mmtf_dict, groups)
+    start = 0
     for model_num in range(mmtf_dict["numModels"]):
         model = {"polymer": {}, "non-polymer": {}, "water": {}, "branched": {}}
-        for chain_num in range(mmtf_dict["chainsPerModel"][model_num]):
-            chain = chains[chain_num]
+        end = start + mmtf_dict["chainsPerModel"][model_num]
+        for chain in chains[start:end]:
             add_chain_to_model(chain, model, atoms)
         data_dict["models"].append(model)
+        start = end
 
 
 def get_atoms_list(mmtf_dict):
-    """Creates a list of atom dictionaries from a .mmtf dictionary by zipping
-    together some of its fields.
+    """Creates a list of atom tuples from a .mmtf dictionary by zipping
+    together some of its fields - each has the atom's ID, coordinates,
+    alt loc, B-factor and occupancy. They are only turned into atom
+    dictionaries once the het they belong to is known.
 
     :param dict mmtf_dict: the .mmtf dictionary to read.
     :rtype: ``list``"""
 
-    return [{
-     "x": x, "y": y, "z": z, "alt_loc": a or None, "bvalue": b, "occupancy": o,
-     "id": i, "is_hetatm": False
-    } for x, y, z, a, b, i, o in zip(
-     mmtf_dict["xCoordList"], mmtf_dict["yCoordList"], mmtf_dict["zCoordList"],
-     mmtf_dict["altLocList"], mmtf_dict["bFactorList"], mmtf_dict["atomIdList"],
+    return list(zip(
+     mmtf_dict["atomIdList"], mmtf_dict["xCoordList"],
+     mmtf_dict["yCoordList"], mmtf_dict["zCoordList"],
+     mmtf_dict["altLocList"], mmtf_dict["bFactorList"],
      mmtf_dict["occupancyList"]
-    )]
+    ))
 
 
 def get_group_definitions_list(mmtf_dict):
@@ -243,7 +246,8 @@ def get_group_definitions_list(mmtf_dict):
 
 def get_groups_list(mmtf_dict, group_definitions):
     """Creates a list of group dictionaries from a .mmtf dictionary by zipping
-    together some of its fields.
+    together some of its fields. Each group is given the position in the atoms
+    list of its first atom.
 
     :param dict mmtf_dict: the .mmtf dictionary to read.
     :rtype: ``list``"""
@@ -251,13 +255,17 @@ def get_groups_list(mmtf_dict, group_definitions):
     sec_struct = [
      "helices", None, "helices", "strands", "helices", "strands", None, None
     ]
+    starts = [0] + list(accumulate(
+     len(group_definitions[type_]["atoms"])
+     for type_ in mmtf_dict["groupTypeList"]
+    ))
     return [{
      "number": id, "insert": insert, "secondary_structure": sec_struct[ss],
-     **group_definitions[type_]
-    } for id, insert, ss, type_, in zip(
+     "atom_start": start, **group_definitions[type_]
+    } for id, insert, ss, type_, start in zip(
      mmtf_dict["groupIdList"], mmtf_dict["insCodeList"],
      mmtf_dict.get("secStructList", [-1] * len(mmtf_dict["groupIdList"])),
-     mmtf_dict["groupTypeList"]
+     mmtf_dict["groupTypeList"], starts
     )]
 
 
@@ -268,17 +276,23 @@ def get_chains_list(mmtf_dict, groups):
     :param dict mmtf_dict: the .mmtf dictionary to read.
     :rtype: ``list``"""
 
-    chains = []
-    for i_id, id, group_num in zip(mmtf_dict["chainIdList"],
-     mmtf_dict["chainNameList"], mmtf_dict["groupsPerChain"]):
-        chain = {"id": id, "internal_id": i_id, "groups": groups[:group_num]}
-        del groups[:group_num]
-        for entity in mmtf_dict["entityList"]:
-            if len(chains) in entity["chainIndexList"]:
-                chain["type"] = entity["type"]
-                chain["sequence"] = entity.get("sequence", "")
-                chain["full_name"] = entity.get("description", None)
-                break
+    entities = {}
+    for entity in mmtf_dict["entityList"]:
+        for index in entity["chainIndexList"]:
+            entities.setdefault(index, entity)
+    chains, start = [], 0
+    for index, (i_id, id, group_num) in enumerate(zip(mmtf_dict["chainIdList"],
+     mmtf_dict["chainNameList"], mmtf_dict["groupsPerChain"])):
+        chain = {
+         "id": id, "internal_id": i_id,
+         "groups": groups[start:start + group_num]
+        }
+        start += group_num
+        entity = entities.get(index)
+        if entity:
+            chain["type"] = entity["type"]
+            chain["sequence"] = entity.get("sequence", "")
+            chain["full_name"] = entity.get("description", None)
         chains.append(chain)
     return chains
 
@@ -289,7 +303,7 @@ def add_chain_to_model(chain, model, atoms):
 
     :param dict chain: the 'chain' to add.
     :param dict model: the model to add it to.
-    :param list atoms: the atoms list to work through."""
+    :param list atoms: the atoms list to take atoms from."""
 
     if chain["type"] == "polymer" or chain["type"] == "branched":
         polymer = {
@@ -311,17 +325,18 @@ def add_het_to_dict(group, chain, atoms, d, number=None):
 
     :param dict group: the group template the het should be based on.
     :param dict chain: the chain (in the real sense) the het is associated with.
-    :param list atoms: the atoms list to work through.
+    :param list atoms: the atoms list of the whole file.
     :param dict d: the dictionary to add to.
     :param int number: if given, the residue number to use."""
 
     het_id = f"{chain['id']}.{group['number']}{group['insert']}"
-    het_atoms = atoms[:len(group["atoms"])]
-    del atoms[:len(het_atoms)]
-    het_atoms = {a["id"]: {
-     "anisotropy": [0] * 6, **a, **g_a
-    } for a, g_a in zip(het_atoms, group["atoms"])}
-    for a in het_atoms.values(): del a["id"]
+    start = group["atom_start"]
+    het_atoms = {id: {
+     "anisotropy": [0] * 6, "x": x, "y": y, "z": z, "alt_loc": a or None,
+     "bvalue": b, "occupancy": o, "is_hetatm": False, **g_a
+    } for (id, x, y, z, a, b, o), g_a in zip(
+     atoms[start:start + len(group["atoms"])], group["atoms"]
+    )}
     het = {
      "name": group["name"], "atoms": het_atoms, "full_name": None,
      "secondary_structure": group["secondary_structure"]
@@ -404,6 +419,7 @@ def structure_to_mmtf_string(structure):
      "chainNameList": chain_names, "groupsPerChain": groups_per_chain,
      "groupList": groups, "groupIdList": group_ids, "groupTypeList": group_types
     }
+    import msgpack
     return msgpack.packb(d)
 
 
@@ -471,11 +487,17 @@ def get_chain_ids_and_names(chains, ligands, waters):
         chain_names.append(chain.id)
     for ligand in ligands:
         chain_ids.append(ligand._internal_id)
-        chain_names.append(ligand.chain.id)
+        chain_names.append(
+         ligand.chain.id if ligand.chain else ligand._internal_id
+        )
+    used_ids = set(chain_ids)
     for water in waters:
-        if water._internal_id not in chain_ids:
+        if water._internal_id not in used_ids:
             chain_ids.append(water._internal_id)
-            chain_names.append(water.chain.id)
+            chain_names.append(
+             water.chain.id if water.chain else water._internal_id
+            )
+            used_ids.add(water._internal_id)
     return (chain_ids, chain_names)
 
 
@@ -493,9 +515,9 @@ def get_groups_per_chain(chains, ligands, waters):
         groups_per_chain.append(len(chain.residues()))
     for ligand in ligands:
         groups_per_chain.append(1)
-    water_chains = sorted(set(w._internal_id for w in waters))
-    for wc in water_chains:
-        groups_per_chain.append(len([w for w in waters if w._internal_id == wc]))
+    water_counts = Counter(w._internal_id for w in waters)
+    for wc in sorted(water_counts):
+        groups_per_chain.append(water_counts[wc])
     return groups_per_chain
 
 
@@ -509,15 +531,21 @@ def get_groups(chains, ligands, waters):
     :rtype: ``tuple``"""
 
     group_types, group_ids, groups, inserts = [], [], [], []
+    positions = {}
     for chain in chains:
         for res in chain.residues():
-            add_het_to_groups(res, group_types, group_ids, groups, inserts)
+            add_het_to_groups(
+             res, group_types, group_ids, groups, inserts, positions
+            )
     for ligand in ligands + waters:
-        add_het_to_groups(ligand, group_types, group_ids, groups, inserts)
+        add_het_to_groups(
+         ligand, group_types, group_ids, groups, inserts, positions
+        )
     return (group_types, group_ids, groups, inserts)
 
 
-def add_het_to_groups(het, group_type_list, group_id_list, group_list, ins_list):
+def add_het_to_groups(het, group_type_list, group_id_list, group_list, ins_list,
+                      group_positions=None):
     """Updates group lists with information from a single :py:class:`.Het`.
 
     :param Het het: the Het to pack.
@@ -525,6 +553,9 @@ def add_het_to_groups(het, group_type_list, group_id_list, group_list, ins_list)
     :param list group_id_list: the list of group IDs.
     :param list group_list: the list of groups.
     :param list ins_list: the list of insertion codes.
+    :param dict group_positions: if given, a lookup of the positions of the\
+    groups already in the list, which will be used and updated instead of\
+    searching the list.
     :rtype: ``tuple``"""
 
     atoms = sorted(het.atoms(), key=lambda a: a.id)
@@ -533,13 +564,21 @@ def add_het_to_groups(het, group_type_list, group_id_list, group_list, ins_list)
      "elementList": [a.element for a in atoms],
      "formalChargeList": [a.charge for a in atoms]
     }
-    for i, g in enumerate(group_list):
-        if g == group:
-            group_type_list.append(i)
-            break
+    if group_positions is None:
+        for i, g in enumerate(group_list):
+            if g == group:
+                group_type_list.append(i)
+                break
+        else:
+            group_list.append(group)
+            group_type_list.append(len(group_list) - 1)
     else:
-        group_list.append(group)
-        group_type_list.append(len(group_list) - 1)
+        key = (group["groupName"], *map(tuple, (group["atomNameList"],
+         group["elementList"], group["formalChargeList"])))
+        if key not in group_positions:
+            group_positions[key] = len(group_list)
+            group_list.append(group)
+        group_type_list.append(group_positions[key])
     id_, insert = split_residue_id(atoms[0])
     group_id_list.append(id_)
     ins_list.append(insert if insert != "?" else "")
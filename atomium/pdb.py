@@ -3,11 +3,10 @@
 from datetime import datetime
 import re
 from itertools import groupby, chain
-import valerius
 from math import ceil
 from .data import CODES
 from .structures import Residue, Ligand
-from .mmcif import add_secondary_structure_to_polymers
+from .mmcif import add_secondary_structure_to_polymers, read_byte_range
 
 def pdb_string_to_pdb_dict(filestring):
     """Takes a .pdb filestring and turns into a ``dict`` which represents its
@@ -46,6 +45,86 @@ def pdb_string_to_pdb_dict(filestring):
     return pdb_dict
 
 
+def index_pdb_file(f):
+    """Takes an open .pdb file (in binary mode) and finds the byte offsets of
+    its records, without parsing any of them. The index is a ``dict`` with two
+    lists - ``"other"`` for the ``(start, end)`` ranges of records which don't
+    belong to any one model, and ``"atoms"`` for ``(model, chain, start, end)``
+    ranges of ATOM, HETATM, ANISOU and TER records, where consecutive records
+    of the same chain in the same model share one range.
+
+    Models are numbered by position, starting at 0. The index can be saved as
+    JSON.
+
+    :param f: the binary file object to scan.
+    :rtype: ``dict``"""
+
+    other, atoms = [], []
+    position, model, chain = 0, 0, None
+    for line in f:
+        end = position + len(line)
+        if line[:6] in (b"ATOM  ", b"HETATM", b"ANISOU") or line[:3] == b"TER":
+            if line[:3] != b"TER" or line[21:22].strip():
+                chain = line[21:22].decode()
+            if atoms and atoms[-1][:2] == [model, chain] \
+             and atoms[-1][3] == position:
+                atoms[-1][3] = end
+            else: atoms.append([model, chain, position, end])
+        elif line[:5] == b"MODEL":
+            if atoms: model += 1
+        elif line[:6] != b"ENDMDL":
+            if other and other[-1][1] == position:
+                other[-1][1] = end
+            else: other.append([position, end])
+        position = end
+    return {"other": other, "atoms": atoms}
+
+
+def read_pdb_selection(f, index, runs, model=None, chains=None, other=True):
+    """Uses a .pdb index (see :py:func:`.index_pdb_file`) to read just part of
+    a .pdb file - one model, and/or certain chains - seeking past everything
+    else. The selected records are returned as a .pdb filestring, with each
+    model in its own MODEL block.
+
+    :param f: the binary file object to read.
+    :param dict index: the index of the file.
+    :param list runs: the index's atom runs grouped by model, as made by\
+    :py:func:`.group_index_runs`.
+    :param int model: if given, the position of the only model to read.
+    :param chains: if given, the IDs of the chains to read.
+    :param bool other: if ``False``, records outside models won't be read.
+    :rtype: ``str``"""
+
+    models = runs if model is None else runs[model:model + 1 or None]
+    if chains is not None: chains = set(chains)
+    blocks = []
+    if other: blocks = [read_byte_range(f, *r) for r in index["other"]]
+    for model_runs in models:
+        blocks.append("MODEL\n")
+        blocks += [read_byte_range(f, *run[2:]) for run in model_runs
+         if chains is None or run[1] in chains]
+        blocks.append("ENDMDL\n")
+    return "".join(blocks)
+
+
+def update_atom_locations(atoms, model_lines):
+    """Takes the ATOM and HETATM records of a model, and moves existing atoms
+    to the coordinates they give, in place. Atoms are matched by the position
+    of their record in the model, not by serial number, so serials which
+    don't fit in five digits (such as hybrid-36 serials) are never read.
+
+    :param list atoms: the atom for each record, or ``None`` for records\
+    which aren't in the model (such as unused alternate locations).
+    :param list model_lines: the records to read."""
+
+    records = [line for line in model_lines if line[:6] in ("ATOM  ", "HETATM")]
+    for atom, line in zip(atoms, records):
+        if atom is not None:
+            atom._location[:] = (
+             float(line[30:38]), float(line[38:46]), float(line[46:54])
+            )
+
+
 def update_dict(d, key, value):
     """Takes a dictionary where the values are lists, and adds a value to one of
     the lists at the specific key. If the list doesn't exist, it creates it
@@ -143,6 +222,7 @@ def update_models_list(pdb_dict, data_dict):
     sequences = make_sequences(pdb_dict)
     secondary_structure = make_secondary_structure(pdb_dict)
     full_names = get_full_names(pdb_dict)
+    bonds = make_bonds(pdb_dict)
     for model_lines in pdb_dict["MODEL"]:
         aniso = make_aniso(model_lines)
         last_ter = get_last_ter_line(model_lines)
@@ -156,10 +236,10 @@ def update_models_list(pdb_dict, data_dict):
                     add_atom_to_polymer(line, model, chain_id, res_id, aniso, full_names)
                 else:
                     add_atom_to_non_polymer(line, model, res_id, aniso, full_names)
-        
-            for chain_id, chain in model["polymer"].items():
-                chain["sequence"] = sequences.get(chain_id, "")
+        for chain_id, chain in model["polymer"].items():
+            chain["sequence"] = sequences.get(chain_id, "")
         add_secondary_structure_to_polymers(model, secondary_structure)
+        model["bonds"] = bonds
         data_dict["models"].append(model)
 
 
@@ -422,6 +502,26 @@ def get_full_names(pdb_dict):
     return full_names
 
 
+def make_bonds(pdb_dict):
+    """Creates a list of the bonds in the CONECT records of a .pdb dictionary,
+    as pairs of atom IDs. Each bond is only listed once.
+
+    :param dict pdb_dict: the .pdb dictionary to read.
+    :rtype: ``list``"""
+
+    bonds = set()
+    for line in pdb_dict.get("CONECT", []):
+        try:
+            atom = int(line[6:11])
+        except ValueError: continue
+        for start in range(11, 31, 5):
+            try:
+                other = int(line[start:start + 5])
+            except ValueError: continue
+            if other != atom: bonds.add(tuple(sorted((atom, other))))
+    return [list(bond) for bond in sorted(bonds)]
+
+
 def make_aniso(model_lines):
     """Creates a mapping of chain IDs to anisotropy, by parsing ANISOU records.
 
@@ -449,12 +549,15 @@ def get_last_ter_line(model_lines):
 
 
 def id_from_line(line):
-    """Creates a residue ID from an atom line.
+    """Creates a residue ID from an atom line. A blank residue number is read
+    as ``.``, as it is in .cif files.
 
     :param str line: the ATOM or HETATM line record.
     :rtype: ``str``"""
 
-    return "{}.{}{}".format(line[21], line[22:26].strip(), line[26].strip())
+    return "{}.{}{}".format(
+     line[21], line[22:26].strip() or ".", line[26].strip()
+    )
 
 
 def add_atom_to_polymer(line, model, chain_id, res_id, aniso_dict, full_names):
@@ -577,6 +680,7 @@ def pack_sequences(structure, lines):
     :param AtomStructure structure: the structure to convert.
     :param list lines: the string lines to update."""
 
+    import valerius
     try:
         for chain in sorted(structure.chains(), key=lambda c: c.id):
             residues = valerius.from_string(chain.sequence).codes
@@ -602,8 +706,9 @@ def atom_to_atom_line(a, lines):
     id_, residue_name, chain_id, residue_id, insert_code = "", "", "", "", ""
     if a.het:
         id_, residue_name = a.het.id, a.het._name
-        chain_id = a.chain.id if a.chain is not None else ""
-        residue_id = int("".join([c for c in id_ if c.isdigit() or c == "-"]))
+        chain_id = a.chain.id if a.chain is not None else id_.split(".")[0]
+        digits = "".join([c for c in id_ if c.isdigit() or c == "-"])
+        residue_id = int(digits) if digits.strip("-") else ""
         insert_code = id_[-1] if id_ and id_[-1].isalpha() else ""
     atom_name = a._name or ""
     atom_name = " " + atom_name if len(atom_name) < 4 else atom_name
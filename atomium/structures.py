@@ -1,7 +1,6 @@
 """Structure classes."""
 
 import numpy as np
-import rmsd
 import math
 import warnings
 from collections import Counter, OrderedDict, defaultdict
@@ -17,6 +16,8 @@ class AtomStructure:
 
     The class would never be instantiated directly."""
 
+    from atomium import data as __data
+
     def __init__(self, id=None, name=None):
         self._id, self._name = id, name
 
@@ -63,7 +64,8 @@ class AtomStructure:
 
         :rtype: ``float``"""
 
-        return round(sum([atom.mass for atom in self.atoms()]), 12)
+        codes = self._element_codes(self.atoms())
+        return round(float(self.__data.ELEMENT_MASSES[codes].sum()), 12)
 
 
     @property
@@ -72,7 +74,9 @@ class AtomStructure:
 
         :rtype: ``float``"""
 
-        return round(sum([atom.charge for atom in self.atoms()]), 12)
+        atoms = self.atoms()
+        charges = np.fromiter((a._charge for a in atoms), float, len(atoms))
+        return round(float(charges.sum()), 12)
 
 
     @property
@@ -82,7 +86,9 @@ class AtomStructure:
 
         :rtype: ``Counter``"""
 
-        return Counter([atom.element for atom in self.atoms()])
+        counts = np.bincount(self._element_codes(self.atoms()))
+        return Counter({self.__data.ELEMENT_SYMBOLS[code]: int(count)
+         for code, count in enumerate(counts) if count})
 
 
     @property
@@ -92,9 +98,10 @@ class AtomStructure:
 
         :rtype: ``tuple``"""
 
-        mass = self.mass
-        locations = np.array([a._location * a.mass for a in self.atoms()])
-        return np.sum(locations, axis=0) / mass
+        atoms = list(self.atoms())
+        masses = self.__data.ELEMENT_MASSES[self._element_codes(atoms)]
+        locations = np.array([a._location for a in atoms]).reshape(-1, 3)
+        return np.sum(locations * masses[:, None], axis=0) / masses.sum()
 
 
     @property
@@ -114,6 +121,22 @@ class AtomStructure:
         return np.sqrt(mean_square_deviation)
 
 
+    def __reduce__(self):
+        from .columns import structure_to_columns, columns_to_structure
+        return (columns_to_structure, structure_to_columns(self))
+
+
+    @staticmethod
+    def _element_codes(atoms):
+        """Gets the element codes of some atoms as an array, for indexing the
+        element property arrays in :py:mod:`.data`.
+
+        :param atoms: the atoms to read.
+        :rtype: ``numpy.ndarray``"""
+
+        return np.fromiter((a._element_code for a in atoms), int, len(atoms))
+
+
     def pairing_with(self, structure):
         """Takes another structure with the same number of atoms as this one,
         and attempts to find the nearest equivalent of every atom in this
@@ -166,32 +189,72 @@ class AtomStructure:
         c1, c2 = self.center_of_mass, structure.center_of_mass
         coords1 = [[x - c1[0], y - c1[1], z - c1[2]] for x, y, z in coords1]
         coords2 = [[x - c2[0], y - c2[1], z - c2[2]] for x, y, z in coords2]
+        import rmsd
         return round(rmsd.kabsch_rmsd(coords1, coords2), 12)
 
 
     def create_grid(self, size=1, margin=0):
-        """A generator which models a grid around the structure and returns the
-        coordinates of all the points in that grid. The origin is always one of
-        those points, and the grid will be a box.
+        """Models a grid around the structure and returns it as a
+        :py:class:`.Grid` - iterating over this gives the coordinates of all
+        the points in the grid, and its ``points`` gives them all as one NumPy
+        array. The origin is always one of those points, and the grid will be a
+        box.
 
         :param int size: The spacing between grid points. The default is 1.
         :param int margin: How far to extend the grid beyond the structure\
         coordinates. The default is 0.
+        :rtype: ``Grid``"""
+
+        from .geometry import Grid
+        atoms = self.atoms()
+        locations = np.array([a._location for a in atoms]).reshape(-1, 3)
+        low = np.floor((locations.min(axis=0) - margin) / size)
+        high = np.ceil((locations.max(axis=0) + margin) / size)
+        return Grid(*[np.arange(
+         min(int(l), 0), max(int(h), 0) + 1
+        ) * size for l, h in zip(low, high)])
+
+
+    def voxelise(self, size=1, margin=0, elements=None, sigma=None):
+        """Bins the structure's atoms into a grid around it, for use as an
+        occupancy or density map. Unlike :py:meth:`.create_grid`, the grid
+        doesn't have to include the origin - it starts ``margin`` below the
+        lowest coordinates (its :py:attr:`.Grid.origin`) and extends to
+        ``margin`` above the highest, so its size depends only on the size of
+        the structure.
+
+        If a list of elements is given, there is one channel per element, and
+        atoms of any other element are left out. Without ``sigma``, each atom
+        counts towards the grid point nearest it - with ``sigma``, each atom is
+        smeared out as a Gaussian of that width.
+
+        Two things are returned - the :py:class:`.Grid`, and a C×X×Y×Z array
+        of values at its points, with one channel (C) per element.
+
+        :param int size: The spacing between grid points. The default is 1.
+        :param int margin: How far to extend the grid beyond the structure\
+        coordinates. The default is 0.
+        :param list elements: the element symbols to give channels to.
+        :param float sigma: if given, the width of each atom's Gaussian.
         :rtype: ``tuple``"""
 
-        atom_locations = [atom.location for atom in self.atoms()]
-        dimension_values = []
-        for dimension in range(3):
-            coordinates = [loc[dimension] for loc in atom_locations]
-            min_, max_ = min(coordinates) - margin, max(coordinates) + margin
-            values = [0]
-            while values[0] > min_: values.insert(0, values[0] - size)
-            while values[-1] < max_: values.append(values[-1] + size)
-            dimension_values.append(values)
-        for x in dimension_values[0]:
-            for y in dimension_values[1]:
-                for z in dimension_values[2]:
-                    yield (x, y, z)
+        from .geometry import Grid, voxelise
+        atoms = list(self.atoms())
+        locations = np.array([a._location for a in atoms]).reshape(-1, 3)
+        low = locations.min(axis=0) - margin
+        counts = np.ceil((locations.max(axis=0) + margin - low) / size)
+        grid = Grid(*[start + np.arange(int(count) + 1) * size
+         for start, count in zip(low, counts)])
+        if elements is None:
+            return grid, voxelise(locations, grid, sigma=sigma)
+        lookup = {element.upper(): n for n, element in enumerate(elements)}
+        channels = np.array([
+         lookup.get((a._element or "").upper(), -1) for a in atoms
+        ], dtype=np.int64)
+        kept = channels != -1
+        return grid, voxelise(
+         locations[kept], grid, channels[kept], len(elements), sigma=sigma
+        )
 
 
     def check_ids(self):
@@ -214,11 +277,14 @@ class AtomStructure:
         If the structure you are saving has any duplicate IDs, a warning will be
         issued, as the file saved will likely be nonsensical.
 
+        If the filename ends in .gz, .bz2, .xz or .zst (after the format's own
+        extension, as in ``'1lol.cif.gz'``) the file will be compressed.
+
         :param str path: the filename and location to save to."""
 
-        from .utilities import save
+        from .utilities import save, strip_compression
         self.check_ids()
-        ext = path.split(".")[-1]
+        ext = strip_compression(path).split(".")[-1]
         if ext == "cif":
             from .mmcif import structure_to_mmcif_string
             string = structure_to_mmcif_string(self)
@@ -275,6 +341,152 @@ class AtomStructure:
                 yield {atoms[a_index], atoms[o_index]}
 
 
+    def distance_matrix(self, other=None, level="atom", method="min",
+                        block=1024, **kwargs):
+        """Returns a NumPy array of the distances between every atom (or
+        residue) in the structure and every atom (or residue) in another
+        structure, or in itself if no other structure is given. Atoms are in
+        order of ID, and residues in the order their atoms first appear.
+
+        Residue distances can be the minimum distance between their atoms
+        (``"min"``), the distance between their alpha carbons (``"ca"``) or
+        between their centroids (``"centroid"``). Residues without an alpha
+        carbon use their centroid. Minimum distances are calculated in blocks,
+        so that the full atom distance matrix is never created.
+
+        Any keyword arguments are used to select which atoms are included.
+
+        :param AtomStructure other: the structure to measure distances to.
+        :param str level: ``"atom"`` or ``"residue"``.
+        :param str method: how residue distances are measured.
+        :param int block: the number of atoms to calculate distances for at\
+        once.
+        :raises ValueError: if an unknown level or method is given.
+        :rtype: ``numpy.ndarray``"""
+
+        from .geometry import distance_matrix, group_distance_matrix
+        structures = [self] if other is None else [self, other]
+        points = [s._distance_points(level, method, **kwargs)
+         for s in structures]
+        if level == "residue" and method == "min":
+            args = [value for p in points for value in p[1:]]
+            return group_distance_matrix(*args, block=block)
+        return distance_matrix(*[p[1] for p in points], block=block)
+
+
+    def contact_map(self, cutoff, level="atom", method="min", sparse=False,
+                    **kwargs):
+        """Returns a boolean NumPy array showing which atoms (or residues) in
+        the structure are within a cutoff distance of each other, in the same
+        order as :py:meth:`.distance_matrix`. Nothing is counted as being in
+        contact with itself.
+
+        Only nearby atoms are compared, so a sparse map can be made for large
+        structures without creating a dense matrix at any point - this needs
+        SciPy to be installed.
+
+        :param float cutoff: the distance cutoff to use.
+        :param str level: ``"atom"`` or ``"residue"``.
+        :param str method: how residue distances are measured.
+        :param bool sparse: if ``True``, a SciPy CSR matrix is returned.
+        :raises ValueError: if an unknown level or method is given.
+        :rtype: ``numpy.ndarray``"""
+
+        from .geometry import cell_pairs
+        structures, coordinates, groups = self._distance_points(
+         level, method, **kwargs
+        )
+        pairs = cell_pairs(coordinates, cutoff)
+        if groups is not None:
+            owners = np.repeat(np.arange(len(groups)), np.diff(
+             np.append(groups, len(coordinates))
+            ))
+            pairs = np.unique(np.sort(owners[pairs], axis=1), axis=0)
+            pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        rows = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        columns = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        shape = (len(structures), len(structures))
+        if sparse:
+            from scipy.sparse import csr_matrix
+            return csr_matrix(
+             (np.ones(len(rows), dtype=bool), (rows, columns)), shape=shape
+            )
+        contacts = np.zeros(shape, dtype=bool)
+        contacts[rows, columns] = True
+        return contacts
+
+
+    def sasa(self, level="atom", probe=1.4, points=100, workers=1):
+        """Calculates the solvent accessible surface area of the structure's
+        atoms, using the Shrake-Rupley algorithm with each atom's van der
+        Waals radius. Only the structure's own atoms are considered, so the
+        area buried by an interface is the difference between the areas of
+        its two sides calculated separately and calculated together.
+
+        The areas are returned as a ``dict`` of atoms to areas, or they can be
+        summed into areas per het (residue or ligand) or per chain. Large
+        structures can be shared out between a pool of worker processes.
+
+        :param str level: ``"atom"``, ``"het"`` or ``"chain"``.
+        :param float probe: the radius of the solvent probe.
+        :param int points: the number of points to put on each atom.
+        :param int workers: the number of processes to use.
+        :raises ValueError: if an unknown level is given.
+        :rtype: ``dict``"""
+
+        from .geometry import surface_areas
+        if level not in ("atom", "het", "chain"):
+            raise ValueError("Unknown surface area level: {}".format(level))
+        atoms = tuple(self.atoms())
+        coordinates = np.array([a._location for a in atoms]).reshape(-1, 3)
+        radii = self.__data.ELEMENT_VDW_RADII[self._element_codes(atoms)]
+        areas = surface_areas(coordinates, radii, probe, points, workers)
+        if level == "atom": return dict(zip(atoms, areas.tolist()))
+        totals = {}
+        for atom, area in zip(atoms, areas.tolist()):
+            owner = getattr(atom, level)
+            totals[owner] = totals.get(owner, 0) + area
+        return totals
+
+
+    def _distance_points(self, level, method, **kwargs):
+        """Gets the atoms or residues that distances are measured between, and
+        the coordinates used to represent them. For minimum residue distances,
+        the coordinates are those of every atom, grouped by residue, and the
+        start index of each residue's group is also given.
+
+        :param str level: ``"atom"`` or ``"residue"``.
+        :param str method: how residue distances are measured.
+        :raises ValueError: if an unknown level or method is given.
+        :rtype: ``tuple``"""
+
+        atoms = sorted(self.atoms(**kwargs), key=lambda a: a._id or 0)
+        if level == "atom":
+            coordinates = np.array([a._location for a in atoms])
+            return atoms, coordinates.reshape(-1, 3), None
+        if level != "residue":
+            raise ValueError("Unknown distance level: {}".format(level))
+        if method not in ("min", "ca", "centroid"):
+            raise ValueError("Unknown distance method: {}".format(method))
+        residues = {}
+        for atom in atoms:
+            if isinstance(atom._het, Residue):
+                residues.setdefault(atom._het, []).append(atom)
+        coordinates = [
+         np.array([a._location for a in r_atoms]) for r_atoms in residues.values()
+        ]
+        if method == "min":
+            groups = np.cumsum([0] + [len(c) for c in coordinates[:-1]])
+            return list(residues), np.concatenate(
+             coordinates or [np.empty((0, 3))]
+            ), groups[:len(coordinates)]
+        for n, r_atoms in enumerate(residues.values()):
+            ca = [a for a in r_atoms if a._name == "CA"]
+            if method == "ca" and ca: coordinates[n] = ca[0]._location
+            else: coordinates[n] = coordinates[n].mean(axis=0)
+        return list(residues), np.array(coordinates).reshape(-1, 3), None
+
+
     def nearby_atoms(self, *args, **kwargs):
         """Returns all atoms within a given distance of this structure,
         excluding the structure's own atoms.
@@ -342,13 +554,13 @@ class AtomStructure:
             _,_,_ = dx
             vector = dx
         except TypeError: vector = (dx, dy, dz)
-        Atom.translate_atoms(vector, *self.atoms())
-        self.trim(trim)
+        Atom.translate_atoms(vector, *self.atoms(), trim=trim)
 
 
     def transform(self, matrix, trim=12):
-        """Transforms the structure using a 3x3 matrix supplied. This is useful
-        if the :py:meth:`.rotate` method isn't powerful enough for your needs.
+        """Transforms the structure using a 3x3 matrix supplied, or a 4x4
+        homogeneous matrix which also translates it. This is useful if the
+        :py:meth:`.rotate` method isn't powerful enough for your needs.
 
         :param array matrix: A NumPy matrix representing the transformation.\
         You can supply a list of lists if you like and it will be converted to\
@@ -357,8 +569,7 @@ class AtomStructure:
         after transforming - the default is 12 decimal places but this can be\
         set to ``None`` if no rounding is to be done."""
 
-        Atom.transform_atoms(matrix, *self.atoms())
-        self.trim(trim)
+        Atom.transform_atoms(matrix, *self.atoms(), trim=trim)
 
 
     def rotate(self, angle, axis, trim=12):
@@ -371,8 +582,7 @@ class AtomStructure:
         after translating - the default is 12 decimal places but this can be\
         set to ``None`` if no rounding is to be done."""
 
-        Atom.rotate_atoms(angle, axis, *self.atoms())
-        self.trim(trim)
+        Atom.rotate_atoms(angle, axis, *self.atoms(), trim=trim)
 
 
     def trim(self, places):
@@ -382,8 +592,80 @@ class AtomStructure:
         :param int places: The number of places to round the coordinates to. If\
         ``None``, no rounding will be done."""
 
-        for atom in self.atoms():
-            atom.trim(places)
+        if places is not None:
+            atoms = tuple(self.atoms())
+            locations = np.array([a._location for a in atoms]).reshape(-1, 3)
+            Atom._scatter_locations(atoms, locations, places)
+
+
+    def pose_coordinates(self, rotations, translations=None):
+        """Calculates the coordinates the structure would have in many rigid
+        body poses at once, without moving its atoms or creating new ones. Each
+        pose is a rotation about the structure's centre of mass, followed by a
+        translation.
+
+        Two things are returned - the structure's atoms, and a K×N×3 array of
+        their coordinates in each pose, in the same order as the atoms.
+
+        :param numpy.ndarray rotations: a K×3×3 stack of rotation matrices.
+        :param numpy.ndarray translations: a K×3 array of translations.
+        :rtype: ``tuple``"""
+
+        from .geometry import transform_coordinates
+        atoms = tuple(self.atoms())
+        locations = np.array([a._location for a in atoms]).reshape(-1, 3)
+        rotations = np.asarray(rotations, dtype=float).reshape(-1, 3, 3)
+        center = self.center_of_mass
+        coordinates = transform_coordinates(locations - center, rotations)
+        coordinates += center
+        if translations is not None:
+            coordinates += np.asarray(
+             translations, dtype=float
+            ).reshape(-1, 1, 3)
+        return atoms, coordinates
+
+
+    def generate_poses(self, rotations, translations=None, score=None,
+                       keep=None):
+        """Generates rigid body poses of the structure (see
+        :py:meth:`.pose_coordinates`) and returns copies of it in the best of
+        them. Only the poses which are kept are turned into new structures.
+
+        The poses can be scored with a function which takes the K×N×3 array of
+        pose coordinates and returns K scores, such as
+        :py:meth:`.Model.clash_counts` - lower scores are better. The kept
+        poses are returned as ``(score, structure)`` tuples, best first.
+        Without a scoring function, every pose scores 0 and they are returned
+        in the order given.
+
+        Each kept pose is built as a new copy of the structure with the pose's
+        coordinates, and the structure itself is never moved.
+
+        :param numpy.ndarray rotations: a K×3×3 stack of rotation matrices.
+        :param numpy.ndarray translations: a K×3 array of translations.
+        :param function score: the scoring function to use.
+        :param int keep: the number of poses to keep (by default, all of them).
+        :rtype: ``list``"""
+
+        from .columns import structure_to_columns, columns_to_structure
+        from .columns import structure_atoms
+        atoms, coordinates = self.pose_coordinates(rotations, translations)
+        scores = np.zeros(len(coordinates)) if score is None \
+         else np.asarray(score(coordinates))
+        best = np.argsort(scores, kind="stable")[:keep]
+        header, arrays = structure_to_columns(self)
+        positions = {
+         id(atom): n for n, atom in enumerate(structure_atoms(self))
+        }
+        order = [positions[id(atom)] for atom in atoms]
+        poses = []
+        for pose in best.tolist():
+            locations = np.empty((len(order), 3))
+            locations[order] = coordinates[pose]
+            poses.append((scores[pose].item(), columns_to_structure(
+             header, arrays, locations=locations
+            )))
+        return poses
 
 
 
@@ -482,6 +764,8 @@ class Model(AtomStructure, metaclass=StructureClass):
     :param \*molecules: The chains, ligands, and waters that will inhabit the\
     model."""
 
+    from atomium import data as __data
+
     def __init__(self, *molecules, file=None):
         AtomStructure.__init__(self, None, None)
         self._chains = set()
@@ -497,6 +781,7 @@ class Model(AtomStructure, metaclass=StructureClass):
         self._waters = StructureSet(*self._waters)
         self._file = file
         self._internal_grid = None
+        self._bonds, self._listed_bonds = None, None
 
 
     def __repr__(self):
@@ -557,7 +842,7 @@ class Model(AtomStructure, metaclass=StructureClass):
         :rtype: ``set``"""
 
         res = []
-        for chain in self._chains.structures:
+        for chain in self._chains:
             res += chain.residues()
         return StructureSet(*res)
 
@@ -570,10 +855,10 @@ class Model(AtomStructure, metaclass=StructureClass):
         atoms = set()
         for mol in self.molecules():
             try:
-                atoms.update(mol._atoms.structures)
+                atoms.update(mol._atoms)
             except:
-                for res in mol._residues.structures:
-                    atoms.update(res._atoms.structures)
+                for res in mol._ordered_residues:
+                    atoms.update(res._atoms)
         return StructureSet(*atoms)
 
 
@@ -581,6 +866,7 @@ class Model(AtomStructure, metaclass=StructureClass):
         """Removes all water ligands from the model."""
 
         self._waters = StructureSet()
+        self._bonds = None
     
 
     def optimise_distances(self):
@@ -597,10 +883,346 @@ class Model(AtomStructure, metaclass=StructureClass):
             self._internal_grid[x][y][z].add(atom)
 
 
+    def perceive_bonds(self, tolerance=0.45):
+        """Works out which of the model's atoms are covalently bonded, and
+        stores the bonds as one compact array, which each atom's
+        :py:attr:`.Atom.bonded_atoms` then reads from.
+
+        Atoms are bonded if they are closer than the sum of their covalent
+        radii plus a tolerance, with candidate pairs found by sorting atoms into
+        a grid - the atoms of each element are only checked against atoms with
+        radii no larger than their own, at a cutoff set by their own radius, so
+        that a few heavy atoms don't widen the search for every other atom.
+        Within standard amino acid residues, bonds between heavy atoms come
+        from a template of the residue instead. Bonds which the file lists
+        explicitly (CONECT records or ``struct_conn``), or which have been made
+        with :py:meth:`.Atom.bond`, are always kept. Atoms at different
+        alternate locations are never bonded.
+
+        The perceived bonds are discarded if any of the model's atoms are
+        moved, or if its waters are removed, and this will need calling again.
+
+        :param float tolerance: how much further apart than their radii sum\
+        two atoms can be and still be bonded.
+        :rtype: ``int``"""
+
+        from .geometry import cross_pairs
+        atoms = tuple(self.atoms())
+        positions = {id(atom): n for n, atom in enumerate(atoms)}
+        coordinates = np.array([a._location for a in atoms]).reshape(-1, 3)
+        radii = self.__data.ELEMENT_RADII[AtomStructure._element_codes(atoms)]
+        pairs = [np.empty((0, 2), dtype=np.int64)]
+        for radius in np.unique(radii).tolist():
+            group = np.flatnonzero(radii == radius)
+            partners = np.flatnonzero(radii <= radius)
+            found = cross_pairs(
+             coordinates[group], coordinates[partners], 2 * radius + tolerance
+            )
+            found = np.stack([group[found[:, 0]], partners[found[:, 1]]], 1)
+            pairs.append(found[
+             (radii[found[:, 1]] < radius) | (found[:, 0] < found[:, 1])
+            ])
+        pairs = np.concatenate(pairs)
+        distances = np.sqrt(((
+         coordinates[pairs[:, 0]] - coordinates[pairs[:, 1]]
+        ) ** 2).sum(axis=1))
+        pairs = pairs[(distances > 0.4) & (
+         distances <= radii[pairs[:, 0]] + radii[pairs[:, 1]] + tolerance
+        )]
+        hets, het_codes, alt_codes = [], {}, {None: 0}
+        codes = np.empty((len(atoms), 2), dtype=np.int64)
+        for n, atom in enumerate(atoms):
+            code = het_codes.setdefault(id(atom._het), len(het_codes))
+            if code == len(hets): hets.append((atom._het, []))
+            hets[code][1].append(n)
+            codes[n] = code, alt_codes.setdefault(atom._alt_loc, len(alt_codes))
+        templated, bonds = np.zeros(len(atoms), dtype=bool), []
+        for het, het_atoms in hets:
+            template = self.__data.RESIDUE_BONDS.get(het._name) \
+             if isinstance(het, Residue) else None
+            if template is None: continue
+            names = {}
+            for n in het_atoms:
+                templated[n] = (atoms[n]._element or "").upper() != "H"
+                names.setdefault(atoms[n]._name, []).append(n)
+            for bond in (self.__data.BACKBONE_BONDS + " " + template).split():
+                name1, name2 = bond.split("-")
+                bonds += [[a, b] for a in names.get(name1, [])
+                 for b in names.get(name2, [])]
+        templated_pair = templated[pairs].all(axis=1) & (
+         codes[pairs[:, 0], 0] == codes[pairs[:, 1], 0]
+        )
+        bonds += [[n, positions[id(other)]]
+         for n, atom in enumerate(atoms) for other in atom._bonded_atoms
+         if id(other) in positions]
+        if self._listed_bonds:
+            listed_atoms, _, listed_edges, _, _ = self._listed_bonds
+            listed = np.array([
+             positions.get(id(atom), -1) for atom in listed_atoms
+            ], dtype=np.int64)[listed_edges].reshape(-1, 2)
+            bonds += listed[(listed != -1).all(axis=1)].tolist()
+        edges = np.concatenate([
+         pairs[~templated_pair], np.array(bonds, dtype=np.int64).reshape(-1, 2)
+        ])
+        alts = codes[edges, 1]
+        edges = edges[
+         (alts[:, 0] == 0) | (alts[:, 1] == 0) | (alts[:, 0] == alts[:, 1])
+        ]
+        self._bonds = Model._bond_table(atoms, edges, positions)
+        return len(self._bonds[2])
+
+
+    @staticmethod
+    def _bond_table(atoms, edges, positions=None):
+        """Stores bonds between atoms compactly - as the unique E×2 array of
+        bonded pairs of positions within the atoms, and a CSR-style pair of
+        arrays giving each atom's bonded partners. Pairs of an atom with itself
+        are dropped.
+
+        :param tuple atoms: the atoms the positions refer to.
+        :param numpy.ndarray edges: the pairs of positions of bonded atoms.
+        :param dict positions: the position of each atom by its ``id``, if\
+        already made.
+        :rtype: ``tuple``"""
+
+        if positions is None:
+            positions = {id(atom): n for n, atom in enumerate(atoms)}
+        edges = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1, 2), 1)
+        edges = np.unique(edges[edges[:, 0] != edges[:, 1]], axis=0)
+        edges = edges.reshape(-1, 2)
+        ends = np.concatenate([edges, edges[:, ::-1]])
+        ends = ends[np.argsort(ends[:, 0], kind="stable")]
+        indptr = np.append(0, np.cumsum(np.bincount(
+         ends[:, 0], minlength=len(atoms)
+        )))
+        return (atoms, positions, edges, indptr, ends[:, 1])
+
+
+    @property
+    def bonds(self):
+        """The bonds found by :py:meth:`.perceive_bonds`, as the model's atoms
+        and an E×2 array of the positions of each bonded pair within them.
+        This is ``None`` if bonds have not been perceived.
+
+        :rtype: ``tuple``"""
+
+        return self._bonds and (self._bonds[0], self._bonds[2])
+
+
+    def contacts(self, cutoff, level="atom", workers=1, tiles=None):
+        """Finds every pair of things in the model which are within a given
+        distance of each other - pairs of atoms, or pairs of hets (residues
+        and ligands) or chains which have atoms that close.
+
+        Like :py:meth:`.optimise_distances`, this sorts the atoms into a grid
+        so that only neighbouring atoms are compared. For very large models,
+        space can also be split into tiles (with margins of ``cutoff`` so that
+        no contacts are missed at their edges) which are searched in parallel
+        by a pool of worker processes.
+
+        :param float cutoff: the distance cutoff to use.
+        :param str level: ``"atom"``, ``"het"`` or ``"chain"``.
+        :param int workers: the number of processes to search with.
+        :param int tiles: the number of tiles to split space into.
+        :raises ValueError: if an unknown level is given.
+        :rtype: ``set``"""
+
+        from .geometry import contact_pairs
+        if level not in ("atom", "het", "chain"):
+            raise ValueError("Unknown contact level: {}".format(level))
+        atoms = list(self.atoms())
+        coordinates = np.array([atom._location for atom in atoms])
+        pairs = contact_pairs(coordinates, cutoff, workers, tiles)
+        if level == "atom":
+            return {frozenset((atoms[a], atoms[b])) for a, b in pairs.tolist()}
+        owners, positions, structures = [], {}, []
+        for atom in atoms:
+            owner = getattr(atom, level)
+            if owner is not None and id(owner) not in positions:
+                positions[id(owner)] = len(structures)
+                structures.append(owner)
+            owners.append(-1 if owner is None else positions[id(owner)])
+        pairs = np.sort(np.array(owners, dtype=np.int64)[pairs], axis=1)
+        pairs = np.unique(pairs[
+         (pairs[:, 0] != -1) & (pairs[:, 0] != pairs[:, 1])
+        ], axis=0)
+        return {frozenset((structures[a], structures[b]))
+         for a, b in pairs.tolist()}
+
+
+    def clash_counts(self, coordinates, cutoff=2, exclude=None):
+        """Counts, for each of a stack of poses, how many pairs of atoms
+        would be closer than a cutoff if the posed atoms were placed in the
+        model. This can be given to :py:meth:`.AtomStructure.generate_poses` as
+        its scoring function.
+
+        The model's atoms are sorted into a grid once, and every pose is
+        checked against it in one vectorised search.
+
+        :param numpy.ndarray coordinates: a K×N×3 array of pose coordinates.
+        :param float cutoff: the distance below which atoms clash.
+        :param AtomStructure exclude: a structure whose atoms should not be\
+        counted - usually the structure being posed.
+        :rtype: ``numpy.ndarray``"""
+
+        from .geometry import clash_counts
+        atoms = self.atoms()
+        if exclude is not None: atoms = set(atoms) - set(exclude.atoms())
+        targets = np.array([atom._location for atom in atoms]).reshape(-1, 3)
+        return clash_counts(coordinates, targets, cutoff)
+
+
+    @property
+    def shared_coordinates(self):
+        """If the model was attached to from shared memory (see
+        :py:func:`.attach_model`), this is the read-only array of all its
+        atoms' coordinates. Otherwise it is ``None``.
+
+        :rtype: ``numpy.ndarray``"""
+
+        shared = getattr(self, "_shared", None)
+        return shared[1] if shared else None
+
+
+    def share(self):
+        """Publishes the model's coordinates and atom attributes in shared
+        memory, so that other processes can attach to it with
+        :py:func:`.attach_model` rather than receiving a copy.
+
+        :rtype: ``SharedModel``"""
+
+        from .columns import SharedModel
+        return SharedModel(self)
+
+
     #TODO copy
 
 
 
+class Ensemble:
+    """A set of frames which all share the same topology - such as the models
+    of an NMR ensemble, or the snapshots of a simulation. Rather than a full
+    :py:class:`.Model` for each frame, there is one model, and a K×N×3 array
+    of coordinates for its atoms.
+
+    The model's atoms are positioned according to the current frame, which can
+    be switched at any time.
+
+    :param Model model: the model whose topology all frames share.
+    :param list atoms: the model's atoms, in the order of the coordinates.
+    :param numpy.ndarray coordinates: the K×N×3 array of frame coordinates."""
+
+    from atomium import data as __data
+
+    def __init__(self, model, atoms, coordinates):
+        self._model, self._atoms = model, tuple(atoms)
+        self._coordinates = np.asarray(coordinates, dtype=float)
+        self._masses = self.__data.ELEMENT_MASSES[
+         AtomStructure._element_codes(self._atoms)
+        ]
+        self._frame = None
+        self.frame = 0
+
+
+    def __repr__(self):
+        return "<Ensemble ({} frame{}, {} atoms)>".format(
+         len(self), "" if len(self) == 1 else "s", len(self._atoms)
+        )
+
+
+    def __len__(self):
+        return len(self._coordinates)
+
+
+    def __getitem__(self, key):
+        return self._coordinates[key]
+
+
+    def __iter__(self):
+        for frame in range(len(self)):
+            self.frame = frame
+            yield self._model
+
+
+    @property
+    def model(self):
+        """The :py:class:`.Model` which all frames share.
+
+        :rtype: ``Model``"""
+
+        return self._model
+
+
+    @property
+    def atoms(self):
+        """The model's atoms, in the order used by the coordinate array.
+
+        :rtype: ``tuple``"""
+
+        return self._atoms
+
+
+    @property
+    def coordinates(self):
+        """The K×N×3 array of coordinates for every frame.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return self._coordinates
+
+
+    @property
+    def frame(self):
+        """The index of the frame that the model's atoms are currently
+        positioned at. Setting this will move every atom to that frame.
+
+        :rtype: ``int``"""
+
+        return self._frame
+
+
+    @frame.setter
+    def frame(self, frame):
+        locations = self._coordinates[frame].copy()
+        for atom, location in zip(self._atoms, locations):
+            atom._location = location
+        self._model._bonds = None
+        self._frame = range(len(self))[frame]
+
+
+    @property
+    def center_of_mass(self):
+        """The center of mass of every frame, as a K×3 array.
+
+        :rtype: ``numpy.ndarray``"""
+
+        weighted = self._coordinates * self._masses[None, :, None]
+        return weighted.sum(axis=1) / self._masses.sum()
+
+
+    @property
+    def radius_of_gyration(self):
+        """The radius of gyration of every frame, as an array of length K.
+
+        :rtype: ``numpy.ndarray``"""
+
+        deltas = self._coordinates - self.center_of_mass[:, None, :]
+        return np.sqrt((deltas ** 2).sum(axis=2).mean(axis=1))
+
+
+    def rmsd(self, frame=0):
+        """Calculates the Root Mean Square Deviation of every frame from one
+        reference frame (by default the first), after superposing them.
+
+        :param int frame: the index of the reference frame.
+        :rtype: ``numpy.ndarray``"""
+
+        from .geometry import kabsch_rmsd
+        centered = self._coordinates - self.center_of_mass[:, None, :]
+        return np.round(kabsch_rmsd(centered[frame], centered), 12)
+
+
+
 class Chain(Molecule, metaclass=StructureClass):
     """A sequence of residues. Unlike other structures, they are iterable, and
     have a length.
@@ -624,26 +1246,40 @@ class Chain(Molecule, metaclass=StructureClass):
         self._model = None
         self._helices = helices or []
         self._strands = strands or []
+        for segments, code in ((self._strands, "E"), (self._helices, "H")):
+            for segment in segments:
+                for res in segment: res._ss = code
 
 
     def __repr__(self):
-        return "<Chain {} ({} residues)>".format(self._id, len(self._residues))
+        return "<Chain {} ({} residues)>".format(self._id, len(self._ordered_residues))
 
 
     def __len__(self):
-        return len(self._residues)
+        return len(self._ordered_residues)
 
 
     def __iter__(self):
-        return iter(self._residues.structures)
+        return iter(self._ordered_residues)
 
 
     def __getitem__(self, key):
-        return self.residues()[key]
+        return self._ordered_residues[key]
 
 
     def __contains__(self, obj):
-        return obj in self._residues.structures or obj in self.atoms()
+        return obj in self._residues or obj in self.atoms()
+
+
+    @property
+    def _ordered_residues(self):
+        """The chain's residues as a tuple, in order. This is the tuple the
+        chain's :py:class:`.StructureSet` of residues already keeps, so there
+        is no second copy to keep in step with it.
+
+        :rtype: ``tuple``"""
+
+        return self._residues._structures
 
 
     @property
@@ -680,6 +1316,17 @@ class Chain(Molecule, metaclass=StructureClass):
         return tuple(self._strands)
 
 
+    @property
+    def secondary_structure(self):
+        """The secondary structure of every residue in the chain, in order, as
+        a string - with ``H`` for residues in alpha helices, ``E`` for residues
+        in beta strands, and ``-`` for anything else.
+
+        :rtype: ``str``"""
+
+        return "".join(r._ss or "-" for r in self._ordered_residues)
+
+
     @property
     def length(self):
         """Returns the number of residues in the chain.
@@ -696,7 +1343,38 @@ class Chain(Molecule, metaclass=StructureClass):
         :rtype: ``str``"""
 
         return "".join(r.code for r in self.residues())
-    
+
+
+    def assign_secondary_structure(self):
+        """Works out the chain's alpha helices and beta strands from the
+        hydrogen bonds between its residues' backbone atoms, in the manner of
+        DSSP, and replaces any helices and strands the chain already had.
+
+        This is useful for structures whose files have no secondary structure
+        records, such as predicted models."""
+
+        from .geometry import secondary_structure_codes
+        residues = self._ordered_residues
+        backbone = np.full((len(residues), 4, 3), np.nan)
+        names = {"N": 0, "CA": 1, "C": 2, "O": 3}
+        for r, res in enumerate(residues):
+            for atom in reversed(res._atoms.structures):
+                if atom._name in names:
+                    backbone[r, names[atom._name]] = atom._location
+        donors = np.array([res._name != "PRO" for res in residues], dtype=bool)
+        codes = secondary_structure_codes(backbone, donors).tolist()
+        self._helices, self._strands = [], []
+        segments = {"H": self._helices, "E": self._strands}
+        previous = "-"
+        for res, code in zip(residues, codes):
+            res._ss = None if code == "-" else code
+            if code in segments:
+                if code != previous: segments[code].append([])
+                segments[code][-1].append(res)
+            previous = code
+        self._helices = [tuple(h) for h in self._helices]
+        self._strands = [tuple(s) for s in self._strands]
+
 
     def copy(self, id=None, residue_ids=None, atom_ids=None):
         """Creates a copy of the chain, with new atoms and residues.
@@ -737,7 +1415,7 @@ class Chain(Molecule, metaclass=StructureClass):
         :rtype: ``set``"""
 
         return StructureSet() if self._model is None else StructureSet(
-         *[l for l in self._model._ligands.structures if l._chain is self]
+         *[l for l in self._model._ligands if l._chain is self]
         )
 
 
@@ -747,8 +1425,8 @@ class Chain(Molecule, metaclass=StructureClass):
         :rtype: ``set``"""
 
         atoms = set()
-        for res in self._residues.structures:
-            atoms.update(res._atoms.structures)
+        for res in self._ordered_residues:
+            atoms.update(res._atoms)
         return StructureSet(*atoms)
 
 
@@ -820,6 +1498,7 @@ class Residue(Het, metaclass=StructureClass):
          kwargs.get("full_name"), *atoms)
         self._next, self._previous = None, None
         self._chain = None
+        self._ss = None
         self.index = kwargs['index']
 
 
@@ -894,10 +1573,7 @@ class Residue(Het, metaclass=StructureClass):
 
         :rtype: ``bool``"""
 
-        if self.chain:
-            for helix in self.chain.helices:
-                if self in helix: return True
-        return False
+        return self._ss == "H"
     
 
     @property
@@ -906,10 +1582,19 @@ class Residue(Het, metaclass=StructureClass):
 
         :rtype: ``bool``"""
 
-        if self.chain:
-            for strand in self.chain.strands:
-                if self in strand: return True
-        return False
+        return self._ss == "E"
+
+
+    @property
+    def ss(self):
+        """The residue's secondary structure - ``H`` if it is part of an alpha
+        helix, ``E`` if it is part of a beta strand, and ``-`` otherwise. This
+        is set when the residue's chain is created, so residues can be queried
+        by it, as in ``chain.residues(ss="H")``.
+
+        :rtype: ``str``"""
+
+        return self._ss or "-"
 
 
     def copy(self, id=None, atom_ids=None):
@@ -926,7 +1611,9 @@ class Residue(Het, metaclass=StructureClass):
             atoms = [a.copy(id=id) for a, id in zip(atoms, new_ids)]
         else:
             atoms = [a.copy() for a in self.atoms()]
-        return self.__class__(*atoms, id=id or self._id, name=self._name)
+        return self.__class__(
+         *atoms, id=id or self._id, name=self._name, index=self.index
+        )
     
 
     @property
@@ -957,21 +1644,26 @@ class Atom:
     :param str name: The atom's name.
     :param number charge: The charge of the atom.
     :param number bvalue: The B-value of the atom (its uncertainty).
-    :param list anisotropy: The directional uncertainty of the atom."""
+    :param list anisotropy: The directional uncertainty of the atom.
+    :param bool is_hetatm: whether the atom was a HETATM record.
+    :param str alt_loc: the atom's alternate location code, if any."""
 
     from atomium import data as __data
 
     __slots__ = [
      "_element", "_location", "_id", "_name", "_charge",
-     "_bvalue", "_anisotropy", "_het", "_bonded_atoms", "_is_hetatm"
+     "_bvalue", "_anisotropy", "_het", "_bonded_atoms", "_is_hetatm",
+     "_alt_loc", "_element_code"
     ]
 
-    def __init__(self, element, x, y, z, id, name, charge, bvalue, anisotropy, is_hetatm=False):
+    def __init__(self, element, x, y, z, id, name, charge, bvalue, anisotropy, is_hetatm=False, alt_loc=None):
         self._location = np.array([x, y, z])
         self._element = element
+        self._element_code = self.__data.element_code(element)
         self._id, self._name, self._charge = id, name, charge
         self._bvalue, self._anisotropy = bvalue, anisotropy
-        self._het, self._bonded_atoms, self._is_hetatm = None, set(), is_hetatm
+        self._het, self._bonded_atoms, self._is_hetatm = None, (), is_hetatm
+        self._alt_loc = alt_loc
 
 
     def __repr__(self):
@@ -985,7 +1677,10 @@ class Atom:
     def __eq__(self, other):
         if not isinstance(other, Atom): return False
         for attr in self.__slots__:
-            if attr not in ("_id", "_het", "_bonded_atoms", "_location"):
+            if attr not in (
+             "_id", "_het", "_bonded_atoms", "_location", "_alt_loc",
+             "_element_code"
+            ):
                 if getattr(self, attr) != getattr(other, attr): return False
             if list(self._location) != list(other._location): return False
         return True
@@ -995,28 +1690,48 @@ class Atom:
         return id(self)
 
 
+    def __reduce__(self):
+        return (self.__class__, (
+         self._element, *self._location.tolist(), self._id, self._name,
+         self._charge, self._bvalue, self._anisotropy, self._is_hetatm,
+         self._alt_loc
+        ))
+
+
     @staticmethod
-    def translate_atoms(vector, *atoms):
-        """Translates multiple atoms using some vector.
+    def translate_atoms(vector, *atoms, trim=None):
+        """Translates multiple atoms using some vector. All the atoms'
+        locations are moved in one NumPy operation.
 
         :param vector: the three values representing the delta position.
-        :param \*atoms: the atoms to translate."""
+        :param \*atoms: the atoms to translate.
+        :param int trim: if given, the number of decimal places to round the\
+        new coordinates to."""
 
-        for atom in atoms:
-            atom._location += np.array(vector)
+        locations = np.array([a._location for a in atoms]).reshape(-1, 3)
+        locations += np.asarray(vector, dtype=float)
+        Atom._scatter_locations(atoms, locations, trim)
 
 
     @staticmethod
-    def transform_atoms(matrix, *atoms):
-        """Transforms multiple atoms using some matrix.
+    def transform_atoms(matrix, *atoms, trim=None):
+        """Transforms multiple atoms using some matrix - either a 3×3 matrix,
+        or a 4×4 homogeneous matrix which also translates them. All the atoms'
+        locations are transformed in one NumPy operation.
 
         :param matrix: the transformation matrix.
-        :param \*atoms: the atoms to transform."""
+        :param \*atoms: the atoms to transform.
+        :param int trim: if given, the number of decimal places to round the\
+        new coordinates to.
+        :raises ValueError: if the matrix is not 3×3 or 4×4."""
 
-        locations = [list(a) for a in atoms]
-        output = np.dot(np.array(matrix), np.array(locations).transpose())
-        for atom, location in zip(atoms, output.transpose()):
-            atom._location = location
+        from .geometry import transform_coordinates
+        matrix = np.asarray(matrix, dtype=float)
+        if matrix.shape not in ((3, 3), (4, 4)):
+            raise ValueError("{} is not a 3×3 or 4×4 matrix".format(matrix))
+        locations = np.array([a._location for a in atoms]).reshape(-1, 3)
+        locations = transform_coordinates(locations, matrix)
+        Atom._scatter_locations(atoms, locations, trim)
 
 
     @staticmethod
@@ -1027,21 +1742,40 @@ class Atom:
         :param str axis: the axis to rotate around (x, y, or z).
         :param \*atoms: the atoms to rotate."""
 
-        try:
-            axis = [1 if i == "xyz".index(axis) else 0 for i in range(3)]
-        except ValueError:
-            raise ValueError("'{}' is not a valid axis".format(axis))
-        axis = np.asarray(axis)
-        axis = axis / np.sqrt(np.dot(axis, axis))
-        a = np.cos(angle / 2)
-        b, c, d = -axis * np.sin(angle / 2)
-        aa, bb, cc, dd = a * a, b * b, c * c, d * d
-        bc, ad, ac, ab, bd, cd = b * c, a * d, a * c, a * b, b * d, c * d
-        Atom.transform_atoms(np.array([
-         [aa + bb - cc - dd, 2 * (bc + ad), 2 * (bd - ac)],
-         [2 * (bc - ad), aa + cc - bb - dd, 2 * (cd + ab)],
-         [2 * (bd + ac), 2 * (cd - ab), aa + dd - bb - cc]
-        ]), *atoms, **kwargs)
+        from .geometry import rotation_matrix
+        Atom.transform_atoms(rotation_matrix(angle, axis), *atoms, **kwargs)
+
+
+    @staticmethod
+    def _scatter_locations(atoms, locations, trim=None):
+        """Gives each atom its new location from an N×3 array, rounding the
+        whole array first if needed. Each atom's location becomes a row of the
+        array, rather than being copied into.
+
+        :param atoms: the atoms to update.
+        :param numpy.ndarray locations: the new locations, in the same order.
+        :param int trim: if given, the number of decimal places to round to.
+        :raises ValueError: if the atoms' locations are read-only."""
+
+        if atoms and not atoms[0]._location.flags.writeable:
+            raise ValueError("The atoms' locations are read-only")
+        if trim is not None: locations = np.round(locations, trim)
+        for atom, location in zip(atoms, locations):
+            atom._location = location
+        Atom._discard_bonds(atoms)
+
+
+    @staticmethod
+    def _discard_bonds(atoms):
+        """Discards the bonds perceived for the models of some atoms, as they
+        may no longer hold once the atoms have moved.
+
+        :param atoms: the atoms which have moved."""
+
+        hets = {id(atom._het): atom._het for atom in atoms if atom._het}
+        for het in hets.values():
+            model = het.model
+            if model is not None: model._bonds = None
 
 
     @property
@@ -1127,13 +1861,39 @@ class Atom:
         return self._anisotropy
 
 
+    @property
+    def alt_loc(self):
+        """The atom's alternate location code, if it has one. When a file is
+        opened with every conformer kept, this can be used to tell them apart.
+
+        :rtype: ``str``"""
+
+        return self._alt_loc
+
+
     @property
     def bonded_atoms(self):
-        """Returns the atoms this atom is bonded to.
+        """Returns the atoms this atom is bonded to - those it has been bonded
+        to directly, those its model's file lists as bonded to it, and those
+        found by its model's :py:meth:`.Model.perceive_bonds`.
 
-        :rtype: ``set```"""
+        This is a read-only ``frozenset`` rather than a ``set`` - adding atoms
+        to it or removing atoms from it will not change the atom's bonds. Use
+        :py:meth:`.bond` to add bonds.
 
-        return self._bonded_atoms
+        :rtype: ``frozenset``"""
+
+        bonded = set(self._bonded_atoms)
+        model = self._het.model if self._het else None
+        if model is not None:
+            for table in (model._listed_bonds, model._bonds):
+                if not table: continue
+                atoms, positions, _, indptr, neighbours = table
+                n = positions.get(id(self))
+                if n is not None: bonded.update(
+                 atoms[i] for i in neighbours[indptr[n]:indptr[n + 1]].tolist()
+                )
+        return frozenset(bonded)
 
 
     @property
@@ -1146,7 +1906,7 @@ class Atom:
 
         :rtype: ``float``"""
 
-        return self.__data.PERIODIC_TABLE.get(self._element.upper(), 0)
+        return float(self.__data.ELEMENT_MASSES[self._element_code])
     
 
     @property
@@ -1159,7 +1919,7 @@ class Atom:
 
         :rtype: ``float``"""
 
-        return self.__data.COVALENT_RADII.get(self._element.upper(), 0)
+        return float(self.__data.ELEMENT_RADII[self._element_code])
 
 
     @property
@@ -1170,7 +1930,7 @@ class Atom:
 
         :rtype: ``bool``"""
 
-        return self._element.upper() in self.__data.METALS
+        return bool(self.__data.ELEMENT_METALS[self._element_code])
 
 
     @property
@@ -1227,7 +1987,7 @@ class Atom:
 
         return Atom(
          self._element, *self._location, id or self._id, self._name,
-         self._charge, self._bvalue, self._anisotropy
+         self._charge, self._bvalue, self._anisotropy, alt_loc=self._alt_loc
         )
     
 
@@ -1339,13 +2099,13 @@ class Atom:
             _,_,_ = dx
             vector = dx
         except TypeError: vector = (dx, dy, dz)
-        Atom.translate_atoms(vector, self)
-        self.trim(trim)
+        Atom.translate_atoms(vector, self, trim=trim)
 
 
     def transform(self, matrix, trim=12):
-        """Transforms the atom using a 3x3 matrix supplied. This is useful if
-        the :py:meth:`.rotate` method isn't powerful enough for your needs.
+        """Transforms the atom using a 3x3 matrix supplied, or a 4x4
+        homogeneous matrix which also translates it. This is useful if the
+        :py:meth:`.rotate` method isn't powerful enough for your needs.
 
         :param array matrix: A NumPy matrix representing the transformation.\
         You can supply a list of lists if you like and it will be converted to\
@@ -1354,8 +2114,7 @@ class Atom:
         after transforming - the default is 12 decimal places but this can be\
         set to ``None`` if no rounding is to be done."""
 
-        Atom.transform_atoms(matrix, self)
-        self.trim(trim)
+        Atom.transform_atoms(matrix, self, trim=trim)
 
 
     def rotate(self, angle, axis, trim=12):
@@ -1368,8 +2127,7 @@ class Atom:
         after rotating - the default is 12 decimal places but this can be\
         set to ``None`` if no rounding is to be done."""
 
-        Atom.rotate_atoms(angle, axis, self)
-        self.trim(trim)
+        Atom.rotate_atoms(angle, axis, self, trim=trim)
 
 
     def move_to(self, x, y, z):
@@ -1380,6 +2138,7 @@ class Atom:
         :param number z: The atom's new z coordinate."""
 
         self._location[0], self._location[1], self._location[2] = x, y, z
+        Atom._discard_bonds((self,))
 
 
     def trim(self, places):
@@ -1391,12 +2150,14 @@ class Atom:
 
         if places is not None:
             self._location = np.round(self._location, places)
+            Atom._discard_bonds((self,))
 
 
     def bond(self, other):
         """Bonds the atom to some other atom.
 
         :param Atom other: the other atom to bond to."""
-        
-        self._bonded_atoms.add(other)
-        other._bonded_atoms.add(self)
+
+        for atom, partner in ((self, other), (other, self)):
+            if not atom._bonded_atoms: atom._bonded_atoms = set()
+            atom._bonded_atoms.add(partner)
@@ -1,15 +1,36 @@
 """Contains various file handling helper functions."""
 
 import builtins
+import bz2
+import codecs
 import gzip
-import paramiko
-from requests import get
+import io
+import json
+import lzma
+import os
+import tarfile
+import tracemalloc
+import zipfile
+from collections import deque
+from time import perf_counter
 from .mmcif import mmcif_string_to_mmcif_dict, mmcif_dict_to_data_dict
+from .mmcif import index_mmcif_file, read_mmcif_selection
 from .mmtf import mmtf_bytes_to_mmtf_dict, mmtf_dict_to_data_dict
 from .pdb import pdb_string_to_pdb_dict, pdb_dict_to_data_dict
+from .pdb import index_pdb_file, read_pdb_selection, update_atom_locations
 from .data import data_dict_to_file
 
-def open(path, *args, **kwargs):
+CHUNK_SIZE = 1 << 20
+
+COMPRESSIONS = (
+ ("gz", b"\x1f\x8b"), ("bz2", b"BZh"), ("xz", b"\xfd7zXZ\x00"),
+ ("zst", b"\x28\xb5\x2f\xfd")
+)
+
+STRUCTURE_ENDINGS = ("cif", "pdb", "ent", "mmtf")
+
+def open(path, *args, model=None, chains=None, categories=None, index=False,
+         **kwargs):
     """Opens a file at a given path, works out what filetype it is, and parses
     it accordingly.
 
@@ -20,25 +41,457 @@ def open(path, *args, **kwargs):
     This will parse file.pdb as a .pdb file, but only go as far as converting it
     to an atomium data dictionary.
 
-    If the file extension is .gz, the file will be unzipped first.
+        >>> atomium.open('/path/to/file.pdb', alt_loc='occupancy')
+
+    This will resolve alternate locations by picking the most occupied one for
+    each residue, rather than the first.
+
+    If the file is compressed with gzip, bzip2, xz or zstd (which needs the
+    ``zstandard`` package before Python 3.14) it will be decompressed once, as
+    it is read, and then parsed. This is worked out from the file extension
+    (.gz, .bz2, .xz or .zst) or, failing that, from the first few bytes of the
+    file.
+
+    For .pdb and .cif files, you can choose to read just one model, or certain
+    chains, or (for .cif) certain categories. The file is first scanned for the
+    byte offsets of its records, and only the selected ones are then parsed:
+
+        >>> atomium.open('/path/to/file.cif', model=0, chains=['A'], index=True)
+
+    With ``index=True``, this index is saved next to the file, and reused the
+    next time the file is opened, for as long as the file is unchanged.
 
     :param str path: the location of the file.
+    :param int model: if given, the position of the only model to read.
+    :param chains: if given, the IDs of the chains to read.
+    :param categories: if given, the names of the .cif categories to read.
+    :param bool index: if ``True``, the index will be saved next to the file.
     :param bool file_dict: if ``True``, parsing will stop at the file ``dict``.
     :param bool data_dict: if ``True``, parsing will stop at the data ``dict``.
+    :param str alt_loc: how to choose between alternate locations - \
+``'first'``, ``'occupancy'`` or ``'all'``.
+    :param bool ensemble: if ``True``, models with the same topology will \
+share one :py:class:`.Model` and be stored as an :py:class:`.Ensemble`.
+    :param str secondary_structure: when to assign helices and strands from \
+the backbone coordinates - ``'file'``, ``'auto'`` or ``'assign'``.
+    :param function metrics: if given, this will be called with a report of \
+how long each stage of parsing took - see :py:func:`.parse_string`.
     :rtype: ``File``"""
 
-    if str(path)[-3:] == ".gz":
+    if model is not None or chains is not None or categories is not None:
+        if categories is not None and "atom_site" not in categories \
+         and not kwargs.get("file_dict"):
+            raise ValueError(
+             "Categories without atom_site can only be read as a file dict"
+            )
+        filestring = read_selection(path, model, chains, categories, index)
+        return parse_string(filestring, strip_compression(path), *args, **kwargs)
+    path = str(path)
+    with builtins.open(path, "rb") as raw:
+        compression = get_compression(path, raw.peek(6)[:6])
+        f = compressed_file(raw, compression) if compression else raw
+        with f: filestring = read_filestring(f, strip_compression(path))
+    return parse_string(filestring, strip_compression(path), *args, **kwargs)
+
+
+def get_compression(path, head=b""):
+    """Works out how a file is compressed - from its extension if that is
+    .gz, .bz2, .xz or .zst, and otherwise from the magic bytes at the start of
+    the file, if they are given. If the file isn't compressed, ``None`` is
+    returned.
+
+    :param str path: the location of the file.
+    :param bytes head: the first few bytes of the file.
+    :rtype: ``str``"""
+
+    ending = str(path).split(".")[-1]
+    for compression, magic in COMPRESSIONS:
+        if ending == compression: return compression
+    for compression, magic in COMPRESSIONS:
+        if head.startswith(magic): return compression
+
+
+def strip_compression(path):
+    """Removes a compression extension (.gz, .bz2, .xz or .zst) from the end
+    of a path, if it has one.
+
+    :param str path: the path to strip.
+    :rtype: ``str``"""
+
+    path = str(path)
+    for compression, _ in COMPRESSIONS:
+        if path.endswith("." + compression):
+            return path[:-len(compression) - 1]
+    return path
+
+
+def compressed_file(f, compression, mode="rb"):
+    """Wraps an open binary file object so that what is read from it is
+    decompressed as it is read, or so that what is written to it is compressed
+    as it is written. The underlying file object is left open when the wrapper
+    is closed.
+
+    zstd compression needs Python 3.14, or the ``zstandard`` package.
+
+    :param f: the binary file object to wrap.
+    :param str compression: ``'gz'``, ``'bz2'``, ``'xz'`` or ``'zst'``.
+    :param str mode: ``'rb'`` for reading or ``'wb'`` for writing.
+    :rtype: ``io.BufferedIOBase``"""
+
+    if compression == "gz": return gzip.GzipFile(fileobj=f, mode=mode)
+    if compression == "bz2": return bz2.BZ2File(f, mode)
+    if compression == "xz": return lzma.LZMAFile(f, mode)
+    try:
+        from compression.zstd import ZstdFile
+        return ZstdFile(f, mode)
+    except ImportError:
+        import zstandard
+        if mode.startswith("r"):
+            return zstandard.ZstdDecompressor().stream_reader(f, closefd=False)
+        return zstandard.ZstdCompressor().stream_writer(f, closefd=False)
+
+
+def read_filestring(f, path):
+    """Reads the whole contents of an open binary file object, a chunk at a
+    time, so that they can then be parsed. Unless the path is that of an .mmtf
+    file, each chunk is decoded as it is read and written to one string
+    buffer, so that the file is never held as bytes and as a string at once -
+    though if the first chunk can't be decoded, the file is read as bytes. The
+    decoding is incremental, so a character split between two chunks is
+    decoded once both have been read.
+
+    :param f: the binary file object to read.
+    :param str path: the location of the file, without compression extension.
+    :raises ValueError: if the file stops being valid UTF-8 after its first\
+    chunk.
+    :rtype: ``str``"""
+
+    chunk = f.read(CHUNK_SIZE)
+    decoder = io.IncrementalNewlineDecoder(
+     codecs.getincrementaldecoder("utf-8")(), translate=True
+    )
+    buffer = None
+    if not path.endswith(".mmtf"):
         try:
-            with gzip.open(path) as f: filestring = f.read().decode()
-        except:
-            with gzip.open(path, "rt") as f: filestring = f.read()
-        return parse_string(filestring, path[:-3], *args, **kwargs)
-    else:
+            buffer = io.StringIO(decoder.decode(chunk))
+            buffer.seek(0, io.SEEK_END)
+        except UnicodeDecodeError: pass
+    if buffer is None:
+        return b"".join([chunk, *iter(lambda: f.read(CHUNK_SIZE), b"")])
+    offset = len(chunk)
+    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+        pending = len(decoder.getstate()[0])
         try:
-            with builtins.open(path) as f: filestring = f.read()
-        except:
-            with builtins.open(path, "rb") as f: filestring = f.read()
-        return parse_string(filestring, path, *args, **kwargs)
+            buffer.write(decoder.decode(chunk))
+        except UnicodeDecodeError as e:
+            raise ValueError("{} is not valid UTF-8 text at byte {}".format(
+             path, offset - pending + e.start
+            ))
+        offset += len(chunk)
+    buffer.write(decoder.decode(b"", final=True))
+    return buffer.getvalue()
+
+
+def read_selection(path, model=None, chains=None, categories=None,
+                   index=False):
+    """Reads only part of a .pdb or .cif file, using an index of its byte
+    offsets to seek to the selected records, and returns them as a filestring
+    of the same type.
+
+    :param str path: the location of the file.
+    :param int model: if given, the position of the only model to read.
+    :param chains: if given, the IDs of the chains to read.
+    :param categories: if given, the names of the .cif categories to read.
+    :param bool index: if ``True``, the index will be saved next to the file.
+    :raises ValueError: if the file isn't a .pdb or .cif file, or doesn't have\
+    the selected model or chains.
+    :rtype: ``str``"""
+
+    path = str(path)
+    compression = get_compression(path)
+    filetype = strip_compression(path).split(".")[-1]
+    if filetype not in ("pdb", "cif") or \
+     (filetype == "pdb" and categories is not None):
+        raise ValueError("Cannot select from {} by byte offset".format(path))
+    with builtins.open(path, "rb") as raw, (
+     compressed_file(raw, compression) if compression else raw
+    ) as f:
+        index_func = index_pdb_file if filetype == "pdb" else index_mmcif_file
+        file_index = get_index(path, f, index_func, save=index)
+        runs = group_index_runs(file_index)
+        check_selection(runs, model, chains)
+        if filetype == "pdb":
+            return read_pdb_selection(f, file_index, runs, model, chains)
+        return read_mmcif_selection(
+         f, file_index, runs, model, chains, categories
+        )
+
+
+def group_index_runs(index):
+    """Groups the atom runs of a .pdb or .cif index by model, so that the runs
+    of any one model can be looked up by its position without scanning the
+    whole index. A list is returned, with one list of runs per model, in model
+    order.
+
+    :param dict index: the index of the file.
+    :rtype: ``list``"""
+
+    models = {}
+    for run in index["atoms"]:
+        models.setdefault(run[0], []).append(run)
+    return [models[number] for number in sorted(models)]
+
+
+def check_selection(runs, model=None, chains=None):
+    """Checks that the model and chains selected from a file are in its index.
+
+    :param list runs: the index's atom runs grouped by model.
+    :param int model: if given, the position of the only model to read.
+    :param chains: if given, the IDs of the chains to read.
+    :raises ValueError: if the model or any of the chains isn't there."""
+
+    if model is not None and not -len(runs) <= model < len(runs):
+        raise ValueError("There is no model {} - the file has {}".format(
+         model, len(runs)
+        ))
+    if chains is not None:
+        models = runs if model is None else [runs[model]]
+        found = {run[1] for model_runs in models for run in model_runs}
+        missing = [chain for chain in chains if chain not in found]
+        if missing:
+            raise ValueError("There is no chain {} in the {}".format(
+             ", ".join(missing), "file" if model is None else "model"
+            ))
+
+
+def get_index(path, f, index_func, save=False):
+    """Gets the byte offset index of a file. If ``save`` is ``True``, an index
+    previously saved next to the file will be used if the file hasn't changed
+    since, and otherwise the new index will be saved there.
+
+    :param str path: the location of the file.
+    :param f: the open binary file object to index.
+    :param function index_func: the function which creates the index.
+    :param bool save: if ``True``, the index will be saved and reused.
+    :rtype: ``dict``"""
+
+    stat = os.stat(path)
+    signature, index_path = [stat.st_size, stat.st_mtime_ns], path + ".index"
+    if save and os.path.exists(index_path):
+        with builtins.open(index_path) as index_file:
+            index = json.load(index_file)
+        if index.get("file") == signature: return index
+    index = index_func(f)
+    index["file"] = signature
+    if save:
+        with builtins.open(index_path, "w") as index_file:
+            json.dump(index, index_file)
+    return index
+
+
+def stream(path, start=0, stop=None, step=1, alt_loc="first"):
+    """Streams the models of a multi-model .pdb file - such as a trajectory -
+    one frame at a time.
+
+    The topology is parsed once, from the header and the first MODEL block,
+    and the same :py:class:`.Model` is yielded for every frame, with its atoms
+    moved in place to that frame's coordinates. The MODEL blocks are located
+    by byte offset first, so frames outside the requested range are never
+    read. Every frame is assumed to have the same atoms, in the same order, as
+    the first, and atoms are matched by the order of their records, so the
+    serial numbers of later frames are never read. The file can be compressed,
+    as with :py:func:`.open`, though seeking through a compressed file is
+    slower.
+
+    For example:
+
+        >>> for model in atomium.stream('/path/to/file.pdb', step=10):
+        ...     print(model.center_of_mass)
+
+    This will visit every tenth frame.
+
+    :param str path: the location of the file.
+    :param int start: the first frame to yield.
+    :param int stop: the frame to stop before, if not the end.
+    :param int step: the stride between frames.
+    :param str alt_loc: how to choose between alternate locations - \
+``'first'``, ``'occupancy'`` or ``'all'``.
+    :rtype: ``Model``"""
+
+    path = str(path)
+    compression = get_compression(path)
+    with builtins.open(path, "rb") as raw, (
+     compressed_file(raw, compression) if compression else raw
+    ) as f:
+        index = index_pdb_file(f)
+        runs = group_index_runs(index)
+        topology = read_pdb_selection(f, index, runs, model=0)
+        model = parse_string(
+         topology, strip_compression(path), alt_loc=alt_loc
+        ).model
+        atoms = {atom.id: atom for atom in model.atoms()}
+        block = read_pdb_selection(f, index, runs, model=0, other=False)
+        atoms = [atoms.get(int(line[6:11])) for line in pdb_string_to_pdb_dict(
+         block
+        ).get("MODEL", [[]])[0] if line[:6] in ("ATOM  ", "HETATM")]
+        for frame in range(len(runs))[start:stop:step]:
+            block = read_pdb_selection(f, index, runs, model=frame, other=False)
+            model_lines = pdb_string_to_pdb_dict(block).get("MODEL", [[]])[0]
+            update_atom_locations(atoms, model_lines)
+            model._bonds = None
+            yield model
+
+
+def archive_members(path, codes=None):
+    """Lists the structure files in a .tar or .zip archive (which can itself
+    be compressed, as in .tar.gz), or in a directory tree such as a PDB mirror
+    divided into ``xx/`` subdirectories. Only the member headers are read.
+
+    :param str path: the location of the archive or directory.
+    :param codes: if given, only files for these PDB codes are listed.
+    :rtype: ``list``"""
+
+    return [name for name, _ in read_archive(path, codes=codes, read=False)]
+
+
+def open_archive(path, *args, codes=None, workers=1, **kwargs):
+    """Opens the structure files in a .tar or .zip archive, or in a directory
+    tree such as a PDB mirror, one at a time, and yields a ``(name, File)``
+    tuple for each.
+
+    The archive is read as a stream, member by member, and the members which
+    aren't wanted are skipped without being parsed. Each member is
+    decompressed once (if it is compressed), and parsed according to its
+    extension, just as :py:func:`.open` would.
+
+    For example:
+
+        >>> for name, f in atomium.open_archive('/pdb/snapshot.tar', workers=4):
+        ...     print(name, f.model.mass)
+
+    With more than one worker, the members are decompressed and parsed in a
+    pool of processes, while the archive is read in this one - the files are
+    still yielded in archive order.
+
+    :param str path: the location of the archive or directory.
+    :param codes: if given, only files for these PDB codes are opened.
+    :param int workers: the number of processes to parse with.
+    :param bool file_dict: if ``True``, parsing will stop at the file ``dict``.
+    :param bool data_dict: if ``True``, parsing will stop at the data ``dict``.
+    :param str alt_loc: how to choose between alternate locations - \
+``'first'``, ``'occupancy'`` or ``'all'``.
+    :param bool ensemble: if ``True``, models with the same topology will \
+share one :py:class:`.Model` and be stored as an :py:class:`.Ensemble`.
+    :param str secondary_structure: when to assign helices and strands from \
+the backbone coordinates - ``'file'``, ``'auto'`` or ``'assign'``.
+    :rtype: ``tuple``"""
+
+    jobs = ((name, data, args, kwargs) for name, data in read_archive(
+     path, codes=codes
+    ))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for job in jobs:
+                pending.append((job[0], executor.submit(parse_member, job)))
+                if len(pending) > workers * 2:
+                    name, future = pending.popleft()
+                    yield name, future.result()
+            for name, future in pending:
+                yield name, future.result()
+    else:
+        for job in jobs: yield job[0], parse_member(job)
+
+
+def open_mirror(directory, code, *args, **kwargs):
+    """Opens the file for a PDB code from a local mirror of the PDB, in which
+    files are divided into subdirectories by the middle two characters of
+    their codes - so that 1LOL would be at ``lo/1lol.cif.gz`` or
+    ``lo/pdb1lol.ent.gz``, say.
+
+    :param str directory: the location of the mirror.
+    :param str code: the PDB code to open.
+    :raises ValueError: if the mirror has no file for the code.
+    :rtype: ``File``"""
+
+    code = code.lower()
+    folder = os.path.join(directory, code[1:3])
+    names = sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+    for name in names:
+        if member_code(name) == code:
+            return open(os.path.join(folder, name), *args, **kwargs)
+    raise ValueError("Could not find {} in {}".format(code, directory))
+
+
+def read_archive(path, codes=None, read=True):
+    """Reads the structure files in a .tar or .zip archive, or in a directory
+    tree, in order, and yields a ``(name, bytes)`` tuple for each. The bytes
+    are as stored in the archive, so a .gz member is still compressed.
+
+    :param str path: the location of the archive or directory.
+    :param codes: if given, only files for these PDB codes are read.
+    :param bool read: if ``False``, ``None`` is given in place of the bytes.
+    :rtype: ``tuple``"""
+
+    path = str(path)
+    codes = None if codes is None else {code.lower() for code in codes}
+    def wanted(name):
+        code = member_code(name)
+        return code is not None and (codes is None or code in codes)
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(filter(wanted, files)):
+                location, data = os.path.join(root, name), None
+                if read:
+                    with builtins.open(location, "rb") as f: data = f.read()
+                yield os.path.relpath(location, path), data
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and wanted(info.filename):
+                    yield info.filename, (
+                     archive.read(info) if read else None
+                    )
+    else:
+        with tarfile.open(path, "r|*") as archive:
+            for member in archive:
+                if member.isfile() and wanted(member.name):
+                    yield member.name, (
+                     archive.extractfile(member).read() if read else None
+                    )
+
+
+def member_code(name):
+    """Gets the PDB code from the name of a structure file, such as
+    ``1lol.cif.gz`` or ``pdb1lol.ent.gz``. If the name isn't that of a
+    structure file, ``None`` is returned.
+
+    :param str name: the name of the file.
+    :rtype: ``str``"""
+
+    name = strip_compression(os.path.basename(name))
+    if "." not in name or name.split(".")[-1] not in STRUCTURE_ENDINGS:
+        return None
+    code = name.rsplit(".", 1)[0].lower()
+    return code[3:] if code.startswith("pdb") and len(code) > 4 else code
+
+
+def parse_member(job):
+    """Decompresses (if needed) and parses one member of an archive - one
+    step of :py:func:`.open_archive`.
+
+    :param tuple job: the member's name and bytes, and the parsing arguments.
+    :rtype: ``File``"""
+
+    name, data, args, kwargs = job
+    path = strip_compression(name)
+    compression = get_compression(name, data[:6])
+    with io.BytesIO(data) as raw:
+        f = compressed_file(raw, compression) if compression else raw
+        with f: filestring = read_filestring(f, path)
+    return parse_string(filestring, path, *args, **kwargs)
 
 
 def fetch(code, *args, **kwargs):
@@ -59,6 +512,14 @@ def fetch(code, *args, **kwargs):
     :param str code: the file to fetch.
     :param bool file_dict: if ``True``, parsing will stop at the file ``dict``.
     :param bool data_dict: if ``True``, parsing will stop at the data ``dict``.
+    :param str alt_loc: how to choose between alternate locations - \
+``'first'``, ``'occupancy'`` or ``'all'``.
+    :param bool ensemble: if ``True``, models with the same topology will \
+share one :py:class:`.Model` and be stored as an :py:class:`.Ensemble`.
+    :param str secondary_structure: when to assign helices and strands from \
+the backbone coordinates - ``'file'``, ``'auto'`` or ``'assign'``.
+    :param function metrics: if given, this will be called with a report of \
+how long each stage of parsing took - see :py:func:`.parse_string`.
     :raises ValueError: if no file is found.
     :rtype: ``File``"""
 
@@ -69,7 +530,8 @@ def fetch(code, *args, **kwargs):
     else:
         if "." not in code: code += ".cif"
         url = "https://files.rcsb.org/view/" + code.lower()
-    response = get(url, stream=True)
+    import requests
+    response = requests.get(url, stream=True)
     if response.status_code == 200:
         text = response.content if code.endswith(".mmtf") else response.text
         return parse_string(text, code, *args, **kwargs)
@@ -85,8 +547,17 @@ def fetch_over_ssh(hostname, username, path, *args, password=None, **kwargs):
     :param str password: if needed, the password to use.
     :param bool file_dict: if ``True``, parsing will stop at the file ``dict``.
     :param bool data_dict: if ``True``, parsing will stop at the data ``dict``.
+    :param str alt_loc: how to choose between alternate locations - \
+``'first'``, ``'occupancy'`` or ``'all'``.
+    :param bool ensemble: if ``True``, models with the same topology will \
+share one :py:class:`.Model` and be stored as an :py:class:`.Ensemble`.
+    :param str secondary_structure: when to assign helices and strands from \
+the backbone coordinates - ``'file'``, ``'auto'`` or ``'assign'``.
+    :param function metrics: if given, this will be called with a report of \
+how long each stage of parsing took - see :py:func:`.parse_string`.
     :rtype: ``File``"""
 
+    import paramiko
     client = paramiko.SSHClient()
     try:
         client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -104,7 +575,9 @@ def fetch_over_ssh(hostname, username, path, *args, password=None, **kwargs):
     return parse_string(filestring, path, *args, **kwargs)
 
 
-def parse_string(filestring, path, file_dict=False, data_dict=False):
+def parse_string(filestring, path, file_dict=False, data_dict=False,
+                 alt_loc="first", ensemble=False, metrics=None,
+                 secondary_structure="auto"):
     """Takes a filestring and parses it in the appropriate way. You must provide
     the string to parse itself, and some other string that ends in either .cif,
     .mmtf, or .cif - that will determine how the file is parsed.
@@ -112,22 +585,98 @@ def parse_string(filestring, path, file_dict=False, data_dict=False):
     (If this cannot be inferred from the path string, atomium will guess based
     on the filestring contents.)
 
+    If a ``metrics`` function is given, it will be called once parsing is
+    finished with a ``dict`` describing the work done. Its ``"stages"`` give
+    the duration in seconds of each stage that was run (``"file_dict"``,
+    ``"data_dict"`` and ``"build"``) along with, if ``tracemalloc`` is
+    tracing, the bytes allocated (and still held) and the peak bytes allocated
+    during it. (Before Python 3.9 the peak can't be reset between stages, so a
+    stage which doesn't raise the overall peak reports its allocation.) Its
+    ``"counts"`` give the numbers of models, chains, residues, ligands, waters
+    and atoms in the file. Without a ``metrics`` function, none of this is
+    measured.
+
     :param str filestring: the contents of some file.
     :param str path: the filename of the file of origin.
     :param bool file_dict: if ``True``, parsing will stop at the file ``dict``.
     :param bool data_dict: if ``True``, parsing will stop at the data ``dict``.
+    :param str alt_loc: how to choose between alternate locations - \
+``'first'``, ``'occupancy'`` or ``'all'``.
+    :param bool ensemble: if ``True``, models with the same topology will \
+share one :py:class:`.Model` and be stored as an :py:class:`.Ensemble`.
+    :param str secondary_structure: when to assign helices and strands from \
+the backbone coordinates - ``'file'``, ``'auto'`` or ``'assign'``.
+    :param function metrics: if given, this will be called with a report of \
+how long each stage of parsing took.
     :rtype: ``File``"""
 
+    stages, counts = None if metrics is None else {}, None
     file_func, data_func = get_parse_functions(filestring, path)
-    parsed = file_func(filestring)
+    parsed = run_stage(stages, "file_dict", file_func, filestring)
     if not file_dict:
-        parsed = data_func(parsed)
+        parsed = run_stage(stages, "data_dict", data_func, parsed)
+        if metrics: counts = count_data_dict(parsed)
         if not data_dict:
             filetype = data_func.__name__.split("_")[0].replace("mmc", "c")
-            parsed = data_dict_to_file(parsed, filetype)
+            parsed = run_stage(
+             stages, "build", data_dict_to_file, parsed, filetype,
+             alt_loc=alt_loc, ensemble=ensemble,
+             secondary_structure=secondary_structure
+            )
+    if metrics:
+        metrics({"path": path, "stages": stages, "counts": counts})
     return parsed
 
 
+def run_stage(stages, name, func, *args, **kwargs):
+    """Runs one stage of parsing. If a stages ``dict`` is given, the stage's
+    duration will be recorded in it, along with the memory allocated during it
+    if ``tracemalloc`` is tracing.
+
+    :param dict stages: the stage measurements to update, if any.
+    :param str name: the name of the stage.
+    :param function func: the function which performs the stage.
+    :returns: whatever the function returns."""
+
+    if stages is None: return func(*args, **kwargs)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        if hasattr(tracemalloc, "reset_peak"): tracemalloc.reset_peak()
+        before, old_peak = tracemalloc.get_traced_memory()
+    start = perf_counter()
+    result = func(*args, **kwargs)
+    stages[name] = {"seconds": perf_counter() - start}
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        stages[name]["allocated"] = current - before
+        stages[name]["peak"] = peak - before if peak > old_peak \
+         else max(current - before, 0)
+    return result
+
+
+def count_data_dict(data_dict):
+    """Counts the structures described in a data dictionary.
+
+    :param dict data_dict: the data dictionary to count.
+    :rtype: ``dict``"""
+
+    counts = dict.fromkeys(
+     ("models", "chains", "residues", "ligands", "waters", "atoms"), 0
+    )
+    for model in data_dict["models"]:
+        counts["models"] += 1
+        counts["chains"] += len(model["polymer"])
+        counts["ligands"] += len(model["non-polymer"])
+        counts["waters"] += len(model["water"])
+        for chain in model["polymer"].values():
+            counts["residues"] += len(chain["residues"])
+            for residue in chain["residues"].values():
+                counts["atoms"] += len(residue["atoms"])
+        for key in ("non-polymer", "water"):
+            for het in model[key].values(): counts["atoms"] += len(het["atoms"])
+    return counts
+
+
 def get_parse_functions(filestring, path):
     """Works out which parsing functions to use for a given filestring and
     returns them.
@@ -141,11 +690,12 @@ def get_parse_functions(filestring, path):
 
     if "." in path:
         ending = path.split(".")[-1]
-        if ending in ("mmtf", "cif", "pdb"):
+        if ending in STRUCTURE_ENDINGS:
             return {
              "cif": (mmcif_string_to_mmcif_dict, mmcif_dict_to_data_dict),
              "mmtf": (mmtf_bytes_to_mmtf_dict, mmtf_dict_to_data_dict),
-             "pdb": (pdb_string_to_pdb_dict, pdb_dict_to_data_dict)
+             "pdb": (pdb_string_to_pdb_dict, pdb_dict_to_data_dict),
+             "ent": (pdb_string_to_pdb_dict, pdb_dict_to_data_dict)
             }[ending]
     if isinstance(filestring, bytes):
         return (mmtf_bytes_to_mmtf_dict, mmtf_dict_to_data_dict)
@@ -156,11 +706,19 @@ def get_parse_functions(filestring, path):
 
 
 def save(filestring, path):
-    """Saves a filestring to file.
+    """Saves a filestring to file. If the path ends in .gz, .bz2, .xz or .zst,
+    the file will be compressed accordingly as it is written.
 
     :param str filestring: the string to save.
     :param str path: the place to save it."""
-    
+
+    compression = get_compression(path)
+    if compression:
+        if isinstance(filestring, str): filestring = filestring.encode()
+        with builtins.open(path, "wb") as raw:
+            with compressed_file(raw, compression, "wb") as f:
+                f.write(filestring)
+        return
     try:
         with builtins.open(path, "w") as f: f.write(filestring)
     except:
@@ -349,6 +349,18 @@ class ModelDictTests(DataDictTest):
             self.assertEqual(d["models"][1]["polymer"]["A"]["residues"]["A.199"]["atoms"][1 if e == "pdb" else 1828]["x"], 34.064)
 
 
+    def test_1grm_mmtf_data_dict_models(self):
+        d = atomium.open("tests/integration/files/1grm.mmtf", data_dict=True)
+        self.assertEqual(len(d["models"]), 5)
+        for model in d["models"]:
+            self.assertEqual(list(model["polymer"]), ["A", "B"])
+            self.assertEqual(len(model["polymer"]["B"]["residues"]), 16)
+        self.assertEqual(d["models"][0]["polymer"]["B"]["strands"][0][0], "B.2")
+        self.assertEqual(d["models"][2]["polymer"]["B"]["strands"][0][0], "B.1")
+        atoms = [list(m["polymer"]["A"]["residues"]["A.1"]["atoms"]) for m in d["models"]]
+        self.assertEqual(len({tuple(ids) for ids in atoms}), 5)
+
+
     def test_1msh_data_dict_model(self):
         data_dicts = self.open("1msh")
         for d in data_dicts.values():
@@ -176,3 +176,79 @@ class PdbFileSavingTests(SavingTest):
         model = f.generate_assembly(5)
         with self.assertWarns(Warning):
             model.save("tests/integration/files/assembly.pdb")
+
+
+
+class CompressedFileSavingTests(SavingTest):
+
+    def test_can_save_compressed_1lol(self):
+        for e in ["pdb.gz", "pdb.bz2", "mmtf.xz"]:
+            f = atomium.open("tests/integration/files/1lol." + e.split(".")[0])
+            f.model.save("tests/integration/files/saved_1lol." + e)
+            f2 = atomium.open("tests/integration/files/saved_1lol." + e)
+            self.assertEqual(f2.filetype, e.split(".")[0])
+            self.assertEqual(f.model, f2.model)
+
+
+    def test_compression_detected_from_contents(self):
+        f = atomium.open("tests/integration/files/1lol.pdb")
+        f.model.save("tests/integration/files/saved_1lol.pdb.xz")
+        os.rename(
+         "tests/integration/files/saved_1lol.pdb.xz",
+         "tests/integration/files/saved_1lol"
+        )
+        f2 = atomium.open("tests/integration/files/saved_1lol")
+        self.assertEqual(f2.filetype, "pdb")
+        self.assertEqual(f.model, f2.model)
+
+
+
+class HetSavingTests(SavingTest):
+
+    def test_can_save_assembly_with_chainless_ligands(self):
+        lines = [
+         "SEQRES   1 A    2  ALA ALA",
+         "REMARK 350",
+         "REMARK 350 BIOMOLECULE: 1",
+         "REMARK 350 APPLY THE FOLLOWING TO CHAINS: A, B, C",
+         "REMARK 350   BIOMT1   1  1.000000  0.000000  0.000000       50.00000",
+         "REMARK 350   BIOMT2   1  0.000000  1.000000  0.000000        0.00000",
+         "REMARK 350   BIOMT3   1  0.000000  0.000000  1.000000        0.00000",
+         "ATOM      1  N   ALA A   1       0.000   0.000   0.000  1.00  0.00           N",
+         "ATOM      2  CA  ALA A   1       1.458   0.000   0.000  1.00  0.00           C",
+         "ATOM      3  N   ALA A   2       3.000   0.000   0.000  1.00  0.00           N",
+         "ATOM      4  CA  ALA A   2       4.458   0.000   0.000  1.00  0.00           C",
+         "TER       5      ALA A   2",
+         "HETATM    6  C1  XYZ B   1      10.000   0.000   0.000  1.00  0.00           C",
+         "HETATM    7  O   HOH C   2      15.000   0.000   0.000  1.00  0.00           O",
+         "END"
+        ]
+        with open("tests/integration/files/chainless.pdb", "w") as f:
+            f.write("\n".join(line.ljust(80) for line in lines) + "\n")
+        f = atomium.open("tests/integration/files/chainless.pdb")
+        model = f.generate_assembly(1)
+        self.assertIsNone(model.ligand().chain)
+        self.assertIsNone(model.water().chain)
+        for e in ["cif", "mmtf", "pdb"]:
+            model.save("tests/integration/files/saved_chainless." + e)
+            model2 = atomium.open(
+             "tests/integration/files/saved_chainless." + e
+            ).model
+            self.assertEqual(len(model2.atoms()), 6)
+            self.assertEqual(model2.chain().id, "A")
+            self.assertEqual(model2.ligand().id, "B.1")
+            self.assertEqual(model2.ligand().name, "XYZ")
+            self.assertEqual(model2.ligand().atom().location, (60, 0, 0))
+            self.assertEqual(model2.water().id, "C.2")
+
+
+    def test_can_save_het_with_no_residue_number(self):
+        ligand = atomium.Ligand(atomium.Atom(
+         "C", 1.5, 2.5, 3.5, 1, "C1", 0, 0, [0] * 6
+        ), id="B..", name="XYZ", internal_id="B")
+        for e in ["cif", "mmtf", "pdb"]:
+            atomium.Model(ligand).save("tests/integration/files/saved_het." + e)
+            model = atomium.open("tests/integration/files/saved_het." + e).model
+            self.assertEqual(model.ligand().id, "B..")
+            self.assertEqual(model.ligand().name, "XYZ")
+            self.assertEqual(model.atom().location, (1.5, 2.5, 3.5))
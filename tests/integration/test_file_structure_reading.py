@@ -1,5 +1,12 @@
 from datetime import date
+import gzip
 import math
+import os
+import shutil
+import tarfile
+import tempfile
+import tracemalloc
+import zipfile
 import atomium
 from unittest import TestCase
 
@@ -642,6 +649,117 @@ class FileReadingTests(TestCase):
             self.assertEqual(len(all_atoms), 18270)
 
 
+    def test_5xme_ensemble(self):
+        for e in ["cif", "mmtf", "pdb"]:
+            f = atomium.open("tests/integration/files/5xme." + e, ensemble=True)
+            ensemble = f.ensemble
+            self.assertEqual(len(ensemble), 10)
+            self.assertEqual(f.models, [ensemble.model])
+            self.assertEqual(ensemble.coordinates.shape, (10, 1827, 3))
+            self.assertEqual(len(f.model.atoms()), 1827)
+            atom = f.model.chain()[0].atom(name="N")
+            self.assertEqual(atom.location[0], 33.969)
+            f.model.perceive_bonds()
+            self.assertIsNotNone(f.model.bonds)
+            ensemble.frame = 3
+            self.assertEqual(atom.location[0], 36.023)
+            self.assertIsNone(f.model.bonds)
+            for model in ensemble:
+                self.assertIs(model, f.model)
+            self.assertEqual(ensemble.frame, 9)
+            self.assertEqual(atom.location[0], 37.677)
+            self.assertEqual(ensemble.center_of_mass.shape, (10, 3))
+            self.assertEqual(ensemble.radius_of_gyration.shape, (10,))
+            rmsds = ensemble.rmsd()
+            self.assertEqual(rmsds[0], 0)
+            self.assertAlmostEqual(rmsds[1], 1.604, delta=0.001)
+            d = atomium.open("tests/integration/files/5xme." + e, data_dict=True)
+            d["models"][1]["polymer"]["A"]["residues"].popitem()
+            f = atomium.data.data_dict_to_file(d, e, ensemble=True)
+            self.assertIsNone(f.ensemble)
+            self.assertEqual(len(f.models), 10)
+
+
+    def test_5xme_stream(self):
+        x_values = [
+         33.969, 34.064, 37.369, 36.023, 35.245,
+         35.835, 37.525, 35.062, 36.244, 37.677
+        ]
+        x, models = [], set()
+        for model in atomium.stream("tests/integration/files/5xme.pdb"):
+            self.assertEqual(len(model.atoms()), 1827)
+            x.append(model.chain()[0].atom(name="N").location[0])
+            models.add(model)
+        self.assertEqual(x, x_values)
+        self.assertEqual(len(models), 1)
+        models = list(atomium.stream(
+         "tests/integration/files/5xme.pdb", start=1, stop=8, step=3
+        ))
+        self.assertEqual(len(models), 3)
+        self.assertEqual(len(set(models)), 1)
+        atom = models[0].chain()[0].atom(name="N")
+        self.assertEqual(atom.location[0], x_values[7])
+        x = []
+        for model in atomium.stream("tests/integration/files/5xme.pdb", step=4):
+            x.append(model.chain()[0].atom(name="N").location[0])
+        self.assertEqual(x, x_values[::4])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "5xme.pdb.gz")
+            with open("tests/integration/files/5xme.pdb", "rb") as f:
+                with gzip.open(path, "wb") as g: g.write(f.read())
+            x = [model.chain()[0].atom(name="N").location[0]
+             for model in atomium.stream(path, start=2)]
+            self.assertEqual(x, x_values[2:])
+            path = os.path.join(directory, "5xme.pdb")
+            with open("tests/integration/files/5xme.pdb") as f:
+                lines = f.read().splitlines()
+            first_model = [l[:6] for l in lines].index("ENDMDL")
+            with open(path, "w") as f:
+                f.write("\n".join(line[:6] + "A0000" + line[11:]
+                 if n > first_model and line[:6] in ("ATOM  ", "HETATM")
+                  else line for n, line in enumerate(lines)))
+            x = [model.chain()[0].atom(name="N").location[0]
+             for model in atomium.stream(path)]
+            self.assertEqual(x, x_values)
+
+
+    def test_selections(self):
+        for e in ["cif", "pdb"]:
+            f = atomium.open("tests/integration/files/5xme." + e, model=3)
+            self.assertEqual(len(f.models), 1)
+            atom = f.model.chain()[0].atom(name="N")
+            self.assertEqual(atom.location[0], 36.023)
+            full = atomium.open("tests/integration/files/1lol." + e)
+            f = atomium.open("tests/integration/files/1lol." + e, chains=["B"])
+            self.assertEqual(f.code, "1LOL")
+            self.assertEqual([c.id for c in f.model.chains()], ["B"])
+            self.assertEqual(len(f.model.ligands()), 2)
+            self.assertEqual(len(f.model.atoms()), len([
+             a for a in full.model.atoms() if a.chain and a.chain.id == "B"
+            ]))
+        d = atomium.open(
+         "tests/integration/files/1lol.cif", categories=["entry"], file_dict=True
+        )
+        self.assertEqual(d, {"entry": [{"id": "1LOL"}]})
+        with self.assertRaises(ValueError):
+            atomium.open("tests/integration/files/1lol.mmtf", model=0)
+        for e in ["cif", "pdb"]:
+            with self.assertRaisesRegex(ValueError, "model 5"):
+                atomium.open("tests/integration/files/1lol." + e, model=5)
+            with self.assertRaisesRegex(ValueError, "chain Z"):
+                atomium.open("tests/integration/files/1lol." + e, chains=["Z"])
+        with self.assertRaisesRegex(ValueError, "atom_site"):
+            atomium.open("tests/integration/files/1lol.cif", categories=["entry"])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "5xme.pdb")
+            shutil.copy("tests/integration/files/5xme.pdb", path)
+            f = atomium.open(path, model=-1, index=True)
+            self.assertTrue(os.path.exists(path + ".index"))
+            self.assertEqual(f.model.chain()[0].atom(name="N").location[0], 37.677)
+            f = atomium.open(path, model=1, index=True)
+            self.assertEqual(f.model.chain()[0].atom(name="N").location[0], 34.064)
+
+
     def test_1cbn(self):
         for e in ["cif", "mmtf", "pdb"]:
             f = atomium.open("tests/integration/files/1cbn." + e)
@@ -655,6 +773,404 @@ class FileReadingTests(TestCase):
                     self.assertEqual(len(residue.atoms(name=name)), 1)
 
 
+    def test_1cbn_element_properties(self):
+        model = atomium.open("tests/integration/files/1cbn.pdb").model
+        atoms = model.atoms()
+        self.assertAlmostEqual(model.mass, sum(a.mass for a in atoms), delta=1e-6)
+        self.assertEqual(
+         model.formula, {"H": 311, "C": 202, "O": 66, "N": 55, "S": 6}
+        )
+        self.assertEqual(model.charge, 0)
+        atom = atomium.structures.Atom("fe", 1, 2, 3, 1, "FE", 0, 0, [0] * 6)
+        self.assertEqual(atom.mass, 55.845)
+        self.assertEqual(atom.covalent_radius, 1.32)
+        self.assertTrue(atom.is_metal)
+        self.assertEqual(atom.element, "fe")
+
+
+    def test_1lol_contacts(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        contacts = model.contacts(4)
+        for atom in list(model.atoms())[::50]:
+            self.assertEqual(
+             {a for pair in contacts if atom in pair for a in pair} - {atom},
+             atom.nearby_atoms(4)
+            )
+        self.assertEqual(model.contacts(4, tiles=7), contacts)
+        self.assertEqual(model.contacts(4, workers=2), contacts)
+        chains = model.contacts(4, level="chain")
+        self.assertEqual(chains, {frozenset(model.chains())})
+        hets = model.contacts(4, level="het")
+        residue = model.residue("A.11")
+        self.assertEqual(
+         {h for pair in hets if residue in pair for h in pair} - {residue},
+         residue.nearby_hets(4)
+        )
+        with self.assertRaises(ValueError):
+            model.contacts(4, level="molecule")
+
+
+    def test_1lol_homogeneous_transforms(self):
+        from atomium.geometry import (
+         homogeneous_matrix, rotation_matrix, transform_coordinates
+        )
+        model1 = atomium.open("tests/integration/files/1lol.cif").model
+        model2 = atomium.open("tests/integration/files/1lol.cif").model
+        model1.rotate(0.5, "y", trim=None)
+        model1.translate(1, -2, 3, trim=None)
+        model2.transform(homogeneous_matrix(
+         rotation_matrix(0.5, "y"), [1, -2, 3]
+        ), trim=None)
+        atoms2 = {atom.id: atom for atom in model2.atoms()}
+        for atom in model1.atoms():
+            for a, b in zip(atom.location, atoms2[atom.id].location):
+                self.assertAlmostEqual(a, b, delta=0.000000001)
+        model2.trim(1)
+        self.assertEqual(model2.atom(1).location, tuple(
+         round(n, 1) for n in model1.atom(1).location
+        ))
+        atoms = list(model1.atoms())
+        coordinates = [atom.location for atom in atoms]
+        matrices = homogeneous_matrix(
+         [rotation_matrix(n, "z") for n in (0, 1, 2)], [[0, 0, 0]] * 3
+        )
+        stack = transform_coordinates(coordinates, matrices)
+        self.assertEqual(stack.shape, (3, len(atoms), 3))
+        model1.rotate(2, "z", trim=None)
+        for atom, location in zip(atoms, stack[2]):
+            for a, b in zip(atom.location, location):
+                self.assertAlmostEqual(a, b, delta=0.000000001)
+        with self.assertRaises(ValueError):
+            model1.transform([[1, 0], [0, 1]])
+
+
+    def test_1lol_poses(self):
+        from atomium.geometry import rotation_matrix
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        ligand = model.ligand(name="XMP", chain__id="A")
+        locations = {atom: atom.location for atom in ligand.atoms()}
+        rotations = [rotation_matrix(n / 2, "xyz"[n % 3]) for n in range(12)]
+        rotations[0] = [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
+        translations = [[0, 0, 0]] * 11 + [[100, 0, 0]]
+        atoms, coordinates = ligand.pose_coordinates(rotations, translations)
+        self.assertEqual(coordinates.shape, (12, len(ligand.atoms()), 3))
+        for atom, location in zip(atoms, coordinates[0]):
+            for a, b in zip(atom.location, location):
+                self.assertAlmostEqual(a, b, delta=0.000000001)
+        others = model.atoms() - ligand.atoms()
+        counts = model.clash_counts(coordinates, 3, exclude=ligand)
+        self.assertEqual(counts[0], sum(
+         1 for atom in atoms for other in others if atom.distance_to(other) < 3
+        ))
+        self.assertEqual(counts[11], 0)
+        poses = ligand.generate_poses(rotations, translations, keep=2,
+         score=lambda c: model.clash_counts(c, 3, exclude=ligand))
+        self.assertEqual([pose[0] for pose in poses], [0, sorted(counts)[1]])
+        self.assertAlmostEqual(
+         poses[0][1].center_of_mass[0], ligand.center_of_mass[0] + 100,
+         delta=0.000001
+        )
+        self.assertEqual(locations, {a: a.location for a in ligand.atoms()})
+        self.assertEqual(len(ligand.generate_poses(rotations[:3])), 3)
+        residue = model.residue("A.11")
+        poses = residue.generate_poses(rotations[:2])
+        self.assertEqual(poses[1][1].index, residue.index)
+        atom = poses[0][1].atom(residue.atoms().pop().id)
+        self.assertNotIn(atom, residue.atoms())
+        poses = model.generate_poses(rotations[:1], [[5, 0, 0]])
+        self.assertEqual(len(poses[0][1].atoms()), len(model.atoms()))
+        self.assertAlmostEqual(
+         poses[0][1].center_of_mass[0], model.center_of_mass[0] + 5,
+         delta=0.000001
+        )
+        with self.assertRaises(ZeroDivisionError):
+            ligand.generate_poses(rotations, score=lambda c: 1 / 0)
+        self.assertEqual(locations, {a: a.location for a in ligand.atoms()})
+
+
+    def test_1lol_distance_matrices(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        chain = model.chain("A")
+        atoms = sorted(chain.atoms(), key=lambda a: a.id)
+        matrix = chain.distance_matrix()
+        self.assertEqual(matrix.shape, (len(atoms), len(atoms)))
+        self.assertAlmostEqual(
+         matrix[10, 500], atoms[10].distance_to(atoms[500]), delta=0.000001
+        )
+        self.assertEqual(chain.distance_matrix(name="CA").shape, (204, 204))
+        residues = chain.distance_matrix(level="residue")
+        self.assertEqual(residues.shape, (204, 204))
+        r1, r2 = chain.residues()[3], chain.residues()[10]
+        self.assertAlmostEqual(residues[3, 10], min(
+         a.distance_to(b) for a in r1.atoms() for b in r2.atoms()
+        ), delta=0.000001)
+        self.assertTrue((
+         chain.distance_matrix(level="residue", block=50) == residues
+        ).all())
+        between = chain.distance_matrix(
+         model.chain("B"), level="residue", method="ca"
+        )
+        self.assertEqual(between.shape, (204, 214))
+        self.assertAlmostEqual(between[0, 0], r1.chain.residues()[0].atom(
+         name="CA").distance_to(model.chain("B").residues()[0].atom(name="CA")
+        ), delta=0.000001)
+        contacts = chain.contact_map(8, level="residue")
+        self.assertEqual(contacts.sum(), (residues <= 8).sum() - 204)
+        sparse = chain.contact_map(4, sparse=True)
+        self.assertEqual(sparse.nnz, (matrix <= 4).sum() - len(atoms))
+        self.assertTrue(sparse[10, 11])
+        with self.assertRaises(ValueError):
+            chain.distance_matrix(level="residue", method="cb")
+
+
+    def test_1lol_voxels(self):
+        chain = atomium.open("tests/integration/files/1lol.cif").model.chain("A")
+        grid = chain.create_grid(size=2, margin=3)
+        self.assertEqual(grid.points.shape, (len(grid), 3))
+        self.assertEqual(tuple(grid.points[1]), list(grid)[1])
+        for axis, n in zip(grid.axes, range(3)):
+            values = [a.location[n] for a in chain.atoms()]
+            self.assertLessEqual(axis[0], min(min(values) - 3, 0))
+            self.assertGreaterEqual(axis[-1], max(max(values) + 3, 0))
+            self.assertIn(0, axis)
+        grid, voxels = chain.voxelise(elements=["C", "N", "O"])
+        self.assertEqual(voxels.shape, (3, *grid.shape))
+        self.assertEqual(voxels.sum(axis=(1, 2, 3)).tolist(), [981, 273, 292])
+        atom = chain.atom(1)
+        index = [round(n - o) for n, o in zip(atom.location, grid.origin)]
+        self.assertGreaterEqual(voxels[1][tuple(index)], 1)
+        ligand = chain.model.ligand(name="XMP", chain__id="A")
+        locations = [a.location for a in ligand.atoms()]
+        grid, voxels = ligand.voxelise(size=0.5, margin=2)
+        for n in range(3):
+            low = min(l[n] for l in locations)
+            high = max(l[n] for l in locations)
+            self.assertAlmostEqual(grid.origin[n], low - 2, delta=0.000001)
+            self.assertGreaterEqual(grid.axes[n][-1], high + 2 - 0.000001)
+            self.assertEqual(grid.shape[n], math.ceil((high - low + 4) / 0.5) + 1)
+        self.assertGreater(grid.origin[2], 30)
+        self.assertEqual(voxels.sum(), len(locations))
+        grid, density = chain.voxelise(size=0.5, margin=3, sigma=1)
+        self.assertEqual(density.shape, (1, *grid.shape))
+        self.assertAlmostEqual(
+         density.sum() * 0.125, len(chain.atoms()) * (2 * math.pi) ** 1.5,
+         delta=len(chain.atoms()) * (2 * math.pi) ** 1.5 * 0.03
+        )
+
+
+    def test_1cbn_bonds(self):
+        for e in ["cif", "pdb"]:
+            model = atomium.open("tests/integration/files/1cbn." + e).model
+            sg1, sg2 = [model.residue("A." + n).atom(name="SG") for n in ("3", "40")]
+            self.assertIn(sg2, sg1.bonded_atoms)
+            self.assertFalse(sg1._bonded_atoms)
+            self.assertIsNone(model.bonds)
+            count = model.perceive_bonds()
+            atoms, edges = model.bonds
+            self.assertEqual(edges.shape, (count, 2))
+            self.assertIn(sg2, sg1.bonded_atoms)
+            residue = model.residue("A.14")
+            self.assertEqual(
+             {a.name for a in residue.atom(name="CG").bonded_atoms},
+             {"CB", "OD1", "ND2"}
+            )
+            self.assertIn(
+             residue.next.atom(name="N"), residue.atom(name="C").bonded_atoms
+            )
+            ligand = model.ligand(name="EOH")
+            self.assertEqual(
+             {a.name for a in ligand.atom(name="C1").bonded_atoms}, {"C2", "O"}
+            )
+            for atom in model.atoms():
+                for other in atom.bonded_atoms:
+                    self.assertIn(atom, other.bonded_atoms)
+                    self.assertFalse(atom.alt_loc and other.alt_loc and
+                     atom.alt_loc != other.alt_loc)
+            self.assertIsInstance(sg1.bonded_atoms, frozenset)
+            with self.assertRaises(AttributeError):
+                sg1.bonded_atoms.add(sg1)
+            residue.translate(100, 0, 0)
+            self.assertIsNone(model.bonds)
+            self.assertEqual(residue.atom(name="CG").bonded_atoms, set())
+            self.assertIn(sg2, sg1.bonded_atoms)
+            self.assertEqual(model.perceive_bonds(), count - 2)
+            model.dehydrate()
+            self.assertIsNone(model.bonds)
+
+
+    def test_1lol_sasa(self):
+        from atomium.geometry import surface_areas
+        self.assertAlmostEqual(surface_areas(
+         [[0, 0, 0], [1, 0, 0]], [1, 1], probe=0
+        ).sum(), 6 * math.pi, delta=0.000001)
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        chain = model.chain("A")
+        atoms = chain.sasa()
+        self.assertEqual(len(atoms), len(chain.atoms()))
+        self.assertTrue(all(area >= 0 for area in atoms.values()))
+        hets = chain.sasa(level="het", workers=2)
+        self.assertAlmostEqual(
+         sum(hets.values()), sum(atoms.values()), delta=0.001
+        )
+        self.assertGreater(hets[chain.residue("A.61")], 100)
+        whole = model.sasa(level="chain")
+        buried = sum(atoms.values()) - whole[chain]
+        self.assertGreater(buried, 500)
+        with self.assertRaises(ValueError):
+            chain.sasa(level="residue")
+
+
+    def test_1lol_secondary_structure(self):
+        for e in ["cif", "pdb", "mmtf"]:
+            model = atomium.open("tests/integration/files/1lol." + e).model
+            chain = model.chain("A")
+            ss = chain.secondary_structure
+            residues = chain.residues()
+            self.assertEqual(len(ss), len(residues))
+            self.assertEqual(ss.count("H"), len({r for h in chain.helices for r in h}))
+            self.assertEqual(ss.count("E"), len({r for s in chain.strands for r in s}))
+            for residue, code in zip(residues, ss):
+                self.assertEqual(residue.ss, code)
+                self.assertEqual(residue.helix, code == "H")
+                self.assertEqual(residue.strand, code == "E")
+            self.assertEqual(
+             set(chain.residues(ss="H")),
+             {r for helix in chain.helices for r in helix}
+            )
+            self.assertEqual(chain.helices[0][0].ss, "H")
+            self.assertEqual(chain.strands[0][-1].ss, "E")
+
+
+    def test_1lol_assigned_secondary_structure(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        chain = model.chain("A")
+        recorded = chain.secondary_structure
+        chain.assign_secondary_structure()
+        assigned = chain.secondary_structure
+        self.assertEqual(len(assigned), len(recorded))
+        agreement = sum(a == b for a, b in zip(recorded, assigned))
+        self.assertGreater(agreement / len(recorded), 0.8)
+        self.assertEqual(
+         assigned.count("H"), sum(len(helix) for helix in chain.helices)
+        )
+        self.assertEqual(
+         assigned.count("E"), sum(len(strand) for strand in chain.strands)
+        )
+        self.assertTrue(all(r.helix for r in chain.helices[0]))
+        self.assertEqual(set(model.chain("B").secondary_structure), {"-"})
+        model = atomium.open(
+         "tests/integration/files/1lol.cif", secondary_structure="assign"
+        ).model
+        self.assertEqual(model.chain("A").secondary_structure, assigned)
+        self.assertIn("H", model.chain("B").secondary_structure)
+        with open("tests/integration/files/1lol.pdb") as f:
+            filestring = "".join(line for line in f if not
+             line.startswith(("HELIX", "SHEET")))
+        model = atomium.utilities.parse_string(filestring, "1lol.pdb").model
+        self.assertEqual(model.chain("A").secondary_structure, assigned)
+        model = atomium.utilities.parse_string(
+         filestring, "1lol.pdb", secondary_structure="file"
+        ).model
+        self.assertEqual(set(model.chain("A").secondary_structure), {"-"})
+        with self.assertRaises(ValueError):
+            atomium.utilities.parse_string(
+             filestring, "1lol.pdb", secondary_structure="x"
+            )
+
+
+    def test_1lol_chain_residue_order(self):
+        chain = atomium.open("tests/integration/files/1lol.cif").model.chain("A")
+        residues = chain.residues()
+        self.assertEqual(len(chain), len(residues))
+        self.assertEqual(tuple(chain), residues)
+        self.assertEqual(chain[0].id, "A.11")
+        self.assertEqual(chain[-1], residues[-1])
+        self.assertEqual(chain[5:10], residues[5:10])
+        self.assertEqual([chain[n] for n in range(len(chain))], list(residues))
+        for n, residue in enumerate(chain):
+            self.assertIs(residue.next, chain[n + 1] if n + 1 < len(chain) else None)
+        alanines = chain.residues(name="ALA")
+        self.assertEqual(alanines, tuple(r for r in residues if r.name == "ALA"))
+        self.assertIs(chain.residue("A.20"), residues[9])
+
+
+    def test_archives_and_mirrors(self):
+        files = "tests/integration/files/"
+        with tempfile.TemporaryDirectory() as directory:
+            mirror = os.path.join(directory, "mirror")
+            os.makedirs(os.path.join(mirror, "lo"))
+            os.makedirs(os.path.join(mirror, "cb"))
+            shutil.copy(files + "1lol.pdb.gz", mirror + "/lo/pdb1lol.ent.gz")
+            shutil.copy(files + "1cbn.cif", mirror + "/cb/1cbn.cif")
+            shutil.copy(files + "1lol.mmtf", mirror + "/lo/notes.txt")
+            tar = os.path.join(directory, "mirror.tar.gz")
+            with tarfile.open(tar, "w:gz") as archive:
+                archive.add(mirror, arcname="mirror")
+            zip = os.path.join(directory, "mirror.zip")
+            with zipfile.ZipFile(zip, "w") as archive:
+                archive.write(files + "1lol.mmtf", "1lol.mmtf")
+                archive.write(files + "1cbn.pdb", "structures/1cbn.pdb")
+            self.assertEqual(atomium.utilities.archive_members(mirror), [
+             "cb/1cbn.cif", "lo/pdb1lol.ent.gz"
+            ])
+            self.assertEqual(atomium.utilities.archive_members(tar), [
+             "mirror/cb/1cbn.cif", "mirror/lo/pdb1lol.ent.gz"
+            ])
+            opened = list(atomium.open_archive(tar))
+            self.assertEqual([f.code for _, f in opened], ["1CBN", "1LOL"])
+            self.assertEqual([f.filetype for _, f in opened], ["cif", "pdb"])
+            self.assertEqual(len(opened[1][1].model.atoms()), len(
+             atomium.open(files + "1lol.pdb.gz").model.atoms()
+            ))
+            opened = list(atomium.open_archive(zip, codes=["1LOL"]))
+            self.assertEqual([n for n, _ in opened], ["1lol.mmtf"])
+            self.assertEqual(opened[0][1].filetype, "mmtf")
+            opened = list(atomium.open_archive(mirror, workers=2, data_dict=True))
+            self.assertEqual(
+             [d["description"]["code"] for _, d in opened], ["1CBN", "1LOL"]
+            )
+            self.assertEqual(atomium.open_mirror(mirror, "1LOL").code, "1LOL")
+            with self.assertRaises(ValueError):
+                atomium.open_mirror(mirror, "1abc")
+
+
+    def test_1cbn_metrics(self):
+        reports = []
+        tracemalloc.start()
+        try:
+            for e in ["cif", "mmtf", "pdb"]:
+                atomium.open(
+                 "tests/integration/files/1cbn." + e, metrics=reports.append
+                )
+        finally: tracemalloc.stop()
+        for report in reports:
+            self.assertEqual(
+             set(report["stages"]), {"file_dict", "data_dict", "build"}
+            )
+            for stage in report["stages"].values():
+                self.assertGreater(stage["peak"], 0)
+            self.assertEqual(report["counts"]["models"], 1)
+            self.assertEqual(report["counts"]["chains"], 1)
+            self.assertEqual(report["counts"]["residues"], 46)
+
+
+    def test_1cbn_alt_locs(self):
+        for e in ["cif", "pdb"]:
+            f = atomium.open("tests/integration/files/1cbn." + e, alt_loc="first")
+            residue = f.model.residue("A.25")
+            self.assertEqual(len(residue.atoms()), 19)
+            self.assertEqual({a.alt_loc for a in residue.atoms()}, {"A"})
+            f = atomium.open("tests/integration/files/1cbn." + e, alt_loc="occupancy")
+            residue = f.model.residue("A.25")
+            self.assertEqual({a.alt_loc for a in residue.atoms()}, {"C"})
+            f = atomium.open("tests/integration/files/1cbn." + e, alt_loc="all")
+            residue = f.model.residue("A.25")
+            self.assertEqual(len(residue.atoms()), 57)
+            self.assertEqual(len(residue.atoms(alt_loc="B")), 19)
+            with self.assertRaises(ValueError):
+                atomium.open("tests/integration/files/1cbn." + e, alt_loc="last")
+
+
     def test_1xda(self):
         for e in ["cif", "mmtf", "pdb"]:
             f = atomium.open("tests/integration/files/1xda." + e)
@@ -0,0 +1,20 @@
+import sys
+import subprocess
+from unittest import TestCase
+
+class ImportTests(TestCase):
+
+    def test_optional_dependencies_load_lazily(self):
+        modules = ["paramiko", "requests", "msgpack", "valerius", "rmsd"]
+        output = subprocess.run([sys.executable, "-c",
+         "import sys, atomium; print(' '.join(sys.modules))"
+        ], capture_output=True, text=True, check=True).stdout.split()
+        self.assertIn("atomium", output)
+        for module in modules:
+            self.assertNotIn(module, output)
+        output = subprocess.run([sys.executable, "-c",
+         "import sys, atomium; atomium.open('tests/integration/files/1lol.mmtf')"
+         "; print(' '.join(sys.modules))"
+        ], capture_output=True, text=True, check=True).stdout.split()
+        self.assertIn("msgpack", output)
+        self.assertNotIn("paramiko", output)
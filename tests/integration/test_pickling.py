@@ -0,0 +1,113 @@
+import pickle
+import numpy as np
+import multiprocessing
+import atomium
+from atomium.columns import attach_model
+from unittest import TestCase
+
+def chain_center(args):
+    model = attach_model(args[0], chains=[args[1]])
+    return tuple(model.chain(args[1]).center_of_mass)
+
+
+class PicklingTests(TestCase):
+
+    def test_can_pickle_model(self):
+        for e in ["cif", "mmtf", "pdb"]:
+            model = atomium.open("tests/integration/files/1lol." + e).model
+            atom = model.atom(1)
+            atom.bond(model.atom(2))
+            buffers = []
+            data = pickle.dumps(model, protocol=5, buffer_callback=buffers.append)
+            self.assertTrue(buffers)
+            new = pickle.loads(data, buffers=buffers)
+            self.assertEqual(new, model)
+            self.assertEqual(len(new.atoms()), 3431)
+            self.assertAlmostEqual(new.mass, model.mass, delta=0.001)
+            self.assertEqual(
+             [c.id for c in new.chains()], [c.id for c in model.chains()]
+            )
+            chain = new.chain("A")
+            self.assertIs(chain.model, new)
+            self.assertEqual(chain.sequence, model.chain("A").sequence)
+            self.assertIs(chain[0].next, chain[1])
+            self.assertIs(chain[1].previous, chain[0])
+            self.assertIs(chain[0].chain, chain)
+            self.assertEqual(len(chain.helices), len(model.chain("A").helices))
+            self.assertIs(chain.helices[0][0].chain, chain)
+            for ligand in new.ligands():
+                self.assertIs(ligand.model, new)
+                self.assertIn(ligand.chain, new.chains())
+            self.assertEqual(len(new.waters()), len(model.waters()))
+            self.assertEqual(new.atom(1).bonded_atoms, {new.atom(2)})
+            self.assertEqual(new.atom(1).location, atom.location)
+
+
+    def test_can_pickle_parts_of_model(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        chain = pickle.loads(pickle.dumps(model.chain("A")))
+        self.assertEqual(chain, model.chain("A"))
+        self.assertIsNone(chain.model)
+        residue = pickle.loads(pickle.dumps(model.residue("A.11")))
+        self.assertEqual(residue, model.residue("A.11"))
+        self.assertIsNone(residue.chain)
+        ligand = pickle.loads(pickle.dumps(model.ligand(name="XMP")))
+        self.assertEqual(ligand, model.ligand(name="XMP"))
+        atom = pickle.loads(pickle.dumps(model.atom(1)))
+        self.assertEqual(atom, model.atom(1))
+        self.assertEqual(atom.id, 1)
+        self.assertIsNone(atom.het)
+
+
+
+class SharedMemoryTests(TestCase):
+
+    def test_can_attach_to_shared_model(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        with model.share() as shared:
+            view = attach_model(shared.descriptor)
+            self.assertEqual(view, model)
+            self.assertEqual(view.shared_coordinates.shape, (3431, 3))
+            self.assertFalse(view.shared_coordinates.flags.writeable)
+            self.assertEqual(view.atom(1).location, model.atom(1).location)
+            self.assertIs(view.chain("A").model, view)
+            with self.assertRaises(ValueError):
+                view.atom(1).translate(1, 1, 1)
+            self.assertIsNone(model.shared_coordinates)
+            del view
+
+
+    def test_can_attach_to_shared_chains(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        model.atom(1).bond(model.atom(2))
+        model.atom(1).bond(min(model.chain("B").atoms(), key=lambda a: a.id))
+        with model.share() as shared:
+            view = attach_model(shared.descriptor, chains=["B"])
+            self.assertEqual([c.id for c in view.chains()], ["B"])
+            self.assertEqual(view.chain("B"), model.chain("B"))
+            self.assertEqual(
+             {l.id for l in view.ligands() | view.waters()},
+             {l.id for l in model.ligands() | model.waters()
+              if l.chain.id == "B"}
+            )
+            self.assertEqual(view.shared_coordinates.shape, (3431, 3))
+            atom = min(view.chain("B").atoms(), key=lambda a: a.id)
+            self.assertTrue(
+             np.shares_memory(atom._location, view.shared_coordinates)
+            )
+            self.assertFalse(atom.bonded_atoms)
+            residue = view.chain("B").residues()[0]
+            self.assertIs(residue.next.previous, residue)
+            del view, atom, residue
+
+
+    def test_workers_can_attach_to_shared_model(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        with model.share() as shared:
+            with multiprocessing.Pool(2) as pool:
+                centers = pool.map(chain_center, [
+                 (shared.descriptor, chain) for chain in ("A", "B")
+                ])
+        for chain, center in zip(("A", "B"), centers):
+            for value, expected in zip(center, model.chain(chain).center_of_mass):
+                self.assertAlmostEqual(value, expected, delta=0.000001)
@@ -0,0 +1,331 @@
+"""Offline benchmark suite for atomium.
+
+Times how long ``import atomium`` takes, and each stage of working with a
+structure - parsing to a file dict, then to a data dict, building the model,
+querying it, searching its neighbourhoods, doing geometry on it, generating an
+assembly, and saving it in each format - for the files in
+tests/integration/files, and for a synthetic structure made by tiling copies
+of one of them. Each file is benchmarked in a fresh process so
+that its peak RSS can be reported, where the ``resource`` module is available
+(it isn't on Windows).
+
+Run from the repository root:
+
+    python tests/time/benchmark.py                 # compare with the baseline
+    python tests/time/benchmark.py --save          # store a new baseline
+    python tests/time/benchmark.py 1lol.cif 5xme.*  # only some files
+    python tests/time/benchmark.py import          # only the import time
+
+The baseline records the machine and Python it was taken on, since its timings
+are only meaningful on the same kind of machine. The exit code is 1 if any
+stage is slower than the baseline by more than the tolerance."""
+
+import sys
+sys.path.insert(0, ".")
+import os
+import json
+import argparse
+import fnmatch
+import platform
+import subprocess
+import tempfile
+import warnings
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+import atomium
+from atomium.utilities import get_parse_functions
+from atomium.data import data_dict_to_file
+try:
+    import resource
+except ImportError: resource = None
+
+FILES = "tests/integration/files"
+BASELINE = "tests/time/baseline.json"
+
+def benchmark_file(path):
+    """Runs every stage on one file and returns the timings of each, along with
+    the atom count and the peak RSS of the process in MB (or ``None`` where it
+    can't be measured). Stages which raise an exception are listed as failed,
+    with the error, rather than timed."""
+
+    warnings.simplefilter("ignore")
+    mode = "rb" if path.endswith(".mmtf") else "r"
+    with open(path, mode) as f: filestring = f.read()
+    stages, failed = {}, {}
+    def time(name, func):
+        start = perf_counter()
+        try:
+            result = func()
+        except Exception as e:
+            failed[name] = "{}: {}".format(type(e).__name__, e)
+            return None
+        stages[name] = perf_counter() - start
+        return result
+    file_func, data_func = get_parse_functions(filestring, path)
+    filetype = path.split(".")[-1]
+    file_dict = time("file_dict", lambda: file_func(filestring))
+    data_dict = time("data_dict", lambda: data_func(file_dict))
+    f = time("build", lambda: data_dict_to_file(data_dict, filetype))
+    atoms = f.model.atoms() if f else ()
+    if f:
+        time("query", lambda: run_queries(f.model))
+        time("nearby", lambda: run_nearby(f.model))
+        time("geometry", lambda: run_geometry(f.model))
+        if f.assemblies: time(
+         "assembly", lambda: f.generate_assembly(f.assemblies[0]["id"])
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for ext in ("pdb", "cif", "mmtf"):
+                time("save_" + ext, lambda: f.model.save(
+                 os.path.join(directory, "model." + ext)
+                ))
+    peak = None if resource is None else round(
+     resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+    )
+    return {
+     "atoms": len(atoms), "peak_rss_mb": peak, "failed": failed,
+     "stages": {name: {
+      "seconds": round(seconds, 6),
+      "atoms_per_second": round(len(atoms) / seconds) if seconds else None
+     } for name, seconds in stages.items()}
+    }
+
+
+def benchmark_import(repeats=5):
+    """Times ``import atomium`` in fresh interpreters, taking the best of
+    several runs and subtracting the time an interpreter takes to start."""
+
+    def best(code):
+        times = []
+        for _ in range(repeats):
+            start = perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True)
+            times.append(perf_counter() - start)
+        return min(times)
+    seconds = max(best("import atomium") - best("pass"), 0)
+    return {
+     "atoms": 0, "peak_rss_mb": None, "failed": {},
+     "stages": {"import": {"seconds": round(seconds, 6), "atoms_per_second": None}}
+    }
+
+
+def describe_machine():
+    """Describes the machine and Python that the benchmark is running on, to
+    be stored with a baseline."""
+
+    import numpy
+    return {
+     "platform": platform.platform(), "processor": platform.processor()
+      or platform.machine(), "cpus": os.cpu_count(),
+     "python": "{} {}".format(
+      platform.python_implementation(), platform.python_version()
+     ), "numpy": numpy.__version__
+    }
+
+
+def run_queries(model):
+    """The sort of queries that are commonly made of a model."""
+
+    model.chains()
+    model.residues(name="ALA")
+    model.atoms(element="C")
+    model.atoms(name__regex="C[AB]")
+    for residue in list(model.residues())[:50]:
+        model.residue(residue.id)
+
+
+def run_nearby(model):
+    """Neighbourhood searches around the model's ligands and a sample of its
+    atoms, after the model's distance grid has been built."""
+
+    model.optimise_distances()
+    for ligand in list(model.ligands())[:5]:
+        ligand.nearby_hets(5)
+    for atom in sorted(model.atoms(), key=lambda a: a.id)[::100][:50]:
+        atom.nearby_atoms(4)
+
+
+def run_geometry(model):
+    """Whole-model geometric properties and transformations."""
+
+    model.mass
+    model.center_of_mass
+    model.radius_of_gyration
+    model.translate(1, 2, 3)
+    model.rotate(0.5, "x")
+
+
+def make_tiled_file(path, copies, directory):
+    """Makes a synthetic structure from copies of the atoms of a .cif file,
+    spaced out in a line so that they don't overlap, and saves it as a new
+    .cif file. The tiling is done on the .cif tables themselves, so that
+    creating the file doesn't depend on the speed of atomium's own writer. The
+    path to the new file is returned."""
+
+    mmcif_dict = atomium.open(path, file_dict=True)
+    atoms, asyms = [], []
+    for copy in range(copies):
+        for row in mmcif_dict["atom_site"]:
+            row = dict(row)
+            row["id"] = str(len(atoms) + 1)
+            row["Cartn_x"] = "{:.3f}".format(float(row["Cartn_x"]) + copy * 500)
+            for key in ("label_asym_id", "auth_asym_id"):
+                row[key] = tile_id(row[key], copy)
+            atoms.append(row)
+        for row in mmcif_dict.get("struct_asym", []):
+            asyms.append({**row, "id": tile_id(row["id"], copy)})
+    tiled = {
+     "entry": mmcif_dict["entry"], "entity": mmcif_dict["entity"],
+     "chem_comp": mmcif_dict.get("chem_comp", []),
+     "struct_asym": asyms, "atom_site": atoms
+    }
+    tiled_path = os.path.join(directory, "tiled-{}x{}.cif".format(
+     copies, os.path.basename(path).split(".")[0]
+    ))
+    with open(tiled_path, "w") as f:
+        f.write("data_TILED\n")
+        for category, rows in tiled.items():
+            if not rows: continue
+            f.write("#\nloop_\n")
+            for name in rows[0]: f.write("_{}.{}\n".format(category, name))
+            for row in rows:
+                f.write(" ".join(quote(value) for value in row.values()) + "\n")
+    return tiled_path
+
+
+def quote(value):
+    """Quotes a .cif value if it needs it."""
+
+    if value and not any(c in value for c in " \t'\"") and value[0] != "_":
+        return value
+    return "'{}'".format(value) if "'" not in value else '"{}"'.format(value)
+
+
+def tile_id(id, copy):
+    """Gives a chain ID a suffix to make it unique to one tiled copy."""
+
+    return id + str(copy) if id not in "?." else id
+
+
+def compare(results, baseline, tolerance, min_seconds=0):
+    """Compares results with a baseline, and returns a description of every
+    stage which has become slower by more than the tolerance, which fails, or
+    which has no baseline timing to compare with. Stages quicker than
+    ``min_seconds`` are too noisy to compare."""
+
+    regressions = []
+    for name, result in results.items():
+        for stage, error in result["failed"].items():
+            regressions.append("{} {}: fails ({})".format(name, stage, error))
+        for stage, timing in result["stages"].items():
+            try:
+                old = baseline[name]["stages"][stage]["atoms_per_second"]
+            except KeyError:
+                regressions.append("{} {}: not in the baseline".format(
+                 name, stage
+                ))
+                continue
+            if timing["seconds"] < min_seconds: continue
+            new = timing["atoms_per_second"]
+            if old and new and new < old * (1 - tolerance):
+                regressions.append("{} {}: {:,} -> {:,} atoms/s".format(
+                 name, stage, old, new
+                ))
+            old = baseline[name]["stages"][stage]["seconds"]
+            if not new and timing["seconds"] > old * (1 + tolerance):
+                regressions.append("{} {}: {:.3f} -> {:.3f} s".format(
+                 name, stage, old, timing["seconds"]
+                ))
+    return regressions
+
+
+def print_results(results):
+    """Prints the atoms per second of every stage as a table."""
+
+    stages = []
+    for result in results.values():
+        stages += [s for s in result["stages"] if s not in stages]
+    print("{:28}{:>9}{:>10}".format("file", "atoms", "RSS (MB)") + "".join(
+     "{:>12}".format(s) for s in stages
+    ))
+    for name, result in results.items():
+        print("{:28}{:>9}{:>10}".format(
+         name, result["atoms"], result["peak_rss_mb"] or "-"
+        ) + "".join("{:>12}".format(
+         stage_rate(result["stages"].get(s))
+        ) for s in stages))
+    print("(atoms per second for each stage, or seconds where there are no atoms)")
+    for name, result in results.items():
+        for stage, error in result["failed"].items():
+            print("{} {} failed - {}".format(name, stage, error))
+
+
+def stage_rate(timing):
+    """Formats a stage's timing for the results table."""
+
+    if not timing: return "-"
+    return timing["atoms_per_second"] or "{:.3f}s".format(timing["seconds"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark atomium offline.")
+    parser.add_argument("patterns", nargs="*", help="file name patterns")
+    parser.add_argument("--save", action="store_true", help="store as baseline")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+     help="fractional slowdown allowed before a stage counts as a regression")
+    parser.add_argument("--min-seconds", type=float, default=0.01,
+     help="stages quicker than this aren't compared with the baseline")
+    parser.add_argument("--tile", default="1lol.cif",
+     help="the file to tile copies of for the synthetic structure")
+    parser.add_argument("--copies", type=int, default=8,
+     help="how many copies the synthetic structure has")
+    args = parser.parse_args()
+
+    names = sorted(f for f in os.listdir(FILES)
+     if f.split(".")[-1] in ("cif", "pdb", "mmtf"))
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {name: os.path.join(FILES, name) for name in names}
+        if args.copies:
+            tiled = make_tiled_file(
+             os.path.join(FILES, args.tile), args.copies, directory
+            )
+            paths[os.path.basename(tiled)] = tiled
+        if args.patterns:
+            paths = {name: path for name, path in paths.items()
+             if any(fnmatch.fnmatch(name, p) for p in args.patterns)}
+        results = {}
+        if not args.patterns or "import" in args.patterns:
+            results["import atomium"] = benchmark_import()
+        for name, path in paths.items():
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                try:
+                    results[name] = executor.submit(benchmark_file, path).result()
+                except Exception as e:
+                    results[name] = {
+                     "atoms": 0, "peak_rss_mb": None, "stages": {},
+                     "failed": {"benchmark": "{}: {}".format(
+                      type(e).__name__, e
+                     )}
+                    }
+    print_results(results)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(
+             {"machine": describe_machine(), "files": results},
+             f, indent=1, sort_keys=True
+            )
+        print("Baseline saved to " + args.baseline)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f: baseline = json.load(f)
+        if baseline["machine"] != describe_machine():
+            print("The baseline was taken on a different machine or Python:")
+            for key, value in sorted(baseline["machine"].items()):
+                print("    {}: {}".format(key, value))
+        regressions = compare(
+         results, baseline["files"], args.tolerance, args.min_seconds
+        )
+        for regression in regressions: print("REGRESSION " + regression)
+        if regressions: sys.exit(1)
+        print("No regressions against " + args.baseline)
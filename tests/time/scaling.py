@@ -0,0 +1,235 @@
+"""Scaling tests for atomium.
+
+Makes synthetic structures at several sizes (by default 1×, 4× and 16× the
+size of one of the files in tests/integration/files) in each file format,
+times each stage of reading and saving them - parsing to a file dict, then to
+a data dict, building the model, and saving it in the same format - and fits
+the exponent k in time ∝ atoms^k for each stage. A stage which takes linear
+time has an exponent of about 1, and one which takes quadratic time has an
+exponent of about 2.
+
+Run from the repository root:
+
+    python tests/time/scaling.py                  # all formats, default bound
+    python tests/time/scaling.py --bound 1.3 cif  # only .cif files
+    python tests/time/scaling.py --scales 1 2 4 8 --report scaling.json
+
+The fitted exponents are saved as a JSON report, and the exit code is 1 if
+any stage's exponent is above the bound."""
+
+import sys
+sys.path.insert(0, ".")
+import os
+import gc
+import json
+import math
+import argparse
+import tempfile
+import warnings
+from time import perf_counter
+import numpy as np
+import atomium
+from atomium.utilities import get_parse_functions
+from atomium.data import data_dict_to_file
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from benchmark import make_tiled_file, FILES
+
+REPORT = "tests/time/scaling.json"
+FORMATS = ("cif", "pdb", "mmtf")
+PDB_CHAIN_IDS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+def make_tiled_pdb(path, copies, directory):
+    """Makes a synthetic structure from copies of the atoms of a .pdb file,
+    spaced out in a line so that they don't overlap, and saves it as a new
+    .pdb file. Each copy of a chain is given a new one-character chain ID,
+    and its SEQRES, HELIX and SHEET records are copied too. The path to the
+    new file is returned."""
+
+    with open(path) as f: lines = f.read().splitlines()
+    chain_ids = []
+    for line in lines:
+        if line[:6] in ("ATOM  ", "HETATM") and line[21] not in chain_ids:
+            chain_ids.append(line[21])
+    if len(chain_ids) * copies > len(PDB_CHAIN_IDS):
+        raise ValueError("Not enough chain IDs for {} copies".format(copies))
+    header = [line for line in lines if line[:6] not in (
+     "SEQRES", "HELIX ", "SHEET ", "ATOM  ", "HETATM", "ANISOU", "TER   ",
+     "CONECT", "MASTER", "END   ", "END", "MODEL ", "ENDMDL"
+    )]
+    columns = {"SEQRES": (11,), "HELIX ": (19, 31), "SHEET ": (21, 32)}
+    records, atoms, serial = [], [], 0
+    for copy in range(copies):
+        ids = {
+         c: PDB_CHAIN_IDS[copy * len(chain_ids) + n]
+         for n, c in enumerate(chain_ids)
+        }
+        def relabel(line, *positions):
+            line = line.ljust(max(positions) + 1)
+            for p in positions:
+                if line[p] in ids: line = line[:p] + ids[line[p]] + line[p + 1:]
+            return line
+        for line in lines:
+            if line[:6] in columns:
+                records.append(relabel(line, *columns[line[:6]]))
+            elif line[:6] in ("ATOM  ", "HETATM", "ANISOU", "TER   "):
+                if line[:6] != "ANISOU": serial += 1
+                line = relabel(line, 21)
+                line = line[:6] + "{:>5}".format(serial) + line[11:]
+                if line[:6] in ("ATOM  ", "HETATM"):
+                    x = float(line[30:38]) + copy * 500
+                    line = line[:30] + "{:>8.3f}".format(x) + line[38:]
+                atoms.append(line)
+    tiled_path = os.path.join(directory, "tiled-{}x{}.pdb".format(
+     copies, os.path.basename(path).split(".")[0]
+    ))
+    with open(tiled_path, "w") as f:
+        f.write("\n".join(header + sorted(
+         records, key=lambda l: ("SEQRES", "HELIX ", "SHEET ").index(l[:6])
+        ) + atoms + ["END"]) + "\n")
+    return tiled_path
+
+
+def make_tiled_mmtf(path, copies, directory):
+    """Makes a synthetic .mmtf file by tiling a .cif file, opening it, and
+    saving its model as .mmtf. The path to the new file is returned."""
+
+    cif_path = make_tiled_file(path, copies, directory)
+    mmtf_path = cif_path[:-4] + ".mmtf"
+    atomium.open(cif_path).model.save(mmtf_path)
+    return mmtf_path
+
+
+def time_stages(path, repeats=5):
+    """Times each stage of reading and saving a file, taking the best of
+    several runs of each. The atom count and the stage timings are
+    returned."""
+
+    warnings.simplefilter("ignore")
+    mode = "rb" if path.endswith(".mmtf") else "r"
+    with open(path, mode) as f: filestring = f.read()
+    file_func, data_func = get_parse_functions(filestring, path)
+    filetype = path.split(".")[-1]
+    stages = {}
+    def time(name, func, *args):
+        best, result = math.inf, None
+        for _ in range(repeats):
+            result = None
+            gc.collect()
+            start = perf_counter()
+            result = func(*args)
+            best = min(best, perf_counter() - start)
+        stages[name] = best
+        return result
+    file_dict = time("file_dict", file_func, filestring)
+    data_dict = time("data_dict", data_func, file_dict)
+    f = time("build", data_dict_to_file, data_dict, filetype)
+    with tempfile.TemporaryDirectory() as directory:
+        time("save", f.model.save, os.path.join(
+         directory, "model." + filetype
+        ))
+    return len(f.model.atoms()), stages
+
+
+def fit_exponent(sizes, seconds):
+    """Fits the exponent k in seconds ∝ sizes^k by least squares on the
+    logarithms of both."""
+
+    return float(np.polyfit(np.log(sizes), np.log(seconds), 1)[0])
+
+
+def measure_scaling(path, filetype, scales, directory, repeats=5,
+                    min_seconds=0.005):
+    """Makes tiled copies of a file at each scale in one file format, times
+    their stages, and fits an exponent to each stage. Stages which take less
+    than ``min_seconds`` even at the largest scale are too quick to fit, and
+    get an exponent of ``None``."""
+
+    makers = {"cif": make_tiled_file, "pdb": make_tiled_pdb,
+     "mmtf": make_tiled_mmtf}
+    sizes, timings = [], []
+    for scale in scales:
+        tiled = makers[filetype](path, scale, directory)
+        atoms, stages = time_stages(tiled, repeats=repeats)
+        sizes.append(atoms)
+        timings.append(stages)
+    result = {"atoms": sizes, "stages": {}}
+    for stage in timings[0]:
+        seconds = [t[stage] for t in timings]
+        result["stages"][stage] = {
+         "seconds": [round(s, 6) for s in seconds],
+         "exponent": round(fit_exponent(sizes, seconds), 3)
+          if seconds[-1] >= min_seconds else None
+        }
+    return result
+
+
+def find_violations(report, bound):
+    """Lists every stage in a report whose exponent is above the bound."""
+
+    violations = []
+    for filetype, result in report["formats"].items():
+        for stage, fit in result["stages"].items():
+            if fit["exponent"] is not None and fit["exponent"] > bound:
+                violations.append("{} {}: exponent {:.2f} > {}".format(
+                 filetype, stage, fit["exponent"], bound
+                ))
+    return violations
+
+
+def print_report(report):
+    """Prints the fitted exponents of every stage as a table."""
+
+    stages = []
+    for result in report["formats"].values():
+        stages += [s for s in result["stages"] if s not in stages]
+    print("{:8}{:>24}".format("format", "atoms") + "".join(
+     "{:>12}".format(s) for s in stages
+    ))
+    for filetype, result in report["formats"].items():
+        print("{:8}{:>24}".format(
+         filetype, "/".join(str(a) for a in result["atoms"])
+        ) + "".join("{:>12}".format(
+         "-" if result["stages"].get(s, {}).get("exponent") is None
+          else "{:.2f}".format(result["stages"][s]["exponent"])
+        ) for s in stages))
+    print("(fitted exponent k in time ∝ atoms^k for each stage)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check atomium's scaling.")
+    parser.add_argument("formats", nargs="*", default=list(FORMATS),
+     help="the file formats to check")
+    parser.add_argument("--tile", default="1lol",
+     help="the file (without extension) to tile copies of")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 4, 16],
+     help="how many copies to make at each size")
+    parser.add_argument("--bound", type=float, default=1.2,
+     help="the largest exponent any stage may have")
+    parser.add_argument("--repeats", type=int, default=5,
+     help="how many times to run each stage, taking the best")
+    parser.add_argument("--min-seconds", type=float, default=0.005,
+     help="stages quicker than this at the largest size aren't fitted")
+    parser.add_argument("--report", default=REPORT,
+     help="where to save the JSON report")
+    args = parser.parse_args()
+
+    report = {"scales": args.scales, "bound": args.bound, "formats": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for filetype in args.formats:
+            path = os.path.join(FILES, "{}.{}".format(
+             args.tile, "cif" if filetype == "mmtf" else filetype
+            ))
+            report["formats"][filetype] = measure_scaling(
+             path, filetype, args.scales, directory,
+             repeats=args.repeats, min_seconds=args.min_seconds
+            )
+    print_report(report)
+    violations = find_violations(report, args.bound)
+    report["violations"] = violations
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+    print("Report saved to " + args.report)
+    for violation in violations: print("SUPERLINEAR " + violation)
+    if violations: sys.exit(1)
+    print("Every stage is within the bound of {}".format(args.bound))
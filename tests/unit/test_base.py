@@ -70,8 +70,7 @@ class ObjectFilteringTests(TestCase):
     @patch("atomium.base.get_object_from_filter")
     @patch("atomium.base.get_object_attribute_from_filter")
     @patch("atomium.base.attribute_matches_value")
-    @patch("atomium.base.StructureSet")
-    def test_can_filter_objects(self, mock_s, mock_match, mock_getat, mock_getob):
+    def test_can_filter_objects(self, mock_match, mock_getat, mock_getob):
         structures=[
          Mock(x="A", y=1), Mock(x="B", y=3), Mock(x="B", y=3),
          Mock(x="C", y=2), Mock(x="D", y=4), Mock(x="D", y=4)
@@ -85,7 +84,7 @@ class ObjectFilteringTests(TestCase):
             mock_getob.assert_any_call(structure, ["key", "key2", "key_3"])
             mock_getat.assert_any_call(structure, ["key", "key2", "key_3"])
             mock_match.assert_any_call("key", "value", ["key", "key2", "key_3"])
-        mock_s.assert_called_with(structures[1], structures[3])
+        objects._subset.assert_called_with([1, 3])
 
 
 
@@ -177,16 +176,12 @@ class StructureSetTests(TestCase):
     def test_can_make_structure_set(self):
         objects = [Mock(_id=n) for n in range(5)]
         s = StructureSet(*objects)
-        self.assertEqual(s._d, {
-         0: {objects[0]}, 1: {objects[1]}, 2: {objects[2]},
-         3: {objects[3]}, 4: {objects[4]}
-        })
+        self.assertEqual(s._d, {0: [0], 1: [1], 2: [2], 3: [3], 4: [4]})
         objects[2]._id = 0
         s = StructureSet(*objects)
-        self.assertEqual(s._d, {
-         0: {objects[0], objects[2]}, 1: {objects[1]},
-         3: {objects[3]}, 4: {objects[4]}
-        })
+        self.assertEqual(s._d, {0: [0, 2], 1: [1], 3: [3], 4: [4]})
+        s = StructureSet(*objects, objects[1])
+        self.assertEqual(s.structures, objects)
     
 
     def test_can_add_two_structure_sets(self):
@@ -194,15 +189,12 @@ class StructureSetTests(TestCase):
         objects[2]._id = 0
         s1 = StructureSet(*objects[:3])
         s2 = StructureSet(*objects[3:])
-        self.assertEqual(s1._d, {
-         0: {objects[0], objects[2]}, 1: {objects[1]},
-        })
-        self.assertEqual(s2._d, {3: {objects[3]}, 4: {objects[4]}})
+        self.assertEqual(s1._d, {0: [0, 2], 1: [1]})
+        self.assertEqual(s2._d, {3: [0], 4: [1]})
         s3 = s1 + s2
-        self.assertEqual(s3._d, {
-         0: {objects[0], objects[2]}, 1: {objects[1]},
-         3: {objects[3]}, 4: {objects[4]}
-        })
+        self.assertEqual(list(s3), objects)
+        self.assertEqual(s3._d, {0: [0, 2], 1: [1], 3: [3], 4: [4]})
+        self.assertEqual((s1 + s1 + s2).structures, objects)
     
 
     def test_can_get_length_of_structure_sets(self):
@@ -229,6 +221,61 @@ class StructureSetTests(TestCase):
         self.assertEqual(set(s.structures), set(objects))
     
 
+    def test_structure_set_membership(self):
+        objects = [Mock(_id=n) for n in range(5)]
+        s = StructureSet(*objects[:3])
+        self.assertIn(objects[0], s)
+        self.assertNotIn(objects[3], s)
+        self.assertNotIn(Mock(_id=0), s)
+        self.assertIn(objects[4], s + StructureSet(objects[4]))
+        self.assertNotIn(5, s)
+
+
+    def test_structure_set_algebra(self):
+        objects = [Mock(_id=n) for n in range(5)]
+        s1, s2 = StructureSet(*objects[:3]), StructureSet(*objects[1:])
+        self.assertEqual((s1 | s2).structures, objects)
+        self.assertEqual((s2 & s1).structures, objects[1:3])
+        self.assertEqual((s1 - s2).structures, objects[:1])
+
+
+    def test_repeated_addition_does_not_nest_views(self):
+        objects = [Mock(_id=n) for n in range(2000)]
+        s = StructureSet()
+        for obj in objects:
+            s = s + StructureSet(obj)
+            self.assertIn(obj, s)
+        self.assertLessEqual(len(s._parts), 11)
+        self.assertTrue(all(part._parts is None for part in s._parts))
+        self.assertEqual(list(s), objects)
+        self.assertIn(objects[0], s)
+        self.assertEqual(len(s + s), 2000)
+
+
+    def test_structure_set_algebra_on_positions(self):
+        objects = [Mock(_id=n) for n in range(6)]
+        s = StructureSet(*objects)
+        s1, s2 = s._subset([0, 1, 2, 3]), s._subset([2, 3, 4])
+        self.assertEqual(s1._positions, (0, 1, 2, 3))
+        self.assertEqual(s2._subset([1, 2])._positions, (3, 4))
+        self.assertIs(s2._subset([1])._root, s._structures)
+        self.assertEqual((s1 & s2).structures, objects[2:4])
+        self.assertEqual((s1 & s2)._positions, (2, 3))
+        self.assertEqual((s1 - s2).structures, objects[:2])
+        self.assertEqual((s2 - s1).structures, objects[4:5])
+        self.assertEqual((s1 & StructureSet(*objects[3:])).structures, objects[3:4])
+
+
+    def test_structure_set_equality(self):
+        objects = [Mock(_id=n) for n in range(5)]
+        s1, s2 = StructureSet(*objects), StructureSet(*objects)
+        self.assertEqual(s1, s2)
+        self.assertEqual(hash(s1), hash(s2))
+        self.assertEqual({s1: 1}[s2], 1)
+        self.assertNotEqual(s1, StructureSet(*objects[::-1]))
+        self.assertEqual(StructureSet(*objects[:2]) + StructureSet(*objects[2:]), s1)
+
+
     def test_can_get_structures_by_id(self):
         objects = [Mock(_id=n) for n in range(5)]
         s = StructureSet(*objects)
@@ -0,0 +1,296 @@
+import math
+import numpy as np
+from unittest import TestCase
+from unittest.mock import patch
+from atomium.geometry import *
+
+class KabschRmsdTests(TestCase):
+
+    def setUp(self):
+        self.reference = np.array([
+         [1, 0, 0], [-1, 0, 0], [0, 2, 0], [0, -2, 0]
+        ], dtype=float)
+
+
+    def test_identical_coordinates_have_rmsd_of_zero(self):
+        self.assertAlmostEqual(
+         kabsch_rmsd(self.reference, self.reference), 0, delta=0.000001
+        )
+
+
+    def test_rotated_coordinates_have_rmsd_of_zero(self):
+        rotated = self.reference @ rotation_matrix(1, "z").T
+        self.assertAlmostEqual(
+         kabsch_rmsd(self.reference, rotated), 0, delta=0.000001
+        )
+
+
+    def test_can_get_rmsd_of_stretched_coordinates(self):
+        self.assertAlmostEqual(kabsch_rmsd(
+         [[1, 0, 0], [-1, 0, 0]], [[2, 0, 0], [-2, 0, 0]]
+        ), 1, delta=0.000001)
+
+
+    def test_can_get_rmsds_of_stack(self):
+        stack = np.stack([self.reference, self.reference * 2])
+        rmsds = kabsch_rmsd(self.reference, stack)
+        self.assertEqual(rmsds.shape, (2,))
+        self.assertAlmostEqual(rmsds[0], 0, delta=0.000001)
+        self.assertAlmostEqual(rmsds[1], math.sqrt(2.5), delta=0.000001)
+
+
+
+class PairFindingTests(TestCase):
+
+    def setUp(self):
+        self.points = [[0, 0, 0], [1, 0, 0], [3, 0, 0], [0, 1.5, 0]]
+
+
+    def test_can_find_pairs_in_cells(self):
+        self.assertEqual(
+         cell_pairs(self.points, 1.5).tolist(), [[0, 1], [0, 3]]
+        )
+        self.assertEqual(
+         cell_pairs(self.points, 2).tolist(), [[0, 1], [0, 3], [1, 2], [1, 3]]
+        )
+
+
+    def test_can_find_no_pairs(self):
+        self.assertEqual(cell_pairs(self.points, 0.5).shape, (0, 2))
+        self.assertEqual(cell_pairs(self.points[:1], 5).shape, (0, 2))
+        self.assertEqual(cell_pairs(self.points, 0).shape, (0, 2))
+
+
+    def test_can_find_pairs_across_tiles(self):
+        points = np.random.default_rng(1).uniform(0, 20, (200, 3))
+        expected = cell_pairs(points, 3)
+        pairs = contact_pairs(points, 3, tiles=5)
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        self.assertEqual(pairs.tolist(), expected.tolist())
+        distances = np.sqrt(((points[:, None] - points[None]) ** 2).sum(axis=2))
+        self.assertEqual(len(expected), (np.triu(distances <= 3, 1)).sum())
+
+
+    def test_can_find_cross_pairs(self):
+        pairs = cross_pairs(
+         [[0, 0, 0], [10, 0, 0]], [[1, 0, 0], [0, 0, 2], [10, 0, 0.5]], 1.5
+        )
+        self.assertEqual(sorted(pairs.tolist()), [[0, 0], [1, 2]])
+        self.assertEqual(cross_pairs([], [[0, 0, 0]], 1).shape, (0, 2))
+
+
+
+class TransformationTests(TestCase):
+
+    def test_can_make_rotation_matrices(self):
+        for axis, expected in (("x", [1, 0, 0]), ("y", [0, 0, -1]),
+         ("z", [0, 1, 0]), ([0, 0, 2], [0, 1, 0])):
+            rotated = rotation_matrix(math.pi / 2, axis) @ [1, 0, 0]
+            for value, e in zip(rotated, expected):
+                self.assertAlmostEqual(value, e, delta=0.000001)
+        with self.assertRaises(ValueError):
+            rotation_matrix(1, "w")
+
+
+    def test_can_make_homogeneous_matrix(self):
+        matrix = homogeneous_matrix(np.eye(3) * 2, [1, 2, 3])
+        self.assertEqual(matrix.tolist(), [
+         [2, 0, 0, 1], [0, 2, 0, 2], [0, 0, 2, 3], [0, 0, 0, 1]
+        ])
+        self.assertEqual(homogeneous_matrix().tolist(), np.eye(4).tolist())
+        self.assertEqual(
+         homogeneous_matrix(vector=[[1, 0, 0], [0, 1, 0]]).shape, (2, 4, 4)
+        )
+        matrix = homogeneous_matrix([np.eye(3), np.eye(3) * 2], [1, 2, 3])
+        self.assertEqual(matrix.shape, (2, 4, 4))
+        self.assertEqual(matrix[1, :, 3].tolist(), [1, 2, 3, 1])
+
+
+    def test_can_transform_coordinates(self):
+        coordinates = [[1, 0, 0], [0, 1, 0]]
+        transformed = transform_coordinates(
+         coordinates, homogeneous_matrix(np.eye(3) * 2, [1, 1, 1])
+        )
+        self.assertEqual(transformed.tolist(), [[3, 1, 1], [1, 3, 1]])
+        stack = transform_coordinates(coordinates, [np.eye(3), np.eye(3) * -1])
+        self.assertEqual(stack.shape, (2, 2, 3))
+        self.assertEqual(stack[1].tolist(), [[-1, 0, 0], [0, -1, 0]])
+
+
+
+class ClashCountTests(TestCase):
+
+    def test_can_count_clashes_of_poses(self):
+        targets = [[0, 0, 0], [1, 0, 0], [10, 0, 0]]
+        poses = [[[0, 0, 0.5], [20, 0, 0]], [[10, 0, 1], [5, 5, 5]]]
+        self.assertEqual(clash_counts(poses, targets, 1.5).tolist(), [2, 1])
+        self.assertEqual(clash_counts(poses[0], targets, 1.5), 2)
+
+
+    def test_cutoff_is_exclusive(self):
+        self.assertEqual(clash_counts([[[0, 0, 1]]], [[0, 0, 0]], 1)[0], 0)
+
+
+    def test_can_count_no_clashes(self):
+        self.assertEqual(clash_counts([[[0, 0, 0]]], [], 1).tolist(), [0])
+
+
+
+class DistanceMatrixTests(TestCase):
+
+    def test_can_get_distance_matrix(self):
+        points = [[0, 0, 0], [3, 4, 0], [0, 0, 1]]
+        matrix = distance_matrix(points, block=2)
+        self.assertEqual(matrix.shape, (3, 3))
+        self.assertEqual(matrix[0].tolist(), [0, 5, 1])
+        self.assertAlmostEqual(matrix[1][2], math.sqrt(26), delta=0.000001)
+        self.assertEqual(matrix.tolist(), matrix.T.tolist())
+
+
+    def test_can_get_distance_matrix_to_other_points(self):
+        matrix = distance_matrix([[0, 0, 0], [1, 0, 0]], [[0, 0, 2]], block=1)
+        self.assertEqual(matrix[:, 0].tolist(), [2, math.sqrt(5)])
+
+
+    def test_can_get_group_distance_matrix(self):
+        points = [[0, 0, 0], [1, 0, 0], [4, 0, 0], [10, 0, 0], [12, 0, 0]]
+        matrix = group_distance_matrix(points, [0, 2, 3], block=1)
+        self.assertEqual(matrix.tolist(), [[0, 3, 9], [3, 0, 6], [9, 6, 0]])
+        matrix = group_distance_matrix(
+         points, [0, 3], [[2, 0, 0], [11, 0, 0]], [0, 1]
+        )
+        self.assertEqual(matrix.tolist(), [[1, 7], [8, 1]])
+
+
+
+class GridTests(TestCase):
+
+    def test_grid_has_points(self):
+        grid = Grid([0, 1], [0, 2, 4], [5])
+        self.assertEqual(grid.shape, (2, 3, 1))
+        self.assertEqual(len(grid), 6)
+        self.assertEqual(grid.origin, (0, 0, 5))
+        self.assertEqual(list(grid)[:3], [(0, 0, 5), (0, 2, 5), (0, 4, 5)])
+        self.assertEqual(grid.points.tolist(), [list(p) for p in grid])
+
+
+    def test_can_voxelise_points(self):
+        grid = Grid([10, 11, 12], [0, 1], [0, 1])
+        voxels = voxelise(
+         [[10.2, 0, 0], [11.6, 1, 0.9], [30, 0, 0]], grid, [1, 0, 0], 2
+        )
+        self.assertEqual(voxels.shape, (2, 3, 2, 2))
+        self.assertEqual(voxels.sum(), 2)
+        self.assertEqual(voxels[1, 0, 0, 0], 1)
+        self.assertEqual(voxels[0, 2, 1, 1], 1)
+
+
+    def test_can_voxelise_points_as_gaussians(self):
+        axis = np.arange(-6, 6.5, 0.5)
+        grid = Grid(axis, axis, axis)
+        density = voxelise([[0, 0, 0]], grid, sigma=1)
+        self.assertEqual(density[0, 12, 12, 12], 1)
+        self.assertAlmostEqual(
+         density[0, 14, 12, 12], math.exp(-0.5), delta=0.000001
+        )
+        self.assertEqual(density[0, 12, 12, 19], 0)
+        self.assertAlmostEqual(
+         density.sum() * 0.125, (2 * math.pi) ** 1.5, delta=0.1
+        )
+
+
+
+class SurfaceAreaTests(TestCase):
+
+    def test_sphere_points_are_on_unit_sphere(self):
+        points = sphere_points(50)
+        self.assertEqual(points.shape, (50, 3))
+        for length in np.sqrt((points ** 2).sum(axis=1)):
+            self.assertAlmostEqual(length, 1, delta=0.000001)
+        self.assertAlmostEqual(np.abs(points.mean(axis=0)).max(), 0, delta=0.01)
+
+
+    def test_isolated_atom_is_fully_exposed(self):
+        areas = surface_areas([[0, 0, 0], [20, 0, 0]], [1.5, 1.8])
+        self.assertAlmostEqual(areas[0], 4 * math.pi * 2.9 ** 2, delta=0.000001)
+        self.assertAlmostEqual(areas[1], 4 * math.pi * 3.2 ** 2, delta=0.000001)
+
+
+    def test_buried_atom_has_no_area(self):
+        areas = surface_areas([[0, 0, 0], [0, 0, 0.1]], [1, 3], probe=0)
+        self.assertEqual(areas[0], 0)
+        self.assertGreater(areas[1], 0)
+
+
+    def test_blocks_give_same_areas(self):
+        points = np.random.default_rng(2).uniform(0, 10, (30, 3))
+        radii = np.full(30, 1.7)
+        self.assertEqual(
+         surface_areas(points, radii, block=4).tolist(),
+         surface_areas(points, radii).tolist()
+        )
+
+
+    def test_no_atoms_have_no_areas(self):
+        self.assertEqual(surface_areas([], []).shape, (0,))
+
+
+
+class SecondaryStructureTests(TestCase):
+
+    def setUp(self):
+        nan = [np.nan] * 3
+        self.backbone = np.array([
+         [nan, [5, 1, 0], [4.13, 0, 0], [2.9, 0, 0]],
+         [nan, nan, nan, nan],
+         [nan, [-2, 1, 0], [-1.33, 0, 0], [-2.56, 0, 0]],
+         [[0, 0, 0], [0, 1.4, 0], nan, nan]
+        ], dtype=float)
+
+
+    def test_can_find_backbone_hydrogen_bond(self):
+        bonds = backbone_hydrogen_bonds(self.backbone)
+        self.assertEqual(bonds.tolist(), [[0, 3]])
+
+
+    def test_non_donors_make_no_hydrogen_bonds(self):
+        bonds = backbone_hydrogen_bonds(
+         self.backbone, donors=[True, True, True, False]
+        )
+        self.assertEqual(bonds.shape, (0, 2))
+
+
+    def test_weak_hydrogen_bonds_are_ignored(self):
+        self.assertEqual(
+         backbone_hydrogen_bonds(self.backbone, energy=-3).shape, (0, 2)
+        )
+
+
+    def test_short_chains_have_no_secondary_structure(self):
+        self.assertEqual(
+         secondary_structure_codes(self.backbone[:2]).tolist(), ["-", "-"]
+        )
+        self.assertEqual(
+         "".join(secondary_structure_codes(self.backbone)), "----"
+        )
+
+
+    @patch("atomium.geometry.backbone_hydrogen_bonds")
+    def test_consecutive_turns_make_helix(self, mock_bonds):
+        mock_bonds.return_value = np.array([[0, 4], [1, 5]])
+        codes = secondary_structure_codes(np.zeros((8, 4, 3)))
+        self.assertEqual("".join(codes), "-HHHH---")
+
+
+    @patch("atomium.geometry.backbone_hydrogen_bonds")
+    def test_antiparallel_ladder_makes_strands(self, mock_bonds):
+        mock_bonds.return_value = np.array([[1, 10], [2, 9], [9, 2], [10, 1]])
+        codes = secondary_structure_codes(np.zeros((12, 4, 3)))
+        self.assertEqual("".join(codes), "-EE------EE-")
+
+
+    @patch("atomium.geometry.backbone_hydrogen_bonds")
+    def test_single_bridge_makes_no_strand(self, mock_bonds):
+        mock_bonds.return_value = np.array([[1, 10], [10, 1]])
+        codes = secondary_structure_codes(np.zeros((12, 4, 3)))
+        self.assertEqual("".join(codes), "-" * 12)
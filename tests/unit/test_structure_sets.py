@@ -13,7 +13,7 @@ class StructureSetCreationTests(StructureSetTest):
 
     def test_can_create_structure_set(self):
         s = StructureSet(*self.structures)
-        self.assertEqual(s._d, {1: {self.structures[0]}, 2: set(self.structures[1:])})
+        self.assertEqual(s._d, {1: [0], 2: [1, 2]})
 
 
 
@@ -23,7 +23,7 @@ class StructureSetAdditionTests(StructureSetTest):
         s1 = StructureSet(*self.structures[:2])
         s2 = StructureSet(self.structures[2])
         s = s1 + s2
-        self.assertEqual(s._d, {1: {self.structures[0]}, 2: set(self.structures[1:])})
+        self.assertEqual(s._d, {1: [0], 2: [1, 2]})
 
 
 
@@ -56,4 +56,4 @@ class StructureSetGettingTests(StructureSetTest):
     def test_can_get_structure_by_id(self):
         s = StructureSet(*self.structures)
         self.assertEqual(s.get(1), self.structures[0])
-        self.assertIn(s.get(2), self.structures[1:])
\ No newline at end of file
+        self.assertIs(s.get(2), self.structures[1])
\ No newline at end of file
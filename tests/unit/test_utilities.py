@@ -1,3 +1,4 @@
+import io
 from unittest import TestCase
 from unittest.mock import Mock, patch, PropertyMock, MagicMock
 from atomium.utilities import *
@@ -10,9 +11,11 @@ class OpeningTests(TestCase):
         self.mock_open = self.patch1.start()
         self.mock_parse = self.patch2.start()
         open_return = MagicMock()
-        mock_file = Mock()
-        open_return.__enter__.return_value = mock_file
-        mock_file.read.return_value = "returnstring"
+        self.mock_file = MagicMock()
+        open_return.__enter__.return_value = self.mock_file
+        self.mock_file.__enter__.return_value = self.mock_file
+        self.mock_file.peek.return_value = b"return"
+        self.mock_file.read.side_effect = [b"return\r\nstring", b""]
         self.mock_open.return_value = open_return
 
 
@@ -23,22 +26,93 @@ class OpeningTests(TestCase):
 
     def test_can_open_string(self):
         self.assertEqual(open("path/to/file", 1, a=2), self.mock_parse.return_value)
-        self.mock_open.assert_called_with("path/to/file")
-        self.mock_parse.assert_called_with("returnstring", "path/to/file", 1, a=2)
+        self.mock_open.assert_called_with("path/to/file", "rb")
+        self.mock_parse.assert_called_with("return\nstring", "path/to/file", 1, a=2)
 
 
     def test_can_open_bytestring(self):
-        self.mock_open.side_effect = [Exception, self.mock_open.return_value]
+        self.mock_file.read.side_effect = [b"\xderet", b"urn", b""]
         self.assertEqual(open("path/to/file", 1, a=2), self.mock_parse.return_value)
         self.mock_open.assert_called_with("path/to/file", "rb")
-        self.mock_parse.assert_called_with("returnstring", "path/to/file", 1, a=2)
+        self.mock_parse.assert_called_with(b"\xdereturn", "path/to/file", 1, a=2)
+
+
+    @patch("atomium.utilities.compressed_file")
+    def test_can_open_compressed_file(self, mock_compressed):
+        mock_compressed.return_value = self.mock_file
+        self.mock_file.peek.return_value = b"BZh91A"
+        self.assertEqual(open("path/to/file.pdb", 1, a=2), self.mock_parse.return_value)
+        mock_compressed.assert_called_with(self.mock_file, "bz2")
+        self.mock_parse.assert_called_with("return\nstring", "path/to/file.pdb", 1, a=2)
+
+
+    @patch("atomium.utilities.read_selection")
+    def test_can_open_selection(self, mock_read):
+        mock_read.return_value = "selection"
+        f = open("path/to/file.cif.gz", 1, model=2, chains=["A"], a=2)
+        self.assertEqual(f, self.mock_parse.return_value)
+        mock_read.assert_called_with("path/to/file.cif.gz", 2, ["A"], None, False)
+        self.assertFalse(self.mock_open.called)
+        self.mock_parse.assert_called_with("selection", "path/to/file.cif", 1, a=2)
+
+
+
+class FilestringReadingTests(TestCase):
+
+    @patch("atomium.utilities.CHUNK_SIZE", 3)
+    def test_can_decode_characters_split_between_chunks(self):
+        text = "é\r\nab€c\n" * 4
+        f = io.BytesIO(text.encode())
+        self.assertEqual(read_filestring(f, "file.pdb"), "é\nab€c\n" * 4)
+
+
+    @patch("atomium.utilities.CHUNK_SIZE", 3)
+    def test_can_read_bytes(self):
+        self.assertEqual(
+         read_filestring(io.BytesIO(b"\xff\xfeab\x80"), "file"), b"\xff\xfeab\x80"
+        )
+        self.assertEqual(
+         read_filestring(io.BytesIO(b"abcdef"), "file.mmtf"), b"abcdef"
+        )
+
+
+    @patch("atomium.utilities.CHUNK_SIZE", 3)
+    def test_invalid_text_after_first_chunk(self):
+        with self.assertRaisesRegex(ValueError, "file.pdb .+ at byte 7"):
+            read_filestring(io.BytesIO(b"abcdefg\xffhi"), "file.pdb")
+        with self.assertRaisesRegex(ValueError, "file.pdb .+ at byte 2"):
+            read_filestring(io.BytesIO(b"ab\xe2\x82xy"), "file.pdb")
+
+
+
+class IndexRunTests(TestCase):
+
+    def test_can_group_runs_by_model(self):
+        runs = [[0, "A", 0, 5], [0, "B", 5, 9], [1, "A", 9, 14], [0, "A", 20, 22]]
+        self.assertEqual(group_index_runs({"atoms": runs}), [
+         [[0, "A", 0, 5], [0, "B", 5, 9], [0, "A", 20, 22]], [[1, "A", 9, 14]]
+        ])
+        self.assertEqual(group_index_runs({"atoms": []}), [])
+
+
+    def test_can_check_selection(self):
+        runs = [[[0, "A", 0, 5], [0, "B", 5, 9]], [[1, "A", 9, 14]]]
+        check_selection(runs)
+        check_selection(runs, model=-2, chains=["A", "B"])
+        check_selection(runs, chains=["B"])
+        with self.assertRaisesRegex(ValueError, "no model 2"):
+            check_selection(runs, model=2)
+        with self.assertRaisesRegex(ValueError, "no chain B in the model"):
+            check_selection(runs, model=1, chains=["A", "B"])
+        with self.assertRaisesRegex(ValueError, "no chain C, D in the file"):
+            check_selection(runs, chains=["C", "D"])
 
 
 
 class FetchingTests(TestCase):
 
     def setUp(self):
-        self.patch1 = patch("atomium.utilities.get")
+        self.patch1 = patch("requests.get")
         self.mock_get = self.patch1.start()
         self.mock_get.return_value = Mock(status_code=200, text="ABC")
         self.patch2 = patch("atomium.utilities.parse_string")
@@ -170,10 +244,29 @@ class StringParsingTests(TestCase):
         mock_get.assert_called_with("ABCD", "file.cif")
         mock_get.return_value[0].assert_called_with("ABCD")
         mock_get.return_value[1].assert_called_with(mock_get.return_value[0].return_value)
-        mock_data.assert_called_with(mock_get.return_value[1].return_value, "cif")
+        mock_data.assert_called_with(
+         mock_get.return_value[1].return_value, "cif",
+         alt_loc="first", ensemble=False, secondary_structure="auto"
+        )
         self.assertEqual(f, mock_data.return_value)
 
 
+    @patch("atomium.utilities.get_parse_functions")
+    @patch("atomium.utilities.count_data_dict")
+    def test_can_report_metrics(self, mock_count, mock_get):
+        mock_get.return_value = [MagicMock(), MagicMock()]
+        metrics = Mock()
+        f = parse_string("ABCD", "file.xyz", data_dict=True, metrics=metrics)
+        self.assertEqual(f, mock_get.return_value[1].return_value)
+        mock_count.assert_called_with(f)
+        report = metrics.call_args[0][0]
+        self.assertEqual(report["path"], "file.xyz")
+        self.assertEqual(report["counts"], mock_count.return_value)
+        self.assertEqual(set(report["stages"]), {"file_dict", "data_dict"})
+        for stage in report["stages"].values():
+            self.assertGreaterEqual(stage["seconds"], 0)
+
+
 
 class ParseFunctionGettingTests(TestCase):
 
@@ -195,6 +288,12 @@ class ParseFunctionGettingTests(TestCase):
         self.assertIs(f2, pdb_dict_to_data_dict)
 
 
+    def test_can_get_ent_functions(self):
+        f1, f2 = get_parse_functions("ABC", "pdb1abc.ent")
+        self.assertIs(f1, pdb_string_to_pdb_dict)
+        self.assertIs(f2, pdb_dict_to_data_dict)
+
+
     def test_bytes_mean_mmtf(self):
         f1, f2 = get_parse_functions(b"ABC", "x.xxx")
         self.assertIs(f1, mmtf_bytes_to_mmtf_dict)
@@ -214,6 +313,21 @@ class ParseFunctionGettingTests(TestCase):
 
 
 
+class ArchiveMemberTests(TestCase):
+
+    def test_can_get_codes_of_structure_files(self):
+        self.assertEqual(member_code("1lol.cif"), "1lol")
+        self.assertEqual(member_code("mirror/lo/1LOL.pdb.gz"), "1lol")
+        self.assertEqual(member_code("lo/pdb1lol.ent.gz"), "1lol")
+        self.assertEqual(member_code("1lol.mmtf.xz"), "1lol")
+
+
+    def test_other_files_have_no_code(self):
+        self.assertIsNone(member_code("README"))
+        self.assertIsNone(member_code("lo/notes.txt.gz"))
+
+
+
 class Saving(TestCase):
 
     @patch("builtins.open")